@@ -0,0 +1,51 @@
+import sys
+import time
+import tracemalloc
+
+from rebel import Database, SqliteDriver
+
+
+def setup(row_count):
+    db = Database(SqliteDriver(':memory:'))
+    db.execute('CREATE TABLE sample (id INTEGER, score REAL, amount INTEGER, name TEXT)')
+    db.insert_rows('sample', ['id', 'score', 'amount', 'name'], (
+        (i, i / 3.0, i % 1000, 'name %d' % (i % 100)) for i in range(row_count)
+    ))
+    return db
+
+
+def measure(function):
+    tracemalloc.start()
+    started = time.time()
+    result = function()
+    elapsed = time.time() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def run(row_count=1000000):
+    db = setup(row_count)
+    sql = 'SELECT id, score, amount, name FROM sample'
+    results = []
+    for name, function in [
+        ('query (dict)', lambda: db.query(sql)),
+        ('query (tuple)', lambda: db.sql(sql).query(row_format=db.TUPLE)),
+        ('query_columns', lambda: db.query_columns(sql)),
+    ]:
+        elapsed, peak = measure(function)
+        results.append({'name': name, 'seconds': elapsed, 'peak_bytes': peak})
+    db.close()
+    return results
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print('%-16s %10s %12s' % ('method', 'seconds', 'peak MB'))
+    for result in run(row_count):
+        print('%-16s %10.2f %12.1f' % (result['name'], result['seconds'], result['peak_bytes'] / 1e6))
+
+
+if __name__ == '__main__':
+    main()
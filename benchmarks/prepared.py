@@ -0,0 +1,60 @@
+import timeit
+
+from rebel import Database, PgsqlDriver
+
+
+QUERIES = [
+    ('point lookup', 'SELECT id, name FROM bench_items WHERE id = ?', (42,)),
+    ('join lookup', """
+        SELECT i.id, i.name, c.name AS category FROM bench_items AS i
+        INNER JOIN bench_categories AS c ON c.id = i.category_id
+        WHERE i.id = ? AND c.id = ?
+    """, (42, 2)),
+]
+
+
+def setup(db):
+    db.execute('DROP TABLE IF EXISTS bench_items')
+    db.execute('DROP TABLE IF EXISTS bench_categories')
+    db.execute('CREATE TABLE bench_categories (id INTEGER PRIMARY KEY, name TEXT)')
+    db.execute('CREATE TABLE bench_items (id INTEGER PRIMARY KEY, name TEXT, category_id INTEGER)')
+    db.insert_rows('bench_categories', ['id', 'name'], [(i, 'category %d' % i) for i in range(10)])
+    db.insert_rows('bench_items', ['id', 'name', 'category_id'], ((i, 'item %d' % i, i % 10) for i in range(10000)))
+
+
+def measure(db, sql, args, number):
+    timer = timeit.Timer(lambda: db.query(sql, *args))
+    timer.timeit(number=10)
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def run(number=2000, **connection):
+    connection = connection or {'database': 'rebel', 'user': 'postgres'}
+    plain = Database(PgsqlDriver(**connection))
+    prepared = Database(PgsqlDriver(prepare_threshold=1, **connection))
+    setup(plain)
+    results = []
+    for name, sql, args in QUERIES:
+        results.append({
+            'query': name,
+            'plain_seconds': measure(plain, sql, args, number),
+            'prepared_seconds': measure(prepared, sql, args, number),
+        })
+    plain.close()
+    prepared.close()
+    return results
+
+
+def main():
+    print('%-14s %12s %12s %8s' % ('query', 'plain us', 'prepared us', 'ratio'))
+    for result in run():
+        print('%-14s %12.1f %12.1f %8.2f' % (
+            result['query'],
+            result['plain_seconds'] * 1e6,
+            result['prepared_seconds'] * 1e6,
+            result['plain_seconds'] / result['prepared_seconds'],
+        ))
+
+
+if __name__ == '__main__':
+    main()
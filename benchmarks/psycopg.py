@@ -0,0 +1,64 @@
+import timeit
+
+from rebel import Database, PgsqlDriver
+from rebel.drivers.psycopg import PsycopgDriver
+
+
+WIDE_COLUMNS = 50
+WIDE_ROWS = 2000
+BYTEA_ROWS = 200
+BYTEA_SIZE = 65536
+
+
+def setup(db):
+    db.execute('DROP TABLE IF EXISTS bench_wide')
+    db.execute('DROP TABLE IF EXISTS bench_bytea')
+    columns = ['c%d' % i for i in range(WIDE_COLUMNS)]
+    db.execute('CREATE TABLE bench_wide (id BIGINT, %s)' % ', '.join(
+        '%s %s' % (column, ['DOUBLE PRECISION', 'BIGINT', 'NUMERIC(12, 2)'][i % 3]) for i, column in enumerate(columns)
+    ))
+    db.insert_rows('bench_wide', ['id'] + columns, (
+        [i] + [i * 1.5 if j % 3 == 0 else i * j for j in range(WIDE_COLUMNS)] for i in range(WIDE_ROWS)
+    ))
+    db.execute('CREATE TABLE bench_bytea (id BIGINT, data BYTEA)')
+    payload = bytes(bytearray(range(256))) * (BYTEA_SIZE // 256)
+    db.insert_rows('bench_bytea', ['id', 'data'], ((i, payload) for i in range(BYTEA_ROWS)))
+
+
+QUERIES = [
+    ('wide numeric', 'SELECT * FROM bench_wide'),
+    ('bytea', 'SELECT * FROM bench_bytea'),
+]
+
+
+def measure(db, sql, number):
+    timer = timeit.Timer(lambda: db.sql(sql).query(row_format=db.TUPLE))
+    timer.timeit(number=1)
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def run(number=5, **connection):
+    connection = connection or {'database': 'rebel', 'user': 'postgres'}
+    databases = [
+        ('psycopg2', Database(PgsqlDriver(**connection))),
+        ('psycopg text', Database(PsycopgDriver(**connection))),
+        ('psycopg binary', Database(PsycopgDriver(binary=True, **connection))),
+    ]
+    setup(databases[0][1])
+    results = []
+    for query, sql in QUERIES:
+        for driver, db in databases:
+            results.append({'query': query, 'driver': driver, 'seconds': measure(db, sql, number)})
+    for _, db in databases:
+        db.close()
+    return results
+
+
+def main():
+    print('%-14s %-16s %12s' % ('query', 'driver', 'ms'))
+    for result in run():
+        print('%-14s %-16s %12.2f' % (result['query'], result['driver'], result['seconds'] * 1e3))
+
+
+if __name__ == '__main__':
+    main()
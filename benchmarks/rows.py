@@ -0,0 +1,61 @@
+import sqlite3
+import timeit
+import tracemalloc
+
+from rebel import rows as row_formats
+
+
+FORMATS = [row_formats.DICT, row_formats.TUPLE, row_formats.RECORD]
+
+
+def fetch_sample(row_count=100000):
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE sample (id INTEGER, name TEXT, email TEXT, score REAL, active INTEGER)')
+    connection.executemany(
+        'INSERT INTO sample VALUES (?, ?, ?, ?, ?)',
+        ((i, 'name %d' % i, 'user%d@example.com' % i, i / 3.0, i % 2) for i in range(row_count))
+    )
+    cursor = connection.execute('SELECT * FROM sample')
+    columns = [column[0] for column in cursor.description]
+    rows = cursor.fetchall()
+    connection.close()
+    return columns, rows
+
+
+def measure_memory(columns, rows, row_format):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = row_formats.build_rows(columns, rows, row_format)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return (after - before) / float(len(rows))
+
+
+def measure_time(columns, rows, row_format, repeat=5):
+    timer = timeit.Timer(lambda: row_formats.build_rows(columns, rows, row_format))
+    return min(timer.repeat(repeat=repeat, number=1)) / len(rows)
+
+
+def run():
+    columns, rows = fetch_sample()
+    results = []
+    for row_format in FORMATS:
+        results.append({
+            'format': row_format,
+            'bytes_per_row': measure_memory(columns, rows, row_format),
+            'seconds_per_row': measure_time(columns, rows, row_format),
+        })
+    return results
+
+
+def main():
+    print('%-8s %14s %14s' % ('format', 'bytes/row', 'ns/row'))
+    for result in run():
+        print('%-8s %14.1f %14.1f' % (
+            result['format'], result['bytes_per_row'], result['seconds_per_row'] * 1e9
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+from rebel import Database, SqliteDriver, PgsqlDriver
+
+
+BUILDER_PARTS = [10, 100, 1000, 10000, 100000]
+NESTING_DEPTHS = [1, 2, 5, 10]
+SHAPES = [
+    ('tall', 10000, 5),
+    ('wide', 100, 100),
+]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def sqlite_database():
+    return Database(SqliteDriver(':memory:'))
+
+
+def pgsql_database():
+    return Database(PgsqlDriver(database='rebel', user='postgres'))
+
+
+BACKENDS = [
+    ('sqlite', sqlite_database),
+    ('pgsql', pgsql_database),
+]
+
+
+def best(function, number, repeat=5):
+    function()
+    timer = timeit.Timer(function)
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def setup(db):
+    db.execute('DROP TABLE IF EXISTS bench_rows')
+    db.execute('CREATE TABLE bench_rows (id INTEGER PRIMARY KEY, name VARCHAR(50), score REAL)')
+    db.insert_rows('bench_rows', ['id', 'name', 'score'], ((i, 'name %d' % i, i / 3.0) for i in range(1000)))
+
+
+def raw_fetch(driver, sql, args):
+    cursor = driver.query(sql, args)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def raw_execute(driver, sql, args):
+    driver.query(sql, args).close()
+
+
+def bench_overhead(db, number):
+    sql = 'SELECT id, name, score FROM bench_rows WHERE id = ?'
+    native, _ = db._parse_kwargs(sql, (), {})
+    update = 'UPDATE bench_rows SET score = ? WHERE id = ?'
+    native_update, _ = db._parse_kwargs(update, (), {})
+    driver = db.pool.acquire()
+    db.pool.release(driver)
+    raw = {
+        'query': lambda: raw_fetch(driver, native, (42,)),
+        'execute': lambda: raw_execute(driver, native_update, (1.5, 42)),
+    }
+    calls = [
+        ('query', 'query', lambda: db.query(sql, 42)),
+        ('query_one', 'query', lambda: db.query_one(sql, 42)),
+        ('query_value', 'query', lambda: db.query_value(sql, 42)),
+        ('query_one_unbounded', 'query', lambda: db.query_one('SELECT id, name, score FROM bench_rows')),
+        ('query_values', 'query', lambda: db.query_values('SELECT id FROM bench_rows WHERE id < ?', 42)),
+        ('execute', 'execute', lambda: db.execute(update, 1.5, 42)),
+    ]
+    results = []
+    for name, baseline, call in calls:
+        raw_seconds = best(raw[baseline], number)
+        rebel_seconds = best(call, number)
+        results.append({
+            'name': 'overhead.%s' % name,
+            'seconds': rebel_seconds,
+            'raw_seconds': raw_seconds,
+            'overhead_seconds': rebel_seconds - raw_seconds,
+        })
+    return results
+
+
+def bench_parse(db, number):
+    positional = 'SELECT * FROM bench_rows WHERE id = ? AND name = ? AND score > ?'
+    named = 'SELECT * FROM bench_rows WHERE id = :id AND name = :name AND score > :score'
+    kwargs = {'id': 1, 'name': 'name 1', 'score': 0}
+
+    def cold():
+        db.statements.clear()
+        db._parse_kwargs(positional, (1, 'name 1', 0), {})
+
+    return [
+        {'name': 'parse.positional', 'seconds': best(lambda: db._parse_kwargs(positional, (1, 'name 1', 0), {}), number)},
+        {'name': 'parse.named', 'seconds': best(lambda: db._parse_kwargs(named, (), kwargs), number)},
+        {'name': 'parse.uncached', 'seconds': best(cold, number)},
+    ]
+
+
+def bench_builder(db, number):
+    results = []
+    for parts in BUILDER_PARTS:
+        def build():
+            sql = db.sql('SELECT id FROM bench_rows WHERE 1 = 1')
+            for i in range(parts):
+                sql.add('OR id = ?', i)
+            return sql._join_parts()
+        results.append({
+            'name': 'builder.%d' % parts,
+            'seconds': best(build, max(1, number // parts), repeat=3),
+        })
+    return results
+
+
+def bench_rows(db, number):
+    results = []
+    for shape, row_count, column_count in SHAPES:
+        table = 'bench_%s' % shape
+        columns = ['c%d' % i for i in range(column_count)]
+        db.execute('DROP TABLE IF EXISTS %s' % table)
+        db.execute('CREATE TABLE %s (%s)' % (table, ', '.join('%s INTEGER' % column for column in columns)))
+        db.insert_rows(table, columns, ([i] * column_count for i in range(row_count)))
+        sql = db.sql('SELECT * FROM %s' % table)
+        for row_format in [db.DICT, db.TUPLE, db.RECORD]:
+            seconds = best(lambda: sql.query(row_format=row_format), max(1, number // row_count), repeat=3)
+            results.append({
+                'name': 'rows.%s.%s' % (shape, row_format),
+                'seconds': seconds,
+                'seconds_per_row': seconds / row_count,
+            })
+        db.execute('DROP TABLE %s' % table)
+    return results
+
+
+def bench_transactions(db, number):
+    results = []
+    for depth in NESTING_DEPTHS:
+        def nest():
+            for _ in range(depth):
+                db.start_transaction()
+            for _ in range(depth):
+                db.commit()
+        results.append({'name': 'transaction.depth_%d' % depth, 'seconds': best(nest, number)})
+    return results
+
+
+BENCHMARKS = [bench_overhead, bench_parse, bench_builder, bench_rows, bench_transactions]
+
+
+def run(backends=None, number=1000):
+    results = {}
+    for name, connect in BACKENDS:
+        if backends and name not in backends:
+            continue
+        try:
+            db = connect()
+            setup(db)
+        except Exception as error:
+            sys.stderr.write('skipping %s: %s\n' % (name, error))
+            continue
+        results[name] = []
+        for benchmark in BENCHMARKS:
+            results[name].extend(benchmark(db, number))
+        db.execute('DROP TABLE bench_rows')
+        db.close()
+    return results
+
+
+def environment():
+    try:
+        revision = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.STDOUT)
+        revision = revision.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': revision,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+    }
+
+
+def compare(current, previous):
+    lines = []
+    for backend, results in sorted(current['results'].items()):
+        before = dict((result['name'], result['seconds']) for result in previous['results'].get(backend, []))
+        for result in results:
+            if result['name'] in before:
+                lines.append('%-8s %-28s %12.2f %12.2f %8.2f' % (
+                    backend, result['name'],
+                    before[result['name']] * 1e6, result['seconds'] * 1e6,
+                    result['seconds'] / before[result['name']],
+                ))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the rebel benchmark suite.')
+    parser.add_argument('--backend', action='append', choices=[name for name, _ in BACKENDS])
+    parser.add_argument('--number', type=int, default=1000, help='calls per measurement (default: 1000)')
+    parser.add_argument('--output', help='where to write the json results (default: benchmarks/results/)')
+    parser.add_argument('--compare', help='previous json results to compare against')
+    options = parser.parse_args()
+
+    report = {'environment': environment(), 'results': run(options.backend, options.number)}
+    for backend, results in sorted(report['results'].items()):
+        for result in results:
+            print('%-8s %-28s %12.2f us' % (backend, result['name'], result['seconds'] * 1e6))
+
+    output = options.output
+    if not output:
+        if not os.path.isdir(RESULTS_DIR):
+            os.makedirs(RESULTS_DIR)
+        name = '%s-%s.json' % (report['environment']['time'].replace(':', ''), report['environment']['revision'] or 'unknown')
+        output = os.path.join(RESULTS_DIR, name)
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+    print('results written to %s' % output)
+
+    if options.compare:
+        with open(options.compare) as file:
+            previous = json.load(file)
+        print('')
+        print('%-8s %-28s %12s %12s %8s' % ('backend', 'benchmark', 'before us', 'after us', 'ratio'))
+        for line in compare(report, previous):
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,16 @@
+import sys
+
 from .database import Database
+from .cache import ResultCache
+from .instrumentation import Listener, StatementStats, SlowQueryLogger, ExplainProfiler
+from .pool import ConnectionPool
+from .routing import ReplicaSet
+from .sqlite_pool import SqlitePool
 from .drivers.sqlite import SqliteDriver
 from .drivers.pgsql import PgsqlDriver
+from .drivers.psycopg import PsycopgDriver
+
+if sys.version_info >= (3, 7):
+    from .async_database import AsyncDatabase
+    from .drivers.async_sqlite import AsyncSqliteDriver
+    from .drivers.async_pgsql import AsyncPgsqlDriver
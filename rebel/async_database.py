@@ -0,0 +1,221 @@
+import asyncio
+import contextvars
+
+from . import rows as row_formats
+from .sql_builder import SqlBuilder
+from .statement import StatementCache
+from .timeouts import TimedDatabase
+from .transaction import TransactionState
+from .exceptions import NotInsideTransaction, QueryTimeout
+
+
+class AsyncDatabase(object):
+
+    READ_UNCOMMITTED = 'READ UNCOMMITTED'
+    READ_COMMITTED = 'READ COMMITTED'
+    REPEATABLE_READ = 'REPEATABLE READ'
+    SERIALIZABLE = 'SERIALIZABLE'
+
+    DICT = row_formats.DICT
+    TUPLE = row_formats.TUPLE
+    RECORD = row_formats.RECORD
+
+    def __init__(self, driver, row_format=DICT, statement_cache_size=500, timeout=None, savepoints=True):
+        self.driver = driver
+        self.timeout = timeout
+        self.savepoints = savepoints
+        self.row_format = row_format
+        self.paramstyle = driver.paramstyle
+        self.statements = StatementCache(statement_cache_size)
+        self.context = contextvars.ContextVar('rebel_transaction_%d' % id(self), default=None)
+        self.connected = False
+        self.connect_lock = None
+
+    @property
+    def state(self):
+        return self.context.get() or TransactionState()
+
+    @property
+    def transaction_depth(self):
+        return self.state.depth
+
+    def sql(self, sql_string=None, *args, **kwargs):
+        sql = SqlBuilder(self)
+        if sql_string:
+            sql.add(sql_string, *args, **kwargs)
+        return sql
+
+    async def query(self, sql, *args, **kwargs):
+        sql, args = self._parse_kwargs(sql, args, kwargs)
+        return await self._query(sql, args, self.row_format)
+
+    def with_timeout(self, timeout):
+        return TimedDatabase(self, timeout)
+
+    async def _query(self, sql, args, row_format, timeout=None):
+        timeout = self._timeout_for(timeout)
+        connection = await self._acquire()
+        try:
+            columns, rows = await self._timed(timeout, connection.fetch(sql, args, timeout))
+        finally:
+            await self._release(connection)
+        return row_formats.build_rows(columns, rows, row_format)
+
+    async def query_one(self, sql, *args, **kwargs):
+        sql, args = self._parse_kwargs(sql, args, kwargs)
+        return await self._query_one(sql, args, self.row_format)
+
+    async def _query_one(self, sql, args, row_format, timeout=None):
+        rows = await self._query(sql, args, row_format, timeout)
+        return rows[0] if rows else None
+
+    async def query_value(self, sql, *args, **kwargs):
+        sql, args = self._parse_kwargs(sql, args, kwargs)
+        return await self._query_value(sql, args)
+
+    async def _query_value(self, sql, args, timeout=None):
+        row = await self._query_one(sql, args, self.TUPLE, timeout)
+        return row[0] if row else None
+
+    async def query_values(self, sql, *args, **kwargs):
+        sql, args = self._parse_kwargs(sql, args, kwargs)
+        return await self._query_values(sql, args)
+
+    async def _query_values(self, sql, args, timeout=None):
+        rows = await self._query(sql, args, self.TUPLE, timeout)
+        return [row[0] for row in rows]
+
+    async def execute(self, sql, *args, **kwargs):
+        sql, args = self._parse_kwargs(sql, args, kwargs)
+        await self._execute(sql, args)
+
+    async def _execute(self, sql, args, timeout=None):
+        timeout = self._timeout_for(timeout)
+        connection = await self._acquire()
+        try:
+            await self._timed(timeout, connection.execute(sql, args, timeout))
+        finally:
+            await self._release(connection)
+
+    def _timeout_for(self, timeout):
+        return self.timeout if timeout is None else timeout
+
+    async def _timed(self, timeout, run):
+        try:
+            return await run
+        except asyncio.TimeoutError:
+            if timeout is None:
+                raise
+            raise QueryTimeout(timeout)
+
+    def _parse_kwargs(self, sql, args, kwargs, paramstyle=None, cache=True):
+        return self.statements.parse(sql, args, kwargs, paramstyle or self.paramstyle, cache)
+
+    def transaction(self, isolation_level=None):
+        return AsyncTransaction(self, isolation_level)
+
+    async def start_transaction(self, isolation_level=None):
+        state = self.context.get()
+        if state is None or state.depth == 0:
+            connection = await self._acquire()
+            try:
+                await connection.start_transaction(isolation_level)
+            except Exception:
+                await self.driver.release(connection)
+                raise
+            state = TransactionState()
+            state.driver = connection
+            self.context.set(state)
+        elif self.savepoints:
+            await state.driver.savepoint(self._savepoint_name(state.depth))
+        state.depth += 1
+
+    async def commit(self):
+        state = self._transaction_state()
+        if state.depth == 1:
+            connection = state.driver
+            await self._finish_transaction(connection.rollback if state.rollback_issued else connection.commit)
+        elif self.savepoints:
+            await self._leave_savepoint(state, state.driver.release_savepoint)
+        else:
+            state.depth -= 1
+
+    async def rollback(self):
+        state = self._transaction_state()
+        if state.depth == 1:
+            state.rollback_issued = True
+            await self._finish_transaction(state.driver.rollback)
+        elif self.savepoints:
+            await self._leave_savepoint(state, state.driver.rollback_to_savepoint)
+        else:
+            state.rollback_issued = True
+            state.depth -= 1
+
+    async def _leave_savepoint(self, state, leave):
+        state.depth -= 1
+        try:
+            await leave(self._savepoint_name(state.depth))
+        except Exception:
+            state.rollback_issued = True
+            raise
+
+    def _savepoint_name(self, depth):
+        return 'rebel_savepoint_%d' % depth
+
+    def _transaction_state(self):
+        state = self.context.get()
+        if state is None or state.depth == 0:
+            raise NotInsideTransaction()
+        return state
+
+    async def _finish_transaction(self, finish):
+        state = self.context.get()
+        try:
+            await finish()
+        finally:
+            state.depth = 0
+            self.context.set(None)
+            await self.driver.release(state.driver)
+
+    async def close(self):
+        if self.connected:
+            await self.driver.close()
+            self.connected = False
+
+    async def _acquire(self):
+        state = self.context.get()
+        if state is not None and state.driver is not None:
+            return state.driver
+        await self._connect_once()
+        return await self.driver.acquire()
+
+    async def _release(self, connection):
+        state = self.context.get()
+        if state is None or connection is not state.driver:
+            await self.driver.release(connection)
+
+    async def _connect_once(self):
+        if self.connected:
+            return
+        if self.connect_lock is None:
+            self.connect_lock = asyncio.Lock()
+        async with self.connect_lock:
+            if not self.connected:
+                await self.driver.connect()
+                self.connected = True
+
+
+class AsyncTransaction(object):
+
+    def __init__(self, database, isolation_level):
+        self.database = database
+        self.isolation_level = isolation_level
+
+    async def __aenter__(self):
+        await self.database.start_transaction(self.isolation_level)
+
+    async def __aexit__(self, exception_type, exception, traceback):
+        if exception:
+            await self.database.rollback()
+        else:
+            await self.database.commit()
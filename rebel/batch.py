@@ -0,0 +1,130 @@
+from . import rows as row_formats
+from .exceptions import BatchDiscarded
+
+
+QUERY = 'query'
+QUERY_ONE = 'query_one'
+QUERY_VALUE = 'query_value'
+QUERY_VALUES = 'query_values'
+EXECUTE = 'execute'
+
+
+class Batch(object):
+
+    def __init__(self, database, raise_errors=True):
+        self.database = database
+        self.raise_errors = raise_errors
+        self.statements = []
+        self.pending = []
+        self.errors = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if exception:
+            self.discard()
+        else:
+            self.flush()
+
+    def query(self, sql, *args, **kwargs):
+        return self._add(sql, args, kwargs, QUERY)
+
+    def query_one(self, sql, *args, **kwargs):
+        return self._add(sql, args, kwargs, QUERY_ONE)
+
+    def query_value(self, sql, *args, **kwargs):
+        return self._add(sql, args, kwargs, QUERY_VALUE)
+
+    def query_values(self, sql, *args, **kwargs):
+        return self._add(sql, args, kwargs, QUERY_VALUES)
+
+    def execute(self, sql, *args, **kwargs):
+        return self._add(sql, args, kwargs, EXECUTE)
+
+    def flush(self):
+        self._run()
+        if self.raise_errors and self.errors:
+            error, self.errors = self.errors[0], []
+            raise error
+
+    def discard(self):
+        for result in self.pending:
+            result._resolve(None, BatchDiscarded())
+        self.statements = []
+        self.pending = []
+
+    def _add(self, sql, args, kwargs, shape):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        result = BatchResult(self, shape, self.database.row_format)
+        self.statements.append((sql, args, shape != EXECUTE))
+        self.pending.append(result)
+        return result
+
+    def _run(self):
+        statements, self.statements = self.statements, []
+        pending, self.pending = self.pending, []
+        if not statements:
+            return
+        outcomes = self.database._run_batch(statements)
+        for result, (columns, rows, error) in zip(pending, outcomes):
+            if error is not None:
+                self.errors.append(error)
+                result._resolve(None, error)
+            else:
+                result._resolve(result._build(columns, rows), None)
+
+
+class BatchResult(object):
+
+    def __init__(self, batch, shape, row_format):
+        self.batch = batch
+        self.shape = shape
+        self.row_format = row_format
+        self.done = False
+        self.value = None
+        self.error = None
+
+    def result(self):
+        if not self.done:
+            self.batch._run()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def _resolve(self, value, error):
+        self.value = value
+        self.error = error
+        self.done = True
+
+    def _build(self, columns, rows):
+        if self.shape == EXECUTE:
+            return None
+        if self.shape in (QUERY_VALUE, QUERY_VALUES):
+            values = [row[0] for row in rows]
+            if self.shape == QUERY_VALUES:
+                return values
+            return values[0] if values else None
+        rows = row_formats.build_rows(columns, rows, self.row_format)
+        if self.shape == QUERY_ONE:
+            return rows[0] if rows else None
+        return rows
+
+
+def run_sequentially(driver, statements):
+    return [run_statement(driver, sql, args, fetch) for sql, args, fetch in statements]
+
+
+def run_statement(driver, sql, args, fetch):
+    try:
+        cursor = driver.query(sql, args)
+    except Exception as error:
+        return None, None, error
+    try:
+        if fetch:
+            return [column[0] for column in cursor.description], cursor.fetchall(), None
+        return None, None, None
+    except Exception as error:
+        return None, None, error
+    finally:
+        cursor.close()
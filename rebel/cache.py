@@ -0,0 +1,234 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from .statement import normalize, strip_literals
+
+
+clock = getattr(time, 'monotonic', time.time)
+
+reads = ('SELECT', 'VALUES', 'SHOW', 'EXPLAIN')
+neutral = (
+    'SET', 'RESET', 'CREATE', 'BEGIN', 'START', 'COMMIT', 'END', 'ROLLBACK', 'SAVEPOINT', 'RELEASE',
+    'ANALYZE', 'VACUUM', 'PRAGMA', 'LISTEN', 'NOTIFY', 'UNLISTEN', 'GRANT', 'REVOKE', 'COMMENT',
+    'DECLARE', 'FETCH', 'CLOSE', 'MOVE', 'PREPARE', 'DEALLOCATE', 'DISCARD', 'LOCK',
+)
+word_pattern = re.compile(r'[A-Za-z_][\w$]*|"(?:[^"]|"")*"')
+write_pattern = re.compile(r'\b(?:INSERT|UPDATE|DELETE|MERGE)\b', re.I)
+target_pattern = re.compile(r"""
+    (?:
+        INSERT\s+(?:OR\s+\w+\s+)?INTO
+      | REPLACE\s+INTO
+      | MERGE\s+INTO
+      | UPDATE(?:\s+OR\s+\w+)?
+      | DELETE\s+FROM
+      | TRUNCATE(?:\s+TABLE)?
+      | (?:ALTER|DROP)\s+TABLE(?:\s+IF\s+EXISTS)?
+      | COPY
+    )
+    \s+(?:ONLY\s+)?((?:"(?:[^"]|"")*"|[\w$]+)(?:\.(?:"(?:[^"]|"")*"|[\w$]+))*)
+""", re.I | re.X)
+
+
+class Analysis(object):
+
+    __slots__ = ('write', 'tables', 'words')
+
+    def __init__(self, write, tables, words):
+        self.write = write
+        self.tables = tables
+        self.words = words
+
+
+def analyze(sql):
+    code = strip_literals(sql)
+    words = set(identifier(word) for word in word_pattern.findall(code))
+    first = code.lstrip(' \t\r\n(').split(None, 1)
+    keyword = first[0].upper() if first else ''
+    if keyword in reads or keyword in neutral:
+        return Analysis(False, None, words)
+    if keyword == 'WITH' and not write_pattern.search(code):
+        return Analysis(False, None, words)
+    tables = set(identifier(name.split('.')[-1]) for name in target_pattern.findall(code))
+    return Analysis(True, tables or None, words)
+
+
+def identifier(word):
+    if word[0] == '"':
+        word = word[1:-1].replace('""', '"')
+    return word.lower()
+
+
+def copy_result(value):
+    if isinstance(value, list):
+        return [copy_row(row) for row in value]
+    return copy_row(value)
+
+
+def copy_row(row):
+    return row.copy() if isinstance(row, dict) else row
+
+
+class Flight(object):
+
+    def __init__(self, words):
+        self.words = words
+        self.event = threading.Event()
+        self.valid = True
+        self.value = None
+        self.error = None
+
+    def wait(self):
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class ResultCache(object):
+
+    def __init__(self, max_entries=1000, max_rows=100000):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.index = {}
+        self.flights = {}
+        self.analyses = {}
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.invalidations = 0
+
+    def fetch(self, sql, args, variant, ttl, load):
+        try:
+            key = (normalize(sql), tuple(args), variant)
+            hash(key)
+        except TypeError:
+            return load()
+        words = self.analysis(sql).words
+        now = clock()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.entries[key] = self.entries.pop(key)
+                self.hits += 1
+                return copy_result(entry[0])
+            if entry is not None:
+                self._remove(key)
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = self.flights[key] = Flight(words)
+            else:
+                self.collapsed += 1
+        if not leader:
+            return copy_result(flight.wait())
+        try:
+            flight.value = load()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+                if flight.error is None and flight.valid:
+                    self._store(key, copy_result(flight.value), now + ttl, words)
+            flight.event.set()
+        return flight.value
+
+    def analysis(self, sql):
+        analysis = self.analyses.get(sql)
+        if analysis is None:
+            if len(self.analyses) >= self.max_entries * 10:
+                self.analyses.clear()
+            analysis = self.analyses[sql] = analyze(sql)
+        return analysis
+
+    def invalidate(self, sql):
+        analysis = self.analysis(sql)
+        if analysis.write:
+            self.invalidate_tables(analysis.tables)
+
+    def invalidate_tables(self, tables):
+        if tables is None:
+            self.clear()
+            return
+        tables = set(identifier(table.split('.')[-1]) for table in tables)
+        with self.lock:
+            for table in tables:
+                for key in list(self.index.get(table, ())):
+                    self._remove(key)
+            for flight in self.flights.values():
+                if flight.words & tables:
+                    flight.valid = False
+            self.invalidations += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.index.clear()
+            self.rows = 0
+            for flight in self.flights.values():
+                flight.valid = False
+            self.invalidations += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'rows': self.rows,
+                'max_entries': self.max_entries,
+                'max_rows': self.max_rows,
+                'hits': self.hits,
+                'misses': self.misses,
+                'collapsed': self.collapsed,
+                'invalidations': self.invalidations,
+            }
+
+    def _store(self, key, value, expires, words):
+        rows = len(value) if isinstance(value, list) else 1
+        if rows > self.max_rows:
+            return
+        self.entries[key] = (value, expires, words, rows)
+        self.rows += rows
+        for word in words:
+            self.index.setdefault(word, set()).add(key)
+        while len(self.entries) > self.max_entries or self.rows > self.max_rows:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        value, expires, words, rows = self.entries.pop(key)
+        self.rows -= rows
+        for word in words:
+            keys = self.index.get(word)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.index[word]
+
+
+class CachedDatabase(object):
+
+    def __init__(self, database, ttl):
+        self.database = database
+        self.ttl = ttl
+
+    def query(self, sql, *args, **kwargs):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        return self.database._query(sql, args, self.database.row_format, self.ttl)
+
+    def query_one(self, sql, *args, **kwargs):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        return self.database._query_one(sql, args, self.database.row_format, self.ttl)
+
+    def query_value(self, sql, *args, **kwargs):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        return self.database._query_value(sql, args, self.ttl)
+
+    def query_values(self, sql, *args, **kwargs):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        return self.database._query_values(sql, args, self.ttl)
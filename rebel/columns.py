@@ -0,0 +1,68 @@
+from array import array
+from collections import OrderedDict
+
+
+typecodes = {int: 'q', float: 'd'}
+
+
+class ColumnBuilder(object):
+
+    __slots__ = ('values', 'typecode')
+
+    def __init__(self):
+        self.values = None
+        self.typecode = None
+
+    def extend(self, batch):
+        values = self.values
+        if values is None:
+            self.typecode = batch_typecode(batch)
+            values = self.values = array(self.typecode) if self.typecode else []
+        length = len(values)
+        try:
+            values.extend(batch)
+        except (TypeError, OverflowError):
+            del values[length:]
+            self.values = values.tolist()
+            self.typecode = None
+            self.values.extend(batch)
+
+
+def batch_typecode(batch):
+    kinds = set(map(type, batch))
+    return typecodes.get(kinds.pop()) if len(kinds) == 1 else None
+
+
+def build_columns(cursor, batch_size, numpy_types=None):
+    rows = cursor.fetchmany(batch_size)
+    description = cursor.description
+    names = [column[0] for column in description]
+    builders = [ColumnBuilder() for _ in names]
+    while rows:
+        for builder, batch in zip(builders, zip(*rows)):
+            builder.extend(batch)
+        rows = cursor.fetchmany(batch_size)
+    columns = OrderedDict()
+    for name, builder, column in zip(names, builders, description):
+        values = builder.values if builder.values is not None else []
+        if numpy_types is not None:
+            values = numpy_array(values, builder.typecode, numpy_types.get(column[1]))
+        columns[name] = values
+    return columns
+
+
+def numpy_array(values, typecode, dtype):
+    import numpy
+    if typecode == 'q':
+        return numpy.frombuffer(values, dtype=numpy.int64)
+    if typecode == 'd':
+        return numpy.frombuffer(values, dtype=numpy.float64)
+    if dtype and None not in values:
+        return numpy.array(values, dtype=dtype)
+    return numpy.array(values, dtype=object)
+
+
+def column_length(columns):
+    for values in columns.values():
+        return len(values)
+    return 0
@@ -1,8 +1,20 @@
-import re
+import itertools
+import threading
+from operator import itemgetter
 
+from . import rows as row_formats
+from .batch import Batch
+from .cache import ResultCache, CachedDatabase
+from .columns import build_columns, column_length
+from .instrumentation import QueryEvent, clock
+from .pool import ConnectionPool, SingleConnection
+from .routing import ReplicaSet, PrimaryReads
+from .scan import TableScan
 from .sql_builder import SqlBuilder
-from .transaction import Transaction
-from .exceptions import NotInsideTransaction, MixedPositionalAndNamedArguments
+from .statement import StatementCache
+from .timeouts import TimedDatabase
+from .transaction import Transaction, RetryingTransaction, TransactionState, LocalTransactionState
+from .exceptions import NoColumns, NotInsideTransaction, QueryTimeout
 
 
 class Database(object):
@@ -12,11 +24,44 @@ class Database(object):
     REPEATABLE_READ = 'REPEATABLE READ'
     SERIALIZABLE = 'SERIALIZABLE'
 
-    def __init__(self, driver):
+    DICT = row_formats.DICT
+    TUPLE = row_formats.TUPLE
+    RECORD = row_formats.RECORD
+
+    def __init__(self, driver, batch_size=1000, row_format=DICT, statement_cache_size=500, cache=None, replicas=None,
+            gather_workers=4, savepoints=True, timeout=None):
         self.driver = driver
-        self.connected = False
-        self.transaction_depth = 0
-        self.rollback_issued = False
+        self.timeout = timeout
+        self.savepoints = savepoints
+        self.batch_size = batch_size
+        self.row_format = row_format
+        self.cache = cache
+        self.gather_workers = gather_workers
+        self.gather_lock = threading.Lock()
+        self.executor = None
+        self.gather_pool = None
+        self.listeners = []
+        if isinstance(driver, ConnectionPool):
+            self.pool = driver
+            self.state = LocalTransactionState()
+            if replicas is None:
+                replicas = driver.readers
+        else:
+            self.pool = SingleConnection(driver)
+            self.state = TransactionState()
+        if replicas is not None and not isinstance(replicas, ReplicaSet):
+            replicas = ReplicaSet(replicas)
+        self.replicas = replicas
+        self.paramstyle = self.pool.driver.paramstyle
+        self.statements = StatementCache(statement_cache_size)
+
+    @property
+    def transaction_depth(self):
+        return self.state.depth
+
+    @property
+    def rollback_issued(self):
+        return self.state.rollback_issued
 
     def sql(self, sql_string=None, *args, **kwargs):
         sql = SqlBuilder(self)
@@ -24,89 +69,618 @@ class Database(object):
             sql.add(sql_string, *args, **kwargs)
         return sql
 
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+        return listener
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
     def query(self, sql, *args, **kwargs):
-        self._connect_once()
         sql, args = self._parse_kwargs(sql, args, kwargs)
-        cursor = self.driver.query(sql, args)
-        rows = self._fetch_rows_from_cursor(cursor)
-        cursor.close()
-        return rows
-
-    def _parse_kwargs(self, sql, args, kwargs):
-        if args and kwargs:
-            raise MixedPositionalAndNamedArguments()
-        if not kwargs:
-            return sql, args
-        key_pattern = ':[a-zA-Z_]+'
-        keys = re.findall(key_pattern, sql)
-        sql = re.sub(key_pattern, '?', sql)
-        args = []
-        for key in keys:
-            arg = kwargs[key[1:]]
-            args.append(arg)
-        return sql, args
-
-    def _fetch_rows_from_cursor(self, cursor):
+        return self._query(sql, args, self.row_format)
+
+    def _query(self, sql, args, row_format, cache_ttl=None, timeout=None):
+        build = lambda cursor: self._fetch_rows_from_cursor(cursor, row_format)
+        return self._load(sql, args, row_format, cache_ttl, build, len, timeout)
+
+    def _load(self, sql, args, variant, cache_ttl, build, count, timeout=None, single=False):
+        fetch = lambda driver: self._fetch(driver, sql, args, build, count, timeout, single)
+        if cache_ttl is not None and not self._inside_transaction():
+            load = lambda: self._read(sql, fetch)
+            return self._result_cache().fetch(sql, args, variant, cache_ttl, load)
+        return self._read(sql, fetch)
+
+    def _read(self, sql, fetch):
+        if self._routes_to_replica(sql):
+            result = self.replicas.run(fetch, self._on_primary)
+        else:
+            result = self._on_primary(fetch)
+        if self.cache is not None:
+            self._track_write(sql)
+        return result
+
+    def _fetch(self, driver, sql, args, build, count, timeout=None, single=False):
+        timeout = self._timeout_for(timeout)
+        if timeout is not None:
+            return self._timed(driver, timeout, lambda: self._fetch_with(driver, sql, args, build, count, single))
+        return self._fetch_with(driver, sql, args, build, count, single)
+
+    def _fetch_with(self, driver, sql, args, build, count, single=False):
+        if self.listeners:
+            return self._measured_fetch(driver, sql, args, build, count, single)
+        cursor = self._open_cursor(driver, sql, args, single)
+        try:
+            return build(cursor)
+        finally:
+            cursor.close()
+
+    def _measured_fetch(self, driver, sql, args, build, count, single=False):
+        event = QueryEvent(sql, args, driver, True)
+        open_cursor = lambda: self._open_cursor(driver, sql, args, single)
+        cursor = self._measure(event, open_cursor, lambda cursor: cursor.rowcount)
+        started = clock()
+        try:
+            result = build(cursor)
+        finally:
+            cursor.close()
+        event.fetch_time = clock() - started
+        event.rowcount = count(result)
+        self._notify('after_fetch', event)
+        return result
+
+    def _open_cursor(self, driver, sql, args, single):
+        if single and driver.streams_single_rows(sql):
+            return driver.stream(sql, args, 1)
+        return driver.query(sql, args)
+
+    def with_timeout(self, timeout):
+        return TimedDatabase(self, timeout)
+
+    def _timeout_for(self, timeout):
+        if timeout is None:
+            timeout = self.timeout
+        deadlines = self.state.deadlines
+        if deadlines and deadlines[-1] is not None:
+            remaining = deadlines[-1] - clock()
+            if timeout is None or remaining < timeout:
+                timeout = remaining
+        return timeout
+
+    def _timed(self, driver, timeout, run):
+        if timeout <= 0:
+            raise QueryTimeout(0)
+        driver.set_timeout(timeout)
+        try:
+            result = run()
+        except Exception:
+            if driver.clear_timeout():
+                raise QueryTimeout(timeout)
+            raise
+        driver.clear_timeout()
+        return result
+
+    def _measure(self, event, run, rowcount):
+        self._notify('before_execute', event)
+        started = clock()
+        try:
+            result = run()
+            event.rowcount = rowcount(result)
+            return result
+        except Exception as error:
+            event.error = error
+            raise
+        finally:
+            event.execute_time = clock() - started
+            self._notify('after_execute', event)
+
+    def _notify(self, name, *args):
+        for listener in self.listeners:
+            getattr(listener, name)(*args)
+
+    def cached(self, ttl):
+        return CachedDatabase(self, ttl)
+
+    def _result_cache(self):
+        if self.cache is None:
+            self.cache = ResultCache()
+        return self.cache
+
+    def _track_write(self, sql):
+        analysis = self.cache.analysis(sql)
+        if analysis.write:
+            self._invalidate(analysis.tables)
+
+    def _invalidate(self, tables):
+        if self._inside_transaction():
+            self.state.writes.append(tables)
+        else:
+            self.cache.invalidate_tables(tables)
+
+    def iter_query(self, sql, *args, **kwargs):
+        sql, args = self._parse_kwargs(sql, args, kwargs)
+        return self._iter_rows(sql, args, self.batch_size, self.row_format)
+
+    def _iter_rows(self, sql, args, batch_size, row_format, timeout=None):
+        replica, driver = self._acquire_for(sql)
+        event = QueryEvent(sql, args, driver, True) if self.listeners else None
+        timeout = self._timeout_for(timeout)
+        try:
+            if event:
+                stream = lambda: self._measure(event, lambda: driver.stream(sql, args, batch_size), lambda cursor: -1)
+            else:
+                stream = lambda: driver.stream(sql, args, batch_size)
+            cursor = stream() if timeout is None else self._timed(driver, timeout, stream)
+        except Exception as error:
+            self._release_from(replica, driver, error)
+            raise
+        count = 0
+        fetch = lambda: cursor.fetchmany(batch_size)
+        if timeout is not None:
+            fetch = lambda: self._timed(driver, timeout, lambda: cursor.fetchmany(batch_size))
+        try:
+            rows = fetch()
+            columns = [column[0] for column in cursor.description]
+            make_row = row_formats.row_factory(columns, row_format)
+            while rows:
+                count += len(rows)
+                for row in rows:
+                    yield make_row(row)
+                started = clock() if event else None
+                rows = fetch()
+                if event:
+                    event.fetch_time += clock() - started
+        finally:
+            cursor.close()
+            try:
+                if event:
+                    event.rowcount = count
+                    self._notify('after_fetch', event)
+            finally:
+                self._release_from(replica, driver)
+
+    def scan(self, table, key='id', chunk_size=1000, columns='*', after=None, row_format=None):
+        return TableScan(self, table, key, chunk_size, columns, after, row_format)
+
+    def _parse_kwargs(self, sql, args, kwargs, paramstyle=None, cache=True):
+        if not self.listeners:
+            return self.statements.parse(sql, args, kwargs, paramstyle or self.paramstyle, cache)
+        started = clock()
+        parsed = self.statements.parse(sql, args, kwargs, paramstyle or self.paramstyle, cache)
+        self._notify('after_parse', sql, clock() - started)
+        return parsed
+
+    def _fetch_rows_from_cursor(self, cursor, row_format=DICT):
         columns = [column[0] for column in cursor.description]
-        rows = []
-        for row in cursor.fetchall():
-            rows.append(dict(zip(columns, row)))
-        return rows
+        return row_formats.build_rows(columns, cursor.fetchall(), row_format)
+
+    def _fetch_one_from_cursor(self, cursor, row_format=DICT):
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        columns = [column[0] for column in cursor.description]
+        return row_formats.row_factory(columns, row_format)(row)
+
+    def _fetch_value_from_cursor(self, cursor):
+        row = cursor.fetchone()
+        return None if row is None else row[0]
+
+    def _fetch_values_from_cursor(self, cursor):
+        return list(map(itemgetter(0), cursor))
 
     def execute(self, sql, *args, **kwargs):
-        self._connect_once()
         sql, args = self._parse_kwargs(sql, args, kwargs)
-        cursor = self.driver.query(sql, args)
+        self._execute(sql, args)
+
+    def _execute(self, sql, args, timeout=None):
+        driver = self._acquire()
+        try:
+            timeout = self._timeout_for(timeout)
+            if timeout is not None:
+                self._timed(driver, timeout, lambda: self._execute_with(driver, sql, args))
+            else:
+                self._execute_with(driver, sql, args)
+        except Exception as error:
+            self._release(driver, error)
+            raise
+        self._release(driver)
+        if self.cache is not None:
+            self._track_write(sql)
+
+    def _execute_with(self, driver, sql, args):
+        if self.listeners:
+            event = QueryEvent(sql, args, driver, False)
+            cursor = self._measure(event, lambda: driver.query(sql, args), lambda cursor: cursor.rowcount)
+        else:
+            cursor = driver.query(sql, args)
         cursor.close()
 
+    def execute_many(self, sql, rows):
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return 0
+        rows = itertools.chain([first], rows)
+        if isinstance(first, dict):
+            statement = self.statements.get(sql, self.paramstyle, named=True)
+            sql = statement.sql
+            rows = (statement.arguments(row) for row in rows)
+        else:
+            sql, _ = self._parse_kwargs(sql, (), {})
+        counter = itertools.count()
+        rows = (row for row, _ in zip(rows, counter))
+        with self.transaction():
+            driver = self.state.driver
+            if self.listeners:
+                event = QueryEvent(sql, None, driver, False)
+                self._measure(event, lambda: driver.execute_many(sql, rows), lambda result: -1)
+            else:
+                driver.execute_many(sql, rows)
+            if self.cache is not None:
+                self._track_write(sql)
+        return next(counter)
+
+    def batch(self, raise_errors=True):
+        return Batch(self, raise_errors)
+
+    def _run_batch(self, statements):
+        driver = self._acquire()
+        try:
+            if self.listeners:
+                outcomes = self._measured_batch(driver, statements)
+            else:
+                outcomes = driver.run_batch(statements)
+        except Exception as error:
+            self._release(driver, error)
+            raise
+        self._release(driver)
+        if self.cache is not None:
+            for sql, _, _ in statements:
+                self._track_write(sql)
+        return outcomes
+
+    def _measured_batch(self, driver, statements):
+        events = [QueryEvent(sql, args, driver, fetch) for sql, args, fetch in statements]
+        for event in events:
+            self._notify('before_execute', event)
+        started = clock()
+        try:
+            outcomes = driver.run_batch(statements)
+        except Exception as error:
+            outcomes = [(None, None, error)] * len(events)
+            raise
+        finally:
+            share = (clock() - started) / len(events)
+            for event, (_, rows, error) in zip(events, outcomes):
+                event.execute_time = share
+                event.error = error
+                if rows is not None:
+                    event.rowcount = len(rows)
+                self._notify('after_execute', event)
+                if event.fetch and error is None:
+                    self._notify('after_fetch', event)
+        return outcomes
+
+    def insert_rows(self, table, columns, rows):
+        columns = list(columns)
+        if not columns:
+            raise NoColumns(table)
+        prefix = 'INSERT INTO %s (%s) VALUES ' % (table, ', '.join(columns))
+        placeholders = '(%s)' % ', '.join(['?'] * len(columns))
+        rows = iter(rows)
+        count = 0
+        with self.transaction():
+            max_rows = self.state.driver.max_parameters // len(columns)
+            chunk_size = max(1, min(max_rows, self.batch_size))
+            full_sql = self._insert_sql(prefix, placeholders, chunk_size)
+            chunk = list(itertools.islice(rows, chunk_size))
+            while chunk:
+                if len(chunk) == chunk_size:
+                    sql = full_sql
+                else:
+                    sql = self._insert_sql(prefix, placeholders, len(chunk))
+                self._execute(sql, self._flatten_rows(chunk, columns))
+                count += len(chunk)
+                chunk = list(itertools.islice(rows, chunk_size))
+        return count
+
+    def _insert_sql(self, prefix, placeholders, row_count):
+        sql = prefix + ', '.join([placeholders] * row_count)
+        return self._parse_kwargs(sql, (), {}, cache=False)[0]
+
+    def copy_in(self, table, columns, rows, format='text'):
+        columns = list(columns)
+        if not columns:
+            raise NoColumns(table)
+        with self.transaction():
+            driver = self.state.driver
+            if self.listeners:
+                event = QueryEvent('COPY %s (%s)' % (table, ', '.join(columns)), None, driver, False)
+                count = self._measure(event, lambda: driver.copy_in(table, columns, rows, format), lambda count: count)
+            else:
+                count = driver.copy_in(table, columns, rows, format)
+            if self.cache is not None:
+                self._invalidate([table])
+        return count
+
+    def _flatten_rows(self, rows, columns):
+        if isinstance(rows[0], dict):
+            return [row[column] for row in rows for column in columns]
+        return [value for row in rows for value in row]
+
+    def query_columns(self, sql, *args, **kwargs):
+        numpy = kwargs.pop('numpy', False)
+        sql, args = self._parse_kwargs(sql, args, kwargs)
+        return self._query_columns(sql, args, numpy)
+
+    def _query_columns(self, sql, args, numpy=False):
+        return self._read(sql, lambda driver: self._fetch_columns(driver, sql, args, numpy))
+
+    def _fetch_columns(self, driver, sql, args, numpy):
+        numpy_types = driver.numpy_types if numpy else None
+        if not self.listeners:
+            cursor = driver.stream(sql, args, self.batch_size)
+            try:
+                return build_columns(cursor, self.batch_size, numpy_types)
+            finally:
+                cursor.close()
+        event = QueryEvent(sql, args, driver, True)
+        cursor = self._measure(event, lambda: driver.stream(sql, args, self.batch_size), lambda cursor: -1)
+        started = clock()
+        try:
+            columns = build_columns(cursor, self.batch_size, numpy_types)
+        finally:
+            cursor.close()
+        event.fetch_time = clock() - started
+        event.rowcount = column_length(columns)
+        self._notify('after_fetch', event)
+        return columns
+
+    def gather(self, *queries):
+        statements = [self._gather_statement(query) for query in queries]
+        if len(statements) < 2 or self._inside_transaction() or not self.pool.driver.independent_connections:
+            return [self._query(sql, args, self.row_format) for sql, args in statements]
+        executor, readers = self._gather_resources()
+        replicas = self.replicas is not None and self._reads_from_replicas()
+        futures = [executor.submit(self._gather_query, readers, replicas, sql, args) for sql, args in statements]
+        return [future.result() for future in futures]
+
+    def _gather_statement(self, query):
+        if isinstance(query, SqlBuilder):
+            return query._join_parts()
+        if isinstance(query, tuple):
+            sql, args = query[0], query[1:]
+            if len(args) == 1 and isinstance(args[0], dict):
+                return self._parse_kwargs(sql, (), args[0])
+            return self._parse_kwargs(sql, args, {})
+        return self._parse_kwargs(query, (), {})
+
+    def _gather_resources(self):
+        with self.gather_lock:
+            if self.executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                if isinstance(self.pool, ConnectionPool):
+                    self.gather_pool = self.pool
+                else:
+                    self.gather_pool = ConnectionPool(self.pool.driver, min_size=0, max_size=self.gather_workers)
+                self.executor = ThreadPoolExecutor(max_workers=self.gather_workers)
+            return self.executor, self.gather_pool
+
+    def _gather_query(self, readers, replicas, sql, args):
+        build = lambda cursor: self._fetch_rows_from_cursor(cursor, self.row_format)
+        fetch = lambda driver: self._fetch(driver, sql, args, build, len)
+        on_readers = lambda fetch: self._using(readers, fetch)
+        if replicas and self.replicas.is_read(sql):
+            return self.replicas.run(fetch, on_readers)
+        return on_readers(fetch)
+
+    def _using(self, source, fetch):
+        driver = source.acquire()
+        try:
+            return fetch(driver)
+        finally:
+            source.release(driver)
+
     def query_one(self, sql, *args, **kwargs):
-        rows = self.query(sql, *args, **kwargs)
-        return rows[0] if rows else None
+        sql, args = self._parse_kwargs(sql, args, kwargs)
+        return self._query_one(sql, args, self.row_format)
+
+    def _query_one(self, sql, args, row_format, cache_ttl=None, timeout=None):
+        build = lambda cursor: self._fetch_one_from_cursor(cursor, row_format)
+        return self._load(sql, args, ('one', row_format), cache_ttl, build, _count_one, timeout, True)
 
     def query_value(self, sql, *args, **kwargs):
-        row = self.query_one(sql, *args, **kwargs)
-        return next(iter(row.values())) if row else None
+        sql, args = self._parse_kwargs(sql, args, kwargs)
+        return self._query_value(sql, args)
+
+    def _query_value(self, sql, args, cache_ttl=None, timeout=None):
+        return self._load(sql, args, 'value', cache_ttl, self._fetch_value_from_cursor, _count_one, timeout, True)
 
     def query_values(self, sql, *args, **kwargs):
-        rows = self.query(sql, *args, **kwargs)
-        values = []
-        for row in rows:
-            value = next(iter(row.values()))
-            values.append(value)
-        return values
-
-    def transaction(self, isolation_level=None):
-        return Transaction(self, isolation_level)
-
-    def start_transaction(self, isolation_level=None):
-        self._connect_once()
+        sql, args = self._parse_kwargs(sql, args, kwargs)
+        return self._query_values(sql, args)
+
+    def _query_values(self, sql, args, cache_ttl=None, timeout=None):
+        return self._load(sql, args, 'values', cache_ttl, self._fetch_values_from_cursor, len, timeout)
+
+    def transaction(self, isolation_level=None, timeout=None):
+        return Transaction(self, isolation_level, timeout)
+
+    def retrying(self, isolation_level=None, retries=3, backoff=0.01, max_backoff=1.0):
+        return RetryingTransaction(self, isolation_level, retries, backoff, max_backoff)
+
+    def run_in_transaction(self, function, isolation_level=None, retries=3, backoff=0.01, max_backoff=1.0):
+        return self.retrying(isolation_level, retries, backoff, max_backoff).run(function)
+
+    def is_retryable(self, error):
+        return self.pool.driver.is_retryable(error)
+
+    def start_transaction(self, isolation_level=None, timeout=None):
+        if self.listeners:
+            self._measure_transaction('start', self._start_transaction, isolation_level, timeout)
+        else:
+            self._start_transaction(isolation_level, timeout)
+
+    def _start_transaction(self, isolation_level, timeout=None):
+        state = self.state
         if not self._inside_transaction():
-            self.driver.start_transaction(isolation_level)
-            self.rollback_issued = False
-        self.transaction_depth += 1
+            driver = self.pool.acquire()
+            try:
+                driver.start_transaction(isolation_level)
+            except Exception as error:
+                self.pool.release(driver, discard=self._is_disconnect(driver, error))
+                raise
+            state.driver = driver
+            state.rollback_issued = False
+            state.writes = []
+            state.deadlines = []
+        elif self.savepoints:
+            state.driver.savepoint(self._savepoint_name(state.depth))
+        deadline = None if timeout is None else clock() + timeout
+        if state.deadlines and state.deadlines[-1] is not None and (deadline is None or state.deadlines[-1] < deadline):
+            deadline = state.deadlines[-1]
+        state.deadlines.append(deadline)
+        state.depth += 1
 
     def commit(self):
         if not self._inside_transaction():
             raise NotInsideTransaction()
-        if self.transaction_depth == 1 and not self.rollback_issued:
-            self.driver.commit()
-        if self.transaction_depth == 1 and self.rollback_issued:
-            self.driver.rollback()
-        self.transaction_depth -= 1
+        if self.listeners:
+            self._measure_transaction('commit', self._commit)
+        else:
+            self._commit()
+
+    def _commit(self):
+        state = self.state
+        if state.depth == 1:
+            self._finish_transaction(state.driver.rollback if state.rollback_issued else state.driver.commit)
+        elif self.savepoints:
+            self._leave_savepoint(state.driver.release_savepoint)
+        else:
+            self._leave_level()
 
     def rollback(self):
         if not self._inside_transaction():
             raise NotInsideTransaction()
-        if self.transaction_depth == 1:
-            self.driver.rollback()
-        self.transaction_depth -= 1
-        self.rollback_issued = True
+        if self.listeners:
+            self._measure_transaction('rollback', self._rollback)
+        else:
+            self._rollback()
+
+    def _rollback(self):
+        state = self.state
+        if state.depth == 1:
+            state.rollback_issued = True
+            self._finish_transaction(state.driver.rollback)
+        elif self.savepoints:
+            self._leave_savepoint(state.driver.rollback_to_savepoint)
+        else:
+            state.rollback_issued = True
+            self._leave_level()
+
+    def _leave_savepoint(self, leave):
+        state = self.state
+        self._leave_level()
+        try:
+            leave(self._savepoint_name(state.depth))
+        except Exception:
+            state.rollback_issued = True
+            raise
+
+    def _leave_level(self):
+        state = self.state
+        state.depth -= 1
+        state.deadlines.pop()
+
+    def _savepoint_name(self, depth):
+        return 'rebel_savepoint_%d' % depth
+
+    def _measure_transaction(self, action, function, *args):
+        depth = self.state.depth
+        self._notify('before_transaction', action, depth)
+        started = clock()
+        try:
+            function(*args)
+        finally:
+            self._notify('after_transaction', action, depth, clock() - started)
+
+    def _finish_transaction(self, finish):
+        state = self.state
+        driver = state.driver
+        error = None
+        try:
+            finish()
+        except Exception as failure:
+            error = failure
+            raise
+        finally:
+            state.depth = 0
+            state.deadlines = []
+            state.driver = None
+            self.pool.release(driver, discard=self._is_disconnect(driver, error))
+        if self.cache is not None and not state.rollback_issued:
+            for tables in state.writes:
+                self.cache.invalidate_tables(tables)
+
+    def use_primary(self):
+        return PrimaryReads(self)
 
-    def _connect_once(self):
-        if self.connected:
-            return
-        self.driver.connect()
-        self.connected = True
+    def close(self):
+        self.pool.close()
+        with self.gather_lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                if self.gather_pool is not self.pool:
+                    self.gather_pool.close()
+                self.executor = None
+                self.gather_pool = None
+        if self.replicas is not None:
+            self.replicas.close()
+
+    def _acquire(self):
+        driver = self.state.driver
+        return driver if driver is not None else self.pool.acquire()
+
+    def _release(self, driver, error=None):
+        if driver is not self.state.driver:
+            self.pool.release(driver, discard=self._is_disconnect(driver, error))
+
+    def _is_disconnect(self, driver, error):
+        return error is not None and driver.is_disconnect(error)
+
+    def _on_primary(self, fetch):
+        driver = self._acquire()
+        try:
+            result = fetch(driver)
+        except Exception as error:
+            self._release(driver, error)
+            raise
+        self._release(driver)
+        return result
+
+    def _acquire_for(self, sql):
+        if self._routes_to_replica(sql):
+            replica, driver = self.replicas.acquire()
+            if replica is not None:
+                return replica, driver
+        return None, self._acquire()
+
+    def _release_from(self, replica, driver, error=None):
+        if replica is None:
+            self._release(driver, error)
+            return False
+        return self.replicas.release(replica, driver, error)
+
+    def _routes_to_replica(self, sql):
+        return self.replicas is not None and self._reads_from_replicas() and self.replicas.is_read(sql)
+
+    def _reads_from_replicas(self):
+        state = self.state
+        return state.depth == 0 and state.primary_reads == 0
 
     def _inside_transaction(self):
-        return self.transaction_depth > 0
+        return self.state.depth > 0
+
+
+def _count_one(result):
+    return 0 if result is None else 1
@@ -0,0 +1,70 @@
+class AsyncPgsqlDriver(object):
+
+    paramstyle = 'numeric'
+
+    def __init__(self, host=None, port=None, database=None, user=None, password=None, min_size=1, max_size=10):
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool = None
+
+    async def connect(self):
+        import asyncpg
+        self.pool = await asyncpg.create_pool(
+            host = self.host,
+            port = self.port,
+            database = self.database,
+            user = self.user,
+            password = self.password,
+            min_size = self.min_size,
+            max_size = self.max_size
+        )
+
+    async def acquire(self):
+        return PgsqlConnection(await self.pool.acquire())
+
+    async def release(self, connection):
+        await self.pool.release(connection.connection)
+
+    async def close(self):
+        await self.pool.close()
+        self.pool = None
+
+
+class PgsqlConnection(object):
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def fetch(self, sql, args, timeout=None):
+        rows = await self.connection.fetch(sql, *args, timeout=timeout)
+        columns = list(rows[0].keys()) if rows else []
+        return columns, rows
+
+    async def execute(self, sql, args, timeout=None):
+        await self.connection.execute(sql, *args, timeout=timeout)
+
+    async def start_transaction(self, isolation_level):
+        if isolation_level:
+            await self.connection.execute('BEGIN ISOLATION LEVEL %s' % isolation_level)
+        else:
+            await self.connection.execute('BEGIN')
+
+    async def commit(self):
+        await self.connection.execute('COMMIT')
+
+    async def rollback(self):
+        await self.connection.execute('ROLLBACK')
+
+    async def savepoint(self, name):
+        await self.connection.execute('SAVEPOINT %s' % name)
+
+    async def release_savepoint(self, name):
+        await self.connection.execute('RELEASE SAVEPOINT %s' % name)
+
+    async def rollback_to_savepoint(self, name):
+        await self.connection.execute('ROLLBACK TO SAVEPOINT %s; RELEASE SAVEPOINT %s' % (name, name))
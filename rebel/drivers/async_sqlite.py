@@ -0,0 +1,105 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncSqliteDriver(object):
+
+    paramstyle = 'qmark'
+
+    def __init__(self, database, pool_size=1):
+        self.database = database
+        self.pool_size = pool_size
+        self.connections = None
+
+    async def connect(self):
+        self.connections = asyncio.Queue()
+        self.workers = []
+        for _ in range(self.pool_size):
+            worker = SqliteWorker(self.database)
+            await worker.connect()
+            self.workers.append(worker)
+            self.connections.put_nowait(worker)
+
+    async def acquire(self):
+        return await self.connections.get()
+
+    async def release(self, worker):
+        self.connections.put_nowait(worker)
+
+    async def close(self):
+        for worker in self.workers:
+            await worker.close()
+        self.connections = None
+
+
+class SqliteWorker(object):
+
+    def __init__(self, database):
+        self.database = database
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.connection = None
+
+    async def connect(self):
+        await self._run(self._connect)
+
+    def _connect(self):
+        import sqlite3
+        self.connection = sqlite3.connect(self.database, isolation_level=None)
+
+    async def fetch(self, sql, args, timeout=None):
+        return await self._run_with_timeout(timeout, self._fetch, sql, args)
+
+    def _fetch(self, sql, args):
+        cursor = self.connection.execute(sql, args)
+        try:
+            columns = [column[0] for column in cursor.description or ()]
+            return columns, cursor.fetchall()
+        finally:
+            cursor.close()
+
+    async def execute(self, sql, args, timeout=None):
+        await self._run_with_timeout(timeout, self._execute, sql, args)
+
+    def _execute(self, sql, args):
+        self.connection.execute(sql, args).close()
+
+    async def start_transaction(self, isolation_level):
+        await self.execute('BEGIN', ())
+
+    async def commit(self):
+        await self.execute('COMMIT', ())
+
+    async def rollback(self):
+        await self.execute('ROLLBACK', ())
+
+    async def savepoint(self, name):
+        await self.execute('SAVEPOINT %s' % name, ())
+
+    async def release_savepoint(self, name):
+        await self.execute('RELEASE SAVEPOINT %s' % name, ())
+
+    async def rollback_to_savepoint(self, name):
+        await self.execute('ROLLBACK TO SAVEPOINT %s' % name, ())
+        await self.execute('RELEASE SAVEPOINT %s' % name, ())
+
+    async def close(self):
+        await self._run(self.connection.close)
+        self.executor.shutdown()
+
+    async def _run_with_timeout(self, timeout, function, *args):
+        future = self._run(function, *args)
+        if timeout is None:
+            return await future
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.connection.interrupt()
+            try:
+                await future
+            except Exception:
+                pass
+            raise
+
+    def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, function, *args)
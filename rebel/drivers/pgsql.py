@@ -1,36 +1,414 @@
+import binascii
+import copy
+import itertools
+import re
+from collections import OrderedDict
+
+from ..batch import run_sequentially
+from ..cache import write_pattern
+from ..statement import format_to_numeric, strip_literals
+from ..timeouts import watchdog
+
+
+limit_pattern = re.compile(r'\b(?:LIMIT|FETCH\s+(?:FIRST|NEXT))\b', re.I)
+
+
 class PgsqlDriver(object):
 
-    def __init__(self, host=None, port=None, database=None, user=None, password=None):
+    cursor_ids = itertools.count(1)
+    statement_ids = itertools.count(1)
+    paramstyle = 'format'
+    max_parameters = 65535
+    independent_connections = True
+    preparable = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'VALUES', 'WITH')
+    schema_changes = ('CREATE', 'ALTER', 'DROP')
+    retryable_states = ('40001', '40P01')
+    explain_analyze = True
+    numpy_types = {16: 'bool', 20: 'int64', 21: 'int16', 23: 'int32', 700: 'float32', 701: 'float64'}
+
+    def __init__(self, host=None, port=None, database=None, user=None, password=None,
+            prepare_threshold=None, max_prepared=100, single_row_cursors=False):
         self.host = host
         self.port = port
         self.database = database
         self.user = user
         self.password = password
+        self.prepare_threshold = prepare_threshold
+        self.max_prepared = max_prepared
+        self.single_row_cursors = single_row_cursors
+        self.connection = None
+        self.spare = None
+        self.streams = []
+        self.timer = None
+        self.timed_out = False
+        self._reset_prepared()
 
     def connect(self, host=None, database=None, user=None, password=None, port=None):
+        self.connection = self._open()
+        self.connection.set_session(autocommit=True)
+        self._reset_prepared()
+
+    def _open(self):
         import psycopg2
-        self.connection = psycopg2.connect(
+        return psycopg2.connect(
             host = self.host,
             port = self.port,
             database = self.database,
             user = self.user,
             password = self.password
         )
-        self.connection.set_session(autocommit=True)
+
+    def disconnect(self):
+        for connection in self.streams + [self.spare, self.connection]:
+            if connection is not None:
+                connection.close()
+        self.connection = None
+        self.spare = None
+        self.streams = []
+        self._reset_prepared()
+
+    def copy(self):
+        driver = copy.copy(self)
+        driver.connection = None
+        driver.spare = None
+        driver.streams = []
+        driver._reset_prepared()
+        return driver
 
     def query(self, sql, args):
-        sql = sql.replace('?', '%s')
         cursor = self.connection.cursor()
-        cursor.execute(sql, args)
+        prepared = self._prepared_statement(cursor, sql, args) if self.prepare_threshold else None
+        if prepared:
+            self._execute_prepared(cursor, prepared, sql, args)
+        else:
+            cursor.execute(sql, args or None)
+            if self.prepared and self._first_keyword(sql) in self.schema_changes:
+                self._invalidate_prepared()
         return cursor
 
+    def _reset_prepared(self):
+        self.usage = {}
+        self.prepared = OrderedDict()
+        self.unpreparable = set()
+        self.stale = []
+
+    def _prepared_statement(self, cursor, sql, args):
+        prepared = self.prepared.pop(sql, None)
+        if prepared:
+            self.prepared[sql] = prepared
+            return prepared
+        if not self.connection.autocommit or sql in self.unpreparable:
+            return None
+        count = self.usage.get(sql, 0) + 1
+        if count < self.prepare_threshold:
+            if len(self.usage) >= self.max_prepared * 10:
+                self.usage.clear()
+            self.usage[sql] = count
+            return None
+        self.usage.pop(sql, None)
+        return self._prepare(cursor, sql, args)
+
+    def _prepare(self, cursor, sql, args):
+        import psycopg2
+        if self._first_keyword(sql) not in self.preparable:
+            self.unpreparable.add(sql)
+            return None
+        name = 'rebel_statement_%d' % next(self.statement_ids)
+        target, count = format_to_numeric(sql) if args else (sql, 0)
+        try:
+            cursor.execute('PREPARE %s AS %s' % (name, target))
+        except psycopg2.Error:
+            self.unpreparable.add(sql)
+            return None
+        if count:
+            execute_sql = 'EXECUTE %s (%s)' % (name, ', '.join(['%s'] * count))
+        else:
+            execute_sql = 'EXECUTE %s' % name
+        self.prepared[sql] = (name, execute_sql)
+        while len(self.prepared) > self.max_prepared:
+            self.stale.append(self.prepared.popitem(last=False)[1][0])
+        self._deallocate_stale(cursor)
+        return self.prepared[sql]
+
+    def _execute_prepared(self, cursor, prepared, sql, args):
+        import psycopg2
+        name, execute_sql = prepared
+        try:
+            cursor.execute(execute_sql, args or None)
+        except psycopg2.Error as error:
+            if error.pgcode != '0A000':
+                raise
+            del self.prepared[sql]
+            self.stale.append(name)
+            if not self.connection.autocommit:
+                raise
+            self._deallocate_stale(cursor)
+            cursor.execute(sql, args or None)
+
+    def _invalidate_prepared(self):
+        self.stale.extend(name for name, _ in self.prepared.values())
+        self.prepared.clear()
+        if self.connection.autocommit:
+            cursor = self.connection.cursor()
+            self._deallocate_stale(cursor)
+            cursor.close()
+
+    def _deallocate_stale(self, cursor):
+        if self.stale and self.connection.autocommit:
+            cursor.execute('; '.join('DEALLOCATE %s' % name for name in self.stale))
+            self.stale = []
+
+    def _first_keyword(self, sql):
+        words = sql.split(None, 1)
+        return words[0].upper() if words else ''
+
+    def execute_many(self, sql, rows, page_size=100):
+        from psycopg2.extras import execute_batch
+        cursor = self.connection.cursor()
+        execute_batch(cursor, sql, rows, page_size=page_size)
+        cursor.close()
+
+    def run_batch(self, statements):
+        if not self.connection.autocommit:
+            return run_sequentially(self, statements)
+        outcomes = []
+        group = []
+        for statement in statements:
+            group.append(statement)
+            if statement[2]:
+                outcomes.extend(self._run_group(group))
+                group = []
+        if group:
+            outcomes.extend(self._run_group(group))
+        return outcomes
+
+    def _run_group(self, group):
+        import psycopg2
+        if len(group) == 1:
+            return run_sequentially(self, group)
+        cursor = self.connection.cursor()
+        try:
+            sql = b'; '.join(cursor.mogrify(sql, args or None) for sql, args, _ in group)
+            cursor.execute(sql)
+            outcomes = [(None, None, None)] * (len(group) - 1)
+            if group[-1][2]:
+                outcomes.append(([column[0] for column in cursor.description], cursor.fetchall(), None))
+            else:
+                outcomes.append((None, None, None))
+            return outcomes
+        except psycopg2.Error:
+            return run_sequentially(self, group)
+        finally:
+            cursor.close()
+
+    def copy_in(self, table, columns, rows, format='text'):
+        stream = CopyStream(columns, rows, format)
+        sql = 'COPY %s (%s) FROM STDIN' % (table, ', '.join(columns))
+        if format == 'csv':
+            sql += ' WITH (FORMAT csv)'
+        cursor = self.connection.cursor()
+        cursor.copy_expert(sql, stream)
+        cursor.close()
+        return stream.count
+
+    def stream(self, sql, args, batch_size):
+        name = 'rebel_cursor_%d' % next(self.cursor_ids)
+        if not self.connection.autocommit:
+            cursor = self.connection.cursor(name)
+            cursor.itersize = batch_size
+            cursor.execute(sql, args or None)
+            return cursor
+        connection = self.spare or self._open()
+        self.spare = None
+        self.streams.append(connection)
+        cursor = connection.cursor(name)
+        cursor.itersize = batch_size
+        try:
+            cursor.execute(sql, args or None)
+        except Exception:
+            end_stream(self, connection, commit=False)
+            raise
+        return StreamCursor(cursor, lambda: end_stream(self, connection))
+
+    def streams_single_rows(self, sql):
+        return self.single_row_cursors and streams_single_rows(sql)
+
+    def is_disconnect(self, error):
+        import psycopg2
+        if isinstance(error, psycopg2.InterfaceError):
+            return True
+        return self.connection is None or self.connection.closed != 0
+
+    def explain(self, sql, args, analyze=False):
+        options = '(ANALYZE, BUFFERS, FORMAT JSON)' if analyze else '(FORMAT JSON)'
+        in_transaction = not self.connection.autocommit
+        cursor = self.connection.cursor()
+        try:
+            if in_transaction:
+                cursor.execute('SAVEPOINT rebel_explain')
+            try:
+                cursor.execute('EXPLAIN %s %s' % (options, sql), args or None)
+                plan = cursor.fetchone()[0]
+            except Exception:
+                if in_transaction:
+                    cursor.execute('ROLLBACK TO SAVEPOINT rebel_explain; RELEASE SAVEPOINT rebel_explain')
+                raise
+            if in_transaction:
+                cursor.execute('RELEASE SAVEPOINT rebel_explain')
+            return plan
+        finally:
+            cursor.close()
+
+    def set_timeout(self, seconds):
+        self.timed_out = False
+        self.timer = watchdog.schedule(seconds, self._cancel)
+
+    def clear_timeout(self):
+        watchdog.cancel(self.timer)
+        self.timer = None
+        return self.timed_out
+
+    def _cancel(self):
+        self.timed_out = True
+        for connection in [self.connection] + list(self.streams):
+            connection.cancel()
+
+    def is_retryable(self, error):
+        return getattr(error, 'pgcode', None) in self.retryable_states
+
     def start_transaction(self, isolation_level):
         self.connection.set_session(isolation_level=isolation_level, autocommit=False)
 
     def commit(self):
-        self.connection.commit()
-        self.connection.set_session(isolation_level='DEFAULT', autocommit=True)
+        try:
+            self.connection.commit()
+        finally:
+            self.connection.set_session(isolation_level='DEFAULT', autocommit=True)
 
     def rollback(self):
-        self.connection.rollback()
-        self.connection.set_session(isolation_level='DEFAULT', autocommit=True)
+        try:
+            self.connection.rollback()
+        finally:
+            self.connection.set_session(isolation_level='DEFAULT', autocommit=True)
+
+    def savepoint(self, name):
+        self._run('SAVEPOINT %s' % name)
+
+    def release_savepoint(self, name):
+        self._run('RELEASE SAVEPOINT %s' % name)
+
+    def rollback_to_savepoint(self, name):
+        self._run('ROLLBACK TO SAVEPOINT %s; RELEASE SAVEPOINT %s' % (name, name))
+
+    def _run(self, sql):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(sql)
+        finally:
+            cursor.close()
+
+
+def streams_single_rows(sql):
+    code = strip_literals(sql)
+    words = code.lstrip(' \t\r\n(').split(None, 1)
+    if not words or words[0].upper() not in ('SELECT', 'VALUES', 'WITH'):
+        return False
+    return not write_pattern.search(code) and not limit_pattern.search(code)
+
+
+def end_stream(driver, connection, commit=True):
+    driver.streams.remove(connection)
+    try:
+        if commit:
+            connection.commit()
+        else:
+            connection.rollback()
+    except Exception:
+        connection.close()
+        if commit:
+            raise
+        return
+    if driver.spare is None:
+        driver.spare = connection
+    else:
+        connection.close()
+
+
+class StreamCursor(object):
+
+    def __init__(self, cursor, finish):
+        self.cursor = cursor
+        self.finish = finish
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def close(self):
+        if self.finish is None:
+            return
+        finish, self.finish = self.finish, None
+        try:
+            self.cursor.close()
+        finally:
+            finish()
+
+
+class CopyStream(object):
+
+    escapes = (('\\', '\\\\'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r'))
+
+    def __init__(self, columns, rows, format='text', rows_per_read=1000):
+        self.columns = columns
+        self.rows = iter(rows)
+        self.format = format
+        self.rows_per_read = rows_per_read
+        self.buffer = ''
+        self.count = 0
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            chunk = self._encode_rows(itertools.islice(self.rows, self.rows_per_read))
+            if not chunk:
+                break
+            self.buffer += chunk
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def _encode_rows(self, rows):
+        lines = []
+        encode = self._csv_value if self.format == 'csv' else self._text_value
+        separator = ',' if self.format == 'csv' else '\t'
+        for row in rows:
+            if isinstance(row, dict):
+                row = [row[column] for column in self.columns]
+            lines.append(separator.join(encode(value) for value in row) + '\n')
+            self.count += 1
+        return ''.join(lines)
+
+    def _text_value(self, value):
+        if value is None:
+            return '\\N'
+        value = self._plain_value(value)
+        for character, escape in self.escapes:
+            if character in value:
+                value = value.replace(character, escape)
+        return value
+
+    def _csv_value(self, value):
+        if value is None:
+            return ''
+        return '"%s"' % self._plain_value(value).replace('"', '""')
+
+    def _plain_value(self, value):
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return '\\x' + binascii.hexlify(value).decode('ascii')
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
@@ -0,0 +1,230 @@
+import copy
+import itertools
+
+from ..batch import run_sequentially
+from ..timeouts import watchdog
+from .pgsql import CopyStream, StreamCursor, end_stream, streams_single_rows
+
+
+class PsycopgDriver(object):
+
+    cursor_ids = itertools.count(1)
+    paramstyle = 'format'
+    max_parameters = 65535
+    independent_connections = True
+    retryable_states = ('40001', '40P01')
+    explain_analyze = True
+    numpy_types = {16: 'bool', 20: 'int64', 21: 'int16', 23: 'int32', 700: 'float32', 701: 'float64'}
+
+    def __init__(self, host=None, port=None, database=None, user=None, password=None,
+            binary=False, prepare_threshold=5, single_row_cursors=False):
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        self.binary = binary
+        self.prepare_threshold = prepare_threshold
+        self.single_row_cursors = single_row_cursors
+        self.connection = None
+        self.spare = None
+        self.streams = []
+        self.timer = None
+        self.timed_out = False
+
+    def connect(self):
+        self.connection = self._open(autocommit=True)
+
+    def _open(self, autocommit=False):
+        import psycopg
+        return psycopg.connect(
+            host = self.host,
+            port = self.port,
+            dbname = self.database,
+            user = self.user,
+            password = self.password,
+            autocommit = autocommit,
+            prepare_threshold = self.prepare_threshold
+        )
+
+    def disconnect(self):
+        for connection in self.streams + [self.spare, self.connection]:
+            if connection is not None:
+                connection.close()
+        self.connection = None
+        self.spare = None
+        self.streams = []
+
+    def copy(self):
+        driver = copy.copy(self)
+        driver.connection = None
+        driver.spare = None
+        driver.streams = []
+        return driver
+
+    def query(self, sql, args):
+        cursor = self.connection.cursor(binary=self.binary)
+        cursor.execute(sql, args or None)
+        return cursor
+
+    def execute_many(self, sql, rows):
+        cursor = self.connection.cursor()
+        cursor.executemany(sql, rows)
+        cursor.close()
+
+    def run_batch(self, statements):
+        import psycopg
+        if len(statements) < 2 or not self.connection.autocommit:
+            return run_sequentially(self, statements)
+        cursors = []
+        try:
+            with self.connection.pipeline():
+                for sql, args, _ in statements:
+                    cursor = self.connection.cursor(binary=self.binary)
+                    cursors.append(cursor)
+                    cursor.execute(sql, args or None)
+            outcomes = []
+            for cursor, (_, _, fetch) in zip(cursors, statements):
+                if fetch:
+                    outcomes.append(([column.name for column in cursor.description], cursor.fetchall(), None))
+                else:
+                    outcomes.append((None, None, None))
+            return outcomes
+        except psycopg.Error:
+            return run_sequentially(self, statements)
+        finally:
+            for cursor in cursors:
+                cursor.close()
+
+    def copy_in(self, table, columns, rows, format='text'):
+        sql = 'COPY %s (%s) FROM STDIN' % (table, ', '.join(columns))
+        if format == 'csv':
+            return self._copy_csv(sql + ' WITH (FORMAT csv)', columns, rows)
+        if format == 'binary':
+            sql += ' WITH (FORMAT binary)'
+        count = 0
+        cursor = self.connection.cursor()
+        try:
+            types = self._column_types(cursor, table, columns) if format == 'binary' else None
+            with cursor.copy(sql) as copy:
+                if types:
+                    copy.set_types(types)
+                for row in rows:
+                    copy.write_row([row[column] for column in columns] if isinstance(row, dict) else row)
+                    count += 1
+        finally:
+            cursor.close()
+        return count
+
+    def _copy_csv(self, sql, columns, rows):
+        stream = CopyStream(columns, rows, 'csv')
+        cursor = self.connection.cursor()
+        try:
+            with cursor.copy(sql) as copy:
+                data = stream.read(65536)
+                while data:
+                    copy.write(data)
+                    data = stream.read(65536)
+        finally:
+            cursor.close()
+        return stream.count
+
+    def _column_types(self, cursor, table, columns):
+        cursor.execute("""
+            SELECT attname, atttypid FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+        """, [table])
+        types = dict(cursor.fetchall())
+        return [types[column.strip('"') if column.startswith('"') else column.lower()] for column in columns]
+
+    def stream(self, sql, args, batch_size):
+        name = 'rebel_cursor_%d' % next(self.cursor_ids)
+        if not self.connection.autocommit:
+            cursor = self.connection.cursor(name, binary=self.binary)
+            cursor.itersize = batch_size
+            cursor.execute(sql, args or None)
+            return cursor
+        connection = self.spare or self._open()
+        self.spare = None
+        self.streams.append(connection)
+        cursor = connection.cursor(name, binary=self.binary)
+        cursor.itersize = batch_size
+        try:
+            cursor.execute(sql, args or None)
+        except Exception:
+            end_stream(self, connection, commit=False)
+            raise
+        return StreamCursor(cursor, lambda: end_stream(self, connection))
+
+    def streams_single_rows(self, sql):
+        return self.single_row_cursors and streams_single_rows(sql)
+
+    def is_disconnect(self, error):
+        connection = self.connection
+        return connection is None or connection.closed or connection.broken
+
+    def explain(self, sql, args, analyze=False):
+        options = '(ANALYZE, BUFFERS, FORMAT JSON)' if analyze else '(FORMAT JSON)'
+        connection = self.connection
+        in_transaction = not connection.autocommit
+        if in_transaction:
+            connection.execute('SAVEPOINT rebel_explain')
+        try:
+            plan = connection.execute('EXPLAIN %s %s' % (options, sql), args or None).fetchone()[0]
+        except Exception:
+            if in_transaction:
+                connection.execute('ROLLBACK TO SAVEPOINT rebel_explain')
+                connection.execute('RELEASE SAVEPOINT rebel_explain')
+            raise
+        if in_transaction:
+            connection.execute('RELEASE SAVEPOINT rebel_explain')
+        return plan
+
+    def set_timeout(self, seconds):
+        self.timed_out = False
+        self.timer = watchdog.schedule(seconds, self._cancel)
+
+    def clear_timeout(self):
+        watchdog.cancel(self.timer)
+        self.timer = None
+        return self.timed_out
+
+    def _cancel(self):
+        self.timed_out = True
+        for connection in [self.connection] + list(self.streams):
+            connection.cancel()
+
+    def is_retryable(self, error):
+        return getattr(error, 'sqlstate', None) in self.retryable_states
+
+    def start_transaction(self, isolation_level):
+        from psycopg import IsolationLevel
+        self.connection.autocommit = False
+        if isolation_level:
+            self.connection.isolation_level = IsolationLevel[isolation_level.replace(' ', '_')]
+
+    def commit(self):
+        try:
+            self.connection.commit()
+        finally:
+            self._restore_autocommit()
+
+    def rollback(self):
+        try:
+            self.connection.rollback()
+        finally:
+            self._restore_autocommit()
+
+    def _restore_autocommit(self):
+        self.connection.isolation_level = None
+        self.connection.autocommit = True
+
+    def savepoint(self, name):
+        self.connection.execute('SAVEPOINT %s' % name)
+
+    def release_savepoint(self, name):
+        self.connection.execute('RELEASE SAVEPOINT %s' % name)
+
+    def rollback_to_savepoint(self, name):
+        self.connection.execute('ROLLBACK TO SAVEPOINT %s' % name)
+        self.connection.execute('RELEASE SAVEPOINT %s' % name)
@@ -1,27 +1,163 @@
+import copy
+import itertools
+import os
+
+from ..batch import run_sequentially
+from ..instrumentation import clock
+
+try:
+    from urllib.request import pathname2url
+except ImportError:
+    from urllib import pathname2url
+
+
 class SqliteDriver(object):
 
-    def __init__(self, database):
+    paramstyle = 'qmark'
+    max_parameters = 999
+    numpy_types = {}
+    busy_error = 5
+    progress_steps = 1000
+    explain_analyze = False
+    disconnect_errors = ('unable to open database file', 'disk I/O error', 'Cannot operate on a closed database.')
+    begin_modes = {
+        None: 'DEFERRED',
+        'READ UNCOMMITTED': 'DEFERRED',
+        'READ COMMITTED': 'DEFERRED',
+        'REPEATABLE READ': 'IMMEDIATE',
+        'SERIALIZABLE': 'EXCLUSIVE',
+        'DEFERRED': 'DEFERRED',
+        'IMMEDIATE': 'IMMEDIATE',
+        'EXCLUSIVE': 'EXCLUSIVE',
+    }
+
+    def __init__(self, database, pragmas=None, read_only=False, uri=False):
         self.database = database
+        self.pragmas = pragmas or {}
+        self.read_only = read_only
+        self.uri = uri
+        self.connection = None
+        self.timed_out = False
+
+    @property
+    def independent_connections(self):
+        database = self.database
+        return database not in ('', ':memory:') and not (self.uri and 'mode=memory' in database)
 
     def connect(self):
         import sqlite3
-        self.connection = sqlite3.connect(self.database)
-        self.autocommit = True
+        database, uri = self.database, self.uri
+        if self.read_only:
+            if not uri:
+                database = 'file:' + pathname2url(os.path.abspath(database))
+            database += ('&' if '?' in database else '?') + 'mode=ro'
+            uri = True
+        options = {'uri': True} if uri else {}
+        self.connection = sqlite3.connect(database, check_same_thread=False, isolation_level=None, **options)
+        for name, value in self.pragmas.items():
+            self.connection.execute('PRAGMA %s = %s' % (name, value)).close()
+        if hasattr(self.connection, 'getlimit'):
+            self.max_parameters = self.connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+
+    def disconnect(self):
+        self.connection.close()
+        self.connection = None
+
+    def copy(self):
+        driver = copy.copy(self)
+        driver.connection = None
+        return driver
 
     def query(self, sql, args):
         cursor = self.connection.cursor()
         cursor.execute(sql, args)
-        if self.autocommit:
-            self.commit()
         return cursor
 
+    def execute_many(self, sql, rows):
+        cursor = self.connection.cursor()
+        cursor.executemany(sql, rows)
+        cursor.close()
+
+    def run_batch(self, statements):
+        return run_sequentially(self, statements)
+
+    def copy_in(self, table, columns, rows, format=None):
+        sql = 'INSERT INTO %s (%s) VALUES (%s)' % (table, ', '.join(columns), ', '.join(['?'] * len(columns)))
+        counter = itertools.count()
+        rows = (self._row_values(row, columns) for row, _ in zip(rows, counter))
+        self.execute_many(sql, rows)
+        return next(counter)
+
+    def _row_values(self, row, columns):
+        if isinstance(row, dict):
+            return [row[column] for column in columns]
+        return row
+
+    def stream(self, sql, args, batch_size):
+        cursor = self.connection.cursor()
+        cursor.arraysize = batch_size
+        cursor.execute(sql, args)
+        return cursor
+
+    def streams_single_rows(self, sql):
+        return False
+
+    def is_disconnect(self, error):
+        return self.connection is None or str(error) in self.disconnect_errors
+
+    def explain(self, sql, args, analyze=False):
+        cursor = self.connection.execute('EXPLAIN QUERY PLAN ' + sql, args)
+        try:
+            return [{'id': row[0], 'parent': row[1], 'detail': row[-1]} for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def set_timeout(self, seconds):
+        deadline = clock() + seconds
+        self.timed_out = False
+
+        def check_deadline():
+            if clock() < deadline:
+                return 0
+            self.timed_out = True
+            return 1
+
+        self.connection.set_progress_handler(check_deadline, self.progress_steps)
+
+    def clear_timeout(self):
+        self.connection.set_progress_handler(None, 0)
+        return self.timed_out
+
+    def is_retryable(self, error):
+        import sqlite3
+        if not isinstance(error, sqlite3.OperationalError):
+            return False
+        code = getattr(error, 'sqlite_errorcode', None)
+        if code is not None:
+            return code & 0xff == self.busy_error
+        return str(error).startswith('database is locked')
+
     def start_transaction(self, isolation_level):
-        self.autocommit = False
+        mode = self.begin_modes.get(isolation_level, 'DEFERRED')
+        self.connection.execute('BEGIN %s' % mode).close()
 
     def commit(self):
-        self.connection.commit()
-        self.autocommit = True
+        try:
+            self.connection.commit()
+        except Exception:
+            if self.connection.in_transaction:
+                self.connection.rollback()
+            raise
 
     def rollback(self):
         self.connection.rollback()
-        self.autocommit = True
+
+    def savepoint(self, name):
+        self.connection.execute('SAVEPOINT %s' % name).close()
+
+    def release_savepoint(self, name):
+        self.connection.execute('RELEASE SAVEPOINT %s' % name).close()
+
+    def rollback_to_savepoint(self, name):
+        self.connection.execute('ROLLBACK TO SAVEPOINT %s' % name).close()
+        self.connection.execute('RELEASE SAVEPOINT %s' % name).close()
@@ -10,3 +10,46 @@ class MixedPositionalAndNamedArguments(Exception):
     def __init__(self):
         message = 'Cannot mix positional and named arguments in query'
         super(MixedPositionalAndNamedArguments, self).__init__(message)
+
+
+class UnknownRowFormat(Exception):
+
+    def __init__(self, row_format):
+        message = 'Unknown row format: %r' % (row_format,)
+        super(UnknownRowFormat, self).__init__(message)
+
+
+class PoolTimeout(Exception):
+
+    def __init__(self, timeout):
+        message = 'Could not acquire a connection from the pool within %s seconds' % timeout
+        super(PoolTimeout, self).__init__(message)
+
+
+class BatchDiscarded(Exception):
+
+    def __init__(self):
+        message = 'The batch was discarded before this statement was executed'
+        super(BatchDiscarded, self).__init__(message)
+
+
+class SqliteFileRequired(Exception):
+
+    def __init__(self, database):
+        message = 'Sharing a sqlite database between threads needs a database file, got %r' % (database,)
+        super(SqliteFileRequired, self).__init__(message)
+
+
+class QueryTimeout(Exception):
+
+    def __init__(self, timeout):
+        message = 'The query was cancelled after running for %s seconds' % timeout
+        super(QueryTimeout, self).__init__(message)
+        self.timeout = timeout
+
+
+class NoColumns(Exception):
+
+    def __init__(self, table):
+        message = 'Cannot insert rows into %s without any columns' % table
+        super(NoColumns, self).__init__(message)
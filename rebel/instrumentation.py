@@ -0,0 +1,192 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from .routing import is_read
+from .statement import fingerprint
+
+
+clock = getattr(time, 'monotonic', time.time)
+
+
+class QueryEvent(object):
+
+    __slots__ = ('sql', 'args', 'driver', 'fetch', 'execute_time', 'fetch_time', 'rowcount', 'error')
+
+    def __init__(self, sql, args, driver, fetch):
+        self.sql = sql
+        self.args = args
+        self.driver = driver
+        self.fetch = fetch
+        self.execute_time = 0.0
+        self.fetch_time = 0.0
+        self.rowcount = -1
+        self.error = None
+
+    @property
+    def elapsed(self):
+        return self.execute_time + self.fetch_time
+
+
+class Listener(object):
+
+    def after_parse(self, sql, elapsed):
+        pass
+
+    def before_execute(self, event):
+        pass
+
+    def after_execute(self, event):
+        pass
+
+    def after_fetch(self, event):
+        pass
+
+    def before_transaction(self, action, depth):
+        pass
+
+    def after_transaction(self, action, depth, elapsed):
+        pass
+
+    def before_retry(self, error, attempt, delay):
+        pass
+
+
+class StatementListener(Listener):
+
+    def after_execute(self, event):
+        if event.error is not None or not event.fetch:
+            self.on_statement(event)
+
+    def after_fetch(self, event):
+        self.on_statement(event)
+
+    def on_statement(self, event):
+        pass
+
+
+class StatementStats(StatementListener):
+
+    def __init__(self, samples=1000):
+        self.samples = samples
+        self.lock = threading.Lock()
+        self.statements = {}
+
+    def on_statement(self, event):
+        key = fingerprint(event.sql)
+        with self.lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = {
+                    'calls': 0, 'errors': 0, 'rows': 0, 'total_time': 0.0,
+                    'latencies': deque(maxlen=self.samples),
+                }
+            stats['calls'] += 1
+            stats['errors'] += event.error is not None
+            stats['rows'] += max(event.rowcount, 0)
+            stats['total_time'] += event.elapsed
+            stats['latencies'].append(event.elapsed)
+
+    def report(self):
+        with self.lock:
+            statements = [(key, dict(stats, latencies=sorted(stats['latencies']))) for key, stats in self.statements.items()]
+        report = []
+        for key, stats in statements:
+            latencies = stats.pop('latencies')
+            stats['sql'] = key
+            stats['p50'] = percentile(latencies, 50)
+            stats['p99'] = percentile(latencies, 99)
+            report.append(stats)
+        return sorted(report, key=lambda stats: stats['total_time'], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.statements = {}
+
+
+class SlowQueryLogger(StatementListener):
+
+    def __init__(self, threshold=1.0, logger=None, level=logging.WARNING):
+        self.threshold = threshold
+        self.logger = logger or logging.getLogger('rebel')
+        self.level = level
+
+    def on_statement(self, event):
+        if event.elapsed >= self.threshold:
+            self.logger.log(
+                self.level, 'Slow query (%.3fs, %d rows): %s',
+                event.elapsed, event.rowcount, fingerprint(event.sql)
+            )
+
+
+class ExplainProfiler(StatementListener):
+
+    def __init__(self, threshold=1.0, interval=60.0, capacity=100, path=None, analyze=False, sample_rate=1.0):
+        self.threshold = threshold
+        self.interval = interval
+        self.path = path
+        self.analyze = analyze
+        self.sample_rate = sample_rate
+        self.lock = threading.Lock()
+        self.captures = deque(maxlen=capacity)
+        self.last_captures = {}
+
+    def on_statement(self, event):
+        if event.error is not None or event.args is None or event.elapsed < self.threshold:
+            return
+        key = fingerprint(event.sql)
+        if not self._should_capture(key):
+            return
+        analyze = self.analyze and event.driver.explain_analyze and is_read(event.sql)
+        try:
+            plan, error = event.driver.explain(event.sql, event.args, analyze), None
+        except Exception as failure:
+            plan, error = None, str(failure)
+        capture = {
+            'time': time.time(),
+            'sql': key,
+            'elapsed': event.elapsed,
+            'execute_time': event.execute_time,
+            'fetch_time': event.fetch_time,
+            'rowcount': event.rowcount,
+            'analyze': analyze,
+            'plan': plan,
+            'error': error,
+        }
+        with self.lock:
+            self.captures.append(capture)
+            if self.path:
+                with open(self.path, 'a') as file:
+                    file.write(json.dumps(capture, default=str) + '\n')
+
+    def _should_capture(self, key):
+        now = clock()
+        with self.lock:
+            last = self.last_captures.get(key)
+            if last is not None and now - last < self.interval:
+                return False
+            if self.sample_rate < 1 and random.random() >= self.sample_rate:
+                return False
+            if len(self.last_captures) >= 10000:
+                self.last_captures = dict(item for item in self.last_captures.items() if now - item[1] < self.interval)
+            self.last_captures[key] = now
+            return True
+
+    def report(self):
+        with self.lock:
+            return list(self.captures)
+
+    def reset(self):
+        with self.lock:
+            self.captures.clear()
+            self.last_captures = {}
+
+
+def percentile(values, percent):
+    if not values:
+        return None
+    index = int(round((len(values) - 1) * percent / 100.0))
+    return values[index]
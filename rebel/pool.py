@@ -0,0 +1,196 @@
+import threading
+import time
+import weakref
+
+from .exceptions import PoolTimeout
+from .timeouts import watchdog
+
+
+clock = getattr(time, 'monotonic', time.time)
+
+
+class SingleConnection(object):
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.connected = False
+
+    def acquire(self):
+        if not self.connected:
+            self.driver.connect()
+            self.connected = True
+        return self.driver
+
+    def release(self, driver, discard=False):
+        if discard:
+            self.close()
+
+    def close(self):
+        if self.connected:
+            self.driver.disconnect()
+            self.connected = False
+
+
+class ConnectionPool(object):
+
+    readers = None
+
+    def __init__(self, driver, min_size=1, max_size=10, timeout=None, idle_timeout=None):
+        self.driver = driver
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.condition = threading.Condition()
+        self.idle = []
+        self.size = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeouts = 0
+        self.evicted = 0
+        self.started = False
+        self.closed = False
+
+    def acquire(self):
+        if not self.started:
+            self._start()
+        started = clock()
+        with self.condition:
+            evicted = self._take_expired(started)
+            waited = False
+            while not self.idle and self.size >= self.max_size:
+                waited = True
+                remaining = self._remaining(started)
+                if remaining is not None and remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(self.timeout)
+                self.condition.wait(remaining)
+            driver = self.idle.pop()[0] if self.idle else None
+            if driver is None:
+                self.size += 1
+            self.in_use += 1
+            self._record_checkout(clock() - started, waited)
+        self._disconnect(evicted)
+        if driver is None:
+            driver = self._open()
+        return driver
+
+    def release(self, driver, discard=False):
+        with self.condition:
+            self.in_use -= 1
+            if discard:
+                self.size -= 1
+            else:
+                self.idle.append((driver, clock()))
+            evicted = self._take_expired(clock())
+            self.condition.notify()
+        self._disconnect(evicted)
+        if discard:
+            self._disconnect([driver])
+
+    def fill(self):
+        while True:
+            with self.condition:
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            driver = self._open(checkout=False)
+            with self.condition:
+                self.idle.append((driver, clock()))
+                self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            drivers = [driver for driver, _ in self.idle]
+            self.size -= len(drivers)
+            self.idle = []
+        self._disconnect(drivers)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'utilization': float(self.in_use) / self.max_size,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'max_wait_time': self.max_wait_time,
+                'timeouts': self.timeouts,
+                'evicted': self.evicted,
+            }
+
+    def _start(self):
+        with self.condition:
+            if self.started:
+                return
+            self.started = True
+        if self.idle_timeout is not None:
+            _schedule_reaper(self)
+        self.fill()
+
+    def _reap(self):
+        with self.condition:
+            if self.closed:
+                return False
+            evicted = self._take_expired(clock())
+        self._disconnect(evicted)
+        return True
+
+    def _open(self, checkout=True):
+        driver = self.driver.copy()
+        try:
+            driver.connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                if checkout:
+                    self.in_use -= 1
+                self.condition.notify()
+            raise
+        return driver
+
+    def _remaining(self, started):
+        if self.timeout is None:
+            return None
+        return self.timeout - (clock() - started)
+
+    def _record_checkout(self, wait_time, waited):
+        self.checkouts += 1
+        if waited:
+            self.waits += 1
+        self.wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def _take_expired(self, now):
+        if self.idle_timeout is None:
+            return []
+        evicted = []
+        while self.idle and self.size > self.min_size and now - self.idle[0][1] > self.idle_timeout:
+            evicted.append(self.idle.pop(0)[0])
+            self.size -= 1
+            self.evicted += 1
+        return evicted
+
+    def _disconnect(self, drivers):
+        for driver in drivers:
+            driver.disconnect()
+
+
+def _schedule_reaper(pool):
+    reference = weakref.ref(pool)
+    interval = pool.idle_timeout
+
+    def reap():
+        pool = reference()
+        if pool is not None and pool._reap():
+            watchdog.schedule(interval, reap)
+
+    watchdog.schedule(interval, reap)
@@ -0,0 +1,142 @@
+import itertools
+import re
+import threading
+
+from .cache import write_pattern
+from .pool import ConnectionPool, SingleConnection, clock
+from .statement import strip_literals
+
+
+reads = ('SELECT', 'VALUES', 'SHOW', 'EXPLAIN', 'WITH', 'TABLE')
+lock_pattern = re.compile(r'\bFOR\s+(?:NO\s+KEY\s+|KEY\s+)?(?:UPDATE|SHARE)\b', re.I)
+
+
+class Replica(object):
+
+    def __init__(self, source):
+        self.source = source
+        self.outstanding = 0
+        self.queries = 0
+        self.failures = 0
+        self.ejected_until = None
+
+
+class ReplicaSet(object):
+
+    ROUND_ROBIN = 'round_robin'
+    LEAST_OUTSTANDING = 'least_outstanding'
+
+    def __init__(self, drivers, strategy=ROUND_ROBIN, eject_time=30.0):
+        self.replicas = [Replica(self._source(driver)) for driver in drivers]
+        self.strategy = strategy
+        self.eject_time = eject_time
+        self.lock = threading.Lock()
+        self.turns = itertools.count()
+        self.reads = {}
+        self.ejections = 0
+
+    def _source(self, driver):
+        if isinstance(driver, ConnectionPool):
+            return driver
+        return SingleConnection(driver)
+
+    def is_read(self, sql):
+        read = self.reads.get(sql)
+        if read is None:
+            if len(self.reads) >= 1000:
+                self.reads.clear()
+            read = self.reads[sql] = is_read(sql)
+        return read
+
+    def acquire(self):
+        while True:
+            replica = self._choose()
+            if replica is None:
+                return None, None
+            try:
+                return replica, replica.source.acquire()
+            except Exception:
+                with self.lock:
+                    replica.outstanding -= 1
+                    self._eject(replica)
+
+    def run(self, fetch, fallback):
+        while True:
+            replica, driver = self.acquire()
+            if replica is None:
+                return fallback(fetch)
+            try:
+                result = fetch(driver)
+            except Exception as error:
+                if self.release(replica, driver, error):
+                    continue
+                raise
+            self.release(replica, driver)
+            return result
+
+    def release(self, replica, driver, error=None):
+        disconnected = error is not None and driver.is_disconnect(error)
+        replica.source.release(driver, discard=disconnected)
+        with self.lock:
+            replica.outstanding -= 1
+            if disconnected:
+                self._eject(replica)
+        return disconnected
+
+    def close(self):
+        for replica in self.replicas:
+            replica.source.close()
+
+    def stats(self):
+        now = clock()
+        with self.lock:
+            return {
+                'ejections': self.ejections,
+                'replicas': [{
+                    'outstanding': replica.outstanding,
+                    'queries': replica.queries,
+                    'failures': replica.failures,
+                    'healthy': replica.ejected_until is None or replica.ejected_until <= now,
+                } for replica in self.replicas],
+            }
+
+    def _choose(self):
+        now = clock()
+        with self.lock:
+            healthy = [replica for replica in self.replicas if replica.ejected_until is None or replica.ejected_until <= now]
+            if not healthy:
+                return None
+            turn = next(self.turns) % len(healthy)
+            healthy = healthy[turn:] + healthy[:turn]
+            if self.strategy == self.LEAST_OUTSTANDING:
+                replica = min(healthy, key=lambda replica: replica.outstanding)
+            else:
+                replica = healthy[0]
+            replica.ejected_until = None
+            replica.outstanding += 1
+            replica.queries += 1
+            return replica
+
+    def _eject(self, replica):
+        replica.failures += 1
+        replica.ejected_until = clock() + self.eject_time
+        self.ejections += 1
+
+
+class PrimaryReads(object):
+
+    def __init__(self, database):
+        self.database = database
+
+    def __enter__(self):
+        self.database.state.primary_reads += 1
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.database.state.primary_reads -= 1
+
+
+def is_read(sql):
+    code = strip_literals(sql)
+    first = code.lstrip(' \t\r\n(').split(None, 1)
+    keyword = first[0].upper() if first else ''
+    return keyword in reads and not write_pattern.search(code) and not lock_pattern.search(code)
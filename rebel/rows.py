@@ -0,0 +1,91 @@
+from .exceptions import UnknownRowFormat
+
+
+DICT = 'dict'
+TUPLE = 'tuple'
+RECORD = 'record'
+
+_record_classes = {}
+_max_record_classes = 1000
+
+
+class Record(tuple):
+
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return tuple.__getitem__(self, key)
+        return tuple.__getitem__(self, self._index[key])
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return list(self._fields)
+
+    def values(self):
+        return list(self)
+
+    def items(self):
+        return list(zip(self._fields, self))
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+    def __reduce__(self):
+        return _make_record, (self._fields, tuple(self))
+
+    def __repr__(self):
+        pairs = ', '.join('%s=%r' % pair for pair in zip(self._fields, self))
+        return '%s(%s)' % (self.__class__.__name__, pairs)
+
+
+def record_class(columns):
+    columns = tuple(columns)
+    cls = _record_classes.get(columns)
+    if cls is None:
+        if len(_record_classes) >= _max_record_classes:
+            _record_classes.clear()
+        cls = _build_record_class(columns)
+        _record_classes[columns] = cls
+    return cls
+
+
+def _make_record(columns, values):
+    return record_class(columns)(values)
+
+
+def _build_record_class(columns):
+    index = {}
+    for i, column in enumerate(columns):
+        index.setdefault(column, i)
+    attributes = {'__slots__': (), '_fields': columns, '_index': index}
+    for column, i in index.items():
+        if not hasattr(Record, column):
+            attributes[column] = property(_item_getter(i))
+    return type('Record', (Record,), attributes)
+
+
+def _item_getter(i):
+    getter = tuple.__getitem__
+    return lambda row: getter(row, i)
+
+
+def row_factory(columns, row_format):
+    if row_format == DICT:
+        return lambda row: dict(zip(columns, row))
+    if row_format == TUPLE:
+        return tuple
+    if row_format == RECORD:
+        return record_class(columns)
+    raise UnknownRowFormat(row_format)
+
+
+def build_rows(columns, rows, row_format):
+    if row_format == DICT:
+        return [dict(zip(columns, row)) for row in rows]
+    return list(map(row_factory(columns, row_format), rows))
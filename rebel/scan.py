@@ -0,0 +1,205 @@
+from numbers import Number
+
+from . import rows as row_formats
+from .pool import ConnectionPool
+
+
+class ScanPartition(object):
+
+    def __init__(self, index, after, until, rows=0, done=False):
+        self.index = index
+        self.after = after
+        self.until = until
+        self.rows = rows
+        self.done = done
+
+    def advance(self, count, last_key, chunk_size):
+        self.rows += count
+        if count:
+            self.after = last_key
+        self.done = count < chunk_size
+
+    def as_dict(self):
+        return {'index': self.index, 'after': self.after, 'until': self.until, 'rows': self.rows, 'done': self.done}
+
+
+class TableScan(object):
+
+    def __init__(self, database, table, key='id', chunk_size=1000, columns='*', after=None, row_format=None):
+        if not isinstance(columns, str):
+            columns = list(columns)
+            if key not in columns:
+                columns.insert(0, key)
+            columns = ', '.join(columns)
+        self.database = database
+        self.table = table
+        self.key = key
+        self.chunk_size = chunk_size
+        self.columns = columns
+        self.after = after
+        self.row_format = row_format or database.row_format
+        self.last_key = after
+        self.partitions = []
+
+    def __iter__(self):
+        after = self.after
+        while True:
+            rows, last_key = self._fetch_chunk(after, None)
+            if not rows:
+                return
+            self.last_key = after = last_key
+            yield rows
+            if len(rows) < self.chunk_size:
+                return
+
+    def run(self, function, partitions=4, workers=None, processes=False, progress=None, resume=None):
+        if resume is not None:
+            self.partitions = [ScanPartition(**partition) for partition in resume]
+        else:
+            self.partitions = self._split(partitions)
+        pending = [partition for partition in self.partitions if not partition.done]
+        workers = workers or len(pending)
+        driver = self.database.pool.driver
+        if len(pending) < 2 or workers < 2 or not driver.independent_connections:
+            for partition in pending:
+                while not partition.done:
+                    self._advance(partition, self._process_chunk(partition.after, partition.until, function), progress)
+        elif processes:
+            self._run_in_processes(pending, function, workers, progress)
+        else:
+            self._run_in_threads(pending, function, workers, progress)
+        return self.checkpoint()
+
+    def checkpoint(self):
+        return [partition.as_dict() for partition in self.partitions]
+
+    def _run_in_threads(self, pending, function, workers, progress):
+        from concurrent.futures import ThreadPoolExecutor
+        pool = self.database.pool
+        if not isinstance(pool, ConnectionPool):
+            pool = ConnectionPool(pool.driver, min_size=0, max_size=workers)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        submit = lambda partition: executor.submit(self._process_chunk, partition.after, partition.until, function, pool)
+        try:
+            self._drive(pending, submit, progress)
+        finally:
+            executor.shutdown()
+            if pool is not self.database.pool:
+                pool.close()
+
+    def _run_in_processes(self, pending, function, workers, progress):
+        from concurrent.futures import ProcessPoolExecutor
+        driver = self.database.pool.driver.copy()
+        executor = ProcessPoolExecutor(max_workers=workers)
+        spec = (driver, self.table, self.key, self.chunk_size, self.columns, self.row_format)
+        submit = lambda partition: executor.submit(_process_chunk_in_worker, spec, partition.after, partition.until, function)
+        try:
+            self._drive(pending, submit, progress)
+        finally:
+            executor.shutdown()
+
+    def _drive(self, pending, submit, progress):
+        from concurrent.futures import wait, FIRST_COMPLETED
+        futures = dict((submit(partition), partition) for partition in pending)
+        error = None
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                partition = futures.pop(future)
+                try:
+                    outcome = future.result()
+                except Exception as failure:
+                    error = error or failure
+                    continue
+                self._advance(partition, outcome, progress)
+                if not partition.done and error is None:
+                    futures[submit(partition)] = partition
+        if error is not None:
+            raise error
+
+    def _advance(self, partition, outcome, progress):
+        count, last_key = outcome
+        partition.advance(count, last_key, self.chunk_size)
+        if progress is not None:
+            progress(partition)
+
+    def _process_chunk(self, after, until, function, source=None):
+        rows, last_key = self._fetch_chunk(after, until, source)
+        if rows:
+            function(rows)
+        return len(rows), last_key
+
+    def _fetch_chunk(self, after, until, source=None):
+        database = self.database
+        sql, args = self._statement(after, until)
+        fetch = lambda driver: database._fetch(driver, sql, args, self._build, _count_chunk)
+        if source is None:
+            return database._read(sql, fetch)
+        on_source = lambda fetch: database._using(source, fetch)
+        if database.replicas is not None and database.replicas.is_read(sql):
+            return database.replicas.run(fetch, on_source)
+        return on_source(fetch)
+
+    def _build(self, cursor):
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+        last_key = rows[-1][columns.index(self.key)] if rows else None
+        return row_formats.build_rows(columns, rows, self.row_format), last_key
+
+    def _statement(self, after, until):
+        conditions, args = [], []
+        if after is not None:
+            conditions.append('%s > ?' % self.key)
+            args.append(after)
+        if until is not None:
+            conditions.append('%s <= ?' % self.key)
+            args.append(until)
+        sql = 'SELECT %s FROM %s' % (self.columns, self.table)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY %s LIMIT %d' % (self.key, self.chunk_size)
+        return self.database._parse_kwargs(sql, args, {})
+
+    def _split(self, count):
+        database, key, table = self.database, self.key, self.table
+        low, high = database._query_one('SELECT MIN(%s), MAX(%s) FROM %s' % (key, key, table), [], row_formats.TUPLE)
+        bounds = []
+        if count > 1 and low is not None and low != high:
+            if _is_number(low) and _is_number(high):
+                if isinstance(low, int) and isinstance(high, int):
+                    bounds = [low + (high - low) * i // count for i in range(1, count)]
+                else:
+                    bounds = [low + (high - low) * i / count for i in range(1, count)]
+            else:
+                total = database._query_value('SELECT COUNT(*) FROM %s' % table, [])
+                sql, _ = database._parse_kwargs('SELECT %s FROM %s ORDER BY %s LIMIT 1 OFFSET ?' % (key, table, key), (), {})
+                bounds = [database._query_value(sql, [total * i // count]) for i in range(1, count)]
+        bounds = sorted(set(bound for bound in bounds if self.after is None or bound > self.after))
+        afters = [self.after] + bounds
+        untils = bounds + [None]
+        return [ScanPartition(i, after, until) for i, (after, until) in enumerate(zip(afters, untils))]
+
+
+def _is_number(value):
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def _count_chunk(result):
+    return len(result[0])
+
+
+_worker_database = None
+
+
+def _worker(driver):
+    global _worker_database
+    if _worker_database is None:
+        from .database import Database
+        _worker_database = Database(driver)
+    return _worker_database
+
+
+def _process_chunk_in_worker(spec, after, until, function):
+    driver, table, key, chunk_size, columns, row_format = spec
+    scan = TableScan(_worker(driver), table, key, chunk_size, columns, row_format=row_format)
+    return scan._process_chunk(after, until, function)
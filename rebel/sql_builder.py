@@ -1,44 +1,111 @@
+from itertools import chain
+
+from .statement import QMARK
+from .exceptions import MixedPositionalAndNamedArguments
+
+
 class SqlBuilder(object):
 
     def __init__(self, database):
         self.database = database
-        self.parts = []
+        self.sqls = []
+        self.args = []
+        self.names = []
 
     def add(self, sql, *args, **kwargs):
-        sql, args = self.database._parse_kwargs(sql, args, kwargs)
-        self.parts.append({
-            'sql': sql,
-            'args': args,
-        })
+        names = None
+        if kwargs:
+            if args:
+                raise MixedPositionalAndNamedArguments()
+            statement = self.database.statements.get(sql, QMARK, named=True)
+            sql, args, names = statement.sql, statement.arguments(kwargs), statement.names
+        self.sqls.append(sql)
+        self.args.append(args)
+        self.names.append(names)
         return self
 
     def back(self):
-        self.parts.pop()
+        self.sqls.pop()
+        self.args.pop()
+        self.names.pop()
+
+    def compile(self):
+        sql, _ = self._join_parts()
+        slots = []
+        for args, names in zip(self.args, self.names):
+            slots.extend(names if names is not None else [None] * len(args))
+        return SqlTemplate(self.database, sql, slots)
+
+    def query(self, row_format=None, cache_ttl=None, timeout=None):
+        sql, args = self._join_parts()
+        row_format = row_format or self.database.row_format
+        return self.database._query(sql, args, row_format, timeout=timeout, **_cache_options(cache_ttl))
 
-    def query(self):
+    def iter_query(self, batch_size=None, row_format=None, timeout=None):
         sql, args = self._join_parts()
-        return self.database.query(sql, *args)
+        batch_size = batch_size or self.database.batch_size
+        row_format = row_format or self.database.row_format
+        return self.database._iter_rows(sql, args, batch_size, row_format, timeout)
 
-    def query_one(self):
+    def query_columns(self, numpy=False):
         sql, args = self._join_parts()
-        return self.database.query_one(sql, *args)
+        return self.database._query_columns(sql, args, numpy)
 
-    def query_value(self):
+    def query_one(self, row_format=None, cache_ttl=None, timeout=None):
         sql, args = self._join_parts()
-        return self.database.query_value(sql, *args)
+        row_format = row_format or self.database.row_format
+        return self.database._query_one(sql, args, row_format, timeout=timeout, **_cache_options(cache_ttl))
 
-    def query_values(self):
+    def query_value(self, cache_ttl=None, timeout=None):
         sql, args = self._join_parts()
-        return self.database.query_values(sql, *args)
+        return self.database._query_value(sql, args, timeout=timeout, **_cache_options(cache_ttl))
 
-    def execute(self):
+    def query_values(self, cache_ttl=None, timeout=None):
         sql, args = self._join_parts()
-        self.database.execute(sql, *args)
+        return self.database._query_values(sql, args, timeout=timeout, **_cache_options(cache_ttl))
+
+    def execute(self, timeout=None):
+        sql, args = self._join_parts()
+        return self.database._execute(sql, args, timeout)
 
     def _join_parts(self):
-        sql = ''
-        args = []
-        for part in self.parts:
-            sql += part['sql'] + ' '
-            args += part['args']
-        return sql.strip(), args
+        sql = ' '.join(self.sqls).strip()
+        args = list(chain.from_iterable(self.args))
+        return self.database._parse_kwargs(sql, args, {}, cache=False)
+
+
+def _cache_options(cache_ttl):
+    return {} if cache_ttl is None else {'cache_ttl': cache_ttl}
+
+
+class SqlTemplate(object):
+
+    def __init__(self, database, sql, slots):
+        self.database = database
+        self.sql = sql
+        self.slots = slots
+
+    def arguments(self, args, kwargs):
+        if not kwargs:
+            return list(args)
+        args = iter(args)
+        return [next(args) if name is None else kwargs[name] for name in self.slots]
+
+    def query(self, *args, **kwargs):
+        return self.database._query(self.sql, self.arguments(args, kwargs), self.database.row_format)
+
+    def iter_query(self, *args, **kwargs):
+        args = self.arguments(args, kwargs)
+        return self.database._iter_rows(self.sql, args, self.database.batch_size, self.database.row_format)
+
+    def query_one(self, *args, **kwargs):
+        return self.database._query_one(self.sql, self.arguments(args, kwargs), self.database.row_format)
+
+    def query_value(self, *args, **kwargs):
+        return self.database._query_value(self.sql, self.arguments(args, kwargs))
+
+    def query_values(self, *args, **kwargs):
+        return self.database._query_values(self.sql, self.arguments(args, kwargs))
+
+    def execute(self, *args, **kwargs):
+        return self.database._execute(self.sql, self.arguments(args, kwargs))
@@ -0,0 +1,58 @@
+import threading
+
+from .exceptions import SqliteFileRequired
+from .pool import ConnectionPool
+from .routing import ReplicaSet
+
+
+class SqlitePool(ConnectionPool):
+
+    def __init__(self, driver, timeout=None):
+        if not driver.independent_connections:
+            raise SqliteFileRequired(driver.database)
+        writer = driver.copy()
+        writer.pragmas = dict(driver.pragmas)
+        writer.pragmas.setdefault('journal_mode', 'wal')
+        super(SqlitePool, self).__init__(writer, min_size=1, max_size=1, timeout=timeout)
+        self.readers = ThreadReaders(driver)
+
+
+class ThreadReaders(ReplicaSet):
+
+    def __init__(self, driver):
+        super(ThreadReaders, self).__init__([])
+        self.driver = driver.copy()
+        self.driver.pragmas = dict((name, value) for name, value in driver.pragmas.items() if name != 'journal_mode')
+        self.driver.pragmas['query_only'] = 1
+        self.local = threading.local()
+        self.connections = []
+
+    def acquire(self):
+        driver = getattr(self.local, 'driver', None)
+        if driver is None:
+            driver = self.driver.copy()
+            driver.connect()
+            self.local.driver = driver
+            with self.lock:
+                self.connections.append(driver)
+        return self, driver
+
+    def release(self, replica, driver, error=None):
+        if error is not None and driver.is_disconnect(error):
+            self.local.driver = None
+            with self.lock:
+                self.connections.remove(driver)
+                self.ejections += 1
+            driver.disconnect()
+        return False
+
+    def close(self):
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for driver in connections:
+            driver.disconnect()
+        self.local = threading.local()
+
+    def stats(self):
+        with self.lock:
+            return {'ejections': self.ejections, 'readers': len(self.connections)}
@@ -0,0 +1,161 @@
+import itertools
+import re
+import threading
+from collections import OrderedDict
+
+from .exceptions import MixedPositionalAndNamedArguments
+
+
+QMARK = 'qmark'
+FORMAT = 'format'
+NUMERIC = 'numeric'
+
+literals = (
+    r"(?<!\w)[eE]'(?:[^'\\]|\\.|'')*'"
+    r"|'(?:[^']|'')*'"
+    r'|"(?:[^"]|"")*"'
+    r'|--[^\n]*'
+    r'|/\*.*?\*/'
+    r'|\$(?P<tag>(?:[a-zA-Z_]\w*)?)\$.*?\$(?P=tag)\$'
+)
+literal_pattern = re.compile(literals, re.S)
+token_pattern = re.compile(literals + r'|::|\?|:[a-zA-Z_]\w*|%', re.S)
+format_pattern = re.compile('%[s%]')
+whitespace_pattern = re.compile(r'\s+')
+parameter_pattern = re.compile(r'%[s%]|\$\d+')
+number_pattern = re.compile(r'(?<![\w$])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?')
+
+
+class Statement(object):
+
+    __slots__ = ('sql', 'names', 'count')
+
+    def __init__(self, sql, names, count):
+        self.sql = sql
+        self.names = names
+        self.count = count
+
+    def arguments(self, kwargs):
+        return [kwargs[name] for name in self.names]
+
+
+def compile_statement(sql, paramstyle, named=False):
+    names = []
+    escape = paramstyle == FORMAT
+
+    def replace(match):
+        token = match.group(0)
+        if (token == '?' and not named) or (token[0] == ':' and token != '::' and named):
+            names.append(token[1:])
+            return placeholder(paramstyle, len(names))
+        if escape and (token == '%' or token[0] in '\'"eE$-/'):
+            return token.replace('%', '%%')
+        return token
+
+    target = token_pattern.sub(replace, sql)
+    if not names and paramstyle == FORMAT:
+        target = sql
+    return Statement(target, names if named else None, len(names))
+
+
+def normalize(sql):
+    parts = []
+    code = []
+    position = 0
+    for match in literal_pattern.finditer(sql):
+        token = match.group(0)
+        code.append(sql[position:match.start()])
+        if token[:2] in ('--', '/*'):
+            code.append(' ')
+        else:
+            parts.append(whitespace_pattern.sub(' ', ''.join(code)))
+            parts.append(token)
+            code = []
+        position = match.end()
+    code.append(sql[position:])
+    parts.append(whitespace_pattern.sub(' ', ''.join(code)))
+    return ''.join(parts).strip()
+
+
+def fingerprint(sql):
+    def replace(match):
+        token = match.group(0)
+        return token if token[0] == '"' else '?'
+    sql = literal_pattern.sub(replace, normalize(sql))
+    sql = parameter_pattern.sub(lambda match: '%' if match.group(0) == '%%' else '?', sql)
+    return number_pattern.sub('?', sql)
+
+
+def strip_literals(sql):
+    def replace(match):
+        token = match.group(0)
+        return token if token[0] == '"' else ' '
+    return literal_pattern.sub(replace, sql)
+
+
+def placeholder(paramstyle, position):
+    if paramstyle == FORMAT:
+        return '%s'
+    if paramstyle == NUMERIC:
+        return '$%d' % position
+    return '?'
+
+
+def format_to_numeric(sql):
+    positions = itertools.count(1)
+
+    def replace(match):
+        return '%' if match.group(0) == '%%' else '$%d' % next(positions)
+
+    sql = format_pattern.sub(replace, sql)
+    return sql, next(positions) - 1
+
+
+class StatementCache(object):
+
+    def __init__(self, max_size=500):
+        self.max_size = max_size
+        self.statements = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, sql, args, kwargs, paramstyle, cache=True):
+        if args and kwargs:
+            raise MixedPositionalAndNamedArguments()
+        get = self.get if cache else compile_statement
+        if kwargs:
+            statement = get(sql, paramstyle, named=True)
+            return statement.sql, statement.arguments(kwargs)
+        if paramstyle == QMARK:
+            return sql, args
+        return get(sql, paramstyle).sql, args
+
+    def get(self, sql, paramstyle, named=False):
+        key = (sql, paramstyle, named)
+        with self.lock:
+            statement = self.statements.pop(key, None)
+            if statement is not None:
+                self.statements[key] = statement
+                self.hits += 1
+                return statement
+            self.misses += 1
+        statement = compile_statement(sql, paramstyle, named)
+        with self.lock:
+            self.statements[key] = statement
+            while len(self.statements) > self.max_size:
+                self.statements.popitem(last=False)
+        return statement
+
+    def clear(self):
+        with self.lock:
+            self.statements.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': len(self.statements),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
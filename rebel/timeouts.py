@@ -0,0 +1,102 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+clock = getattr(time, 'monotonic', time.time)
+running = object()
+
+
+class Watchdog(object):
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.heap = []
+        self.ids = itertools.count()
+        self.cancelled = 0
+        self.thread = None
+
+    def schedule(self, seconds, callback):
+        entry = [clock() + seconds, next(self.ids), callback]
+        with self.condition:
+            heapq.heappush(self.heap, entry)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='rebel-watchdog')
+                self.thread.daemon = True
+                self.thread.start()
+            elif self.heap[0] is entry:
+                self.condition.notify_all()
+        return entry
+
+    def cancel(self, entry):
+        with self.condition:
+            while entry[2] is running:
+                self.condition.wait()
+            if entry[2] is None:
+                return
+            entry[2] = None
+            self.cancelled += 1
+            if self.cancelled > 64 and self.cancelled * 2 > len(self.heap):
+                self.heap = [entry for entry in self.heap if entry[2] is not None]
+                heapq.heapify(self.heap)
+                self.cancelled = 0
+
+    def _run(self):
+        with self.condition:
+            while True:
+                while self.heap and self.heap[0][2] is None:
+                    heapq.heappop(self.heap)
+                    self.cancelled -= 1
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                delay = self.heap[0][0] - clock()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+                entry = heapq.heappop(self.heap)
+                callback, entry[2] = entry[2], running
+                self.condition.release()
+                try:
+                    callback()
+                except Exception:
+                    pass
+                finally:
+                    self.condition.acquire()
+                    entry[2] = None
+                    self.condition.notify_all()
+
+
+watchdog = Watchdog()
+
+
+class TimedDatabase(object):
+
+    def __init__(self, database, timeout):
+        self.database = database
+        self.timeout = timeout
+
+    def query(self, sql, *args, **kwargs):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        return self.database._query(sql, args, self.database.row_format, timeout=self.timeout)
+
+    def iter_query(self, sql, *args, **kwargs):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        return self.database._iter_rows(sql, args, self.database.batch_size, self.database.row_format, self.timeout)
+
+    def query_one(self, sql, *args, **kwargs):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        return self.database._query_one(sql, args, self.database.row_format, timeout=self.timeout)
+
+    def query_value(self, sql, *args, **kwargs):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        return self.database._query_value(sql, args, timeout=self.timeout)
+
+    def query_values(self, sql, *args, **kwargs):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        return self.database._query_values(sql, args, timeout=self.timeout)
+
+    def execute(self, sql, *args, **kwargs):
+        sql, args = self.database._parse_kwargs(sql, args, kwargs)
+        return self.database._execute(sql, args, self.timeout)
@@ -1,14 +1,93 @@
+import functools
+import random
+import threading
+import time
+
+
 class Transaction(object):
 
-    def __init__(self, database, isolation_level):
+    def __init__(self, database, isolation_level, timeout=None):
         self.database = database
         self.isolation_level = isolation_level
+        self.timeout = timeout
 
     def __enter__(self):
-        self.database.start_transaction(self.isolation_level)
+        self.database.start_transaction(self.isolation_level, self.timeout)
 
     def __exit__(self, exception_type, exception, traceback):
         if exception:
             self.database.rollback()
         else:
             self.database.commit()
+
+
+class RetryingTransaction(object):
+
+    def __init__(self, database, isolation_level=None, retries=3, backoff=0.01, max_backoff=1.0):
+        self.database = database
+        self.isolation_level = isolation_level
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.retried = 0
+        self.failures = 0
+
+    def __call__(self, function):
+        @functools.wraps(function)
+        def run(*args, **kwargs):
+            return self.run(function, *args, **kwargs)
+        run.retrying = self
+        return run
+
+    def run(self, function, *args, **kwargs):
+        database = self.database
+        if database.transaction_depth > 0:
+            with database.transaction(self.isolation_level):
+                return function(*args, **kwargs)
+        attempt = 0
+        while True:
+            try:
+                with database.transaction(self.isolation_level):
+                    result = function(*args, **kwargs)
+            except Exception as error:
+                if attempt >= self.retries or not database.is_retryable(error):
+                    self._count(attempt, True)
+                    raise
+                attempt += 1
+                delay = self.delay(attempt)
+                if database.listeners:
+                    database._notify('before_retry', error, attempt, delay)
+                time.sleep(delay)
+            else:
+                self._count(attempt, False)
+                return result
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    def stats(self):
+        with self.lock:
+            return {'calls': self.calls, 'retries': self.retried, 'failures': self.failures}
+
+    def _count(self, retries, failed):
+        with self.lock:
+            self.calls += 1
+            self.retried += retries
+            self.failures += failed
+
+
+class TransactionState(object):
+
+    def __init__(self):
+        self.depth = 0
+        self.rollback_issued = False
+        self.driver = None
+        self.writes = []
+        self.primary_reads = 0
+        self.deadlines = []
+
+
+class LocalTransactionState(TransactionState, threading.local):
+    pass
@@ -26,5 +26,5 @@ setup(
         'Programming Language :: Python :: 3.5',
     ],
     keywords='rebel vanilla sql database',
-    packages=find_packages(exclude=['tests', 'tests.driver_tests']),
+    packages=find_packages(exclude=['tests', 'tests.driver_tests', 'benchmarks']),
 )
@@ -1,2 +1,17 @@
+import sys
+
 from .driver_tests.pgsql_tests import PgsqlTestCase
-from .driver_tests.sqlite_tests import SqliteTestCase
+from .driver_tests.sqlite_tests import SqliteTestCase, SqliteFileTestCase
+from .gather_tests import GatherTestCase
+from .pool_tests import PoolTestCase
+from .result_cache_tests import ResultCacheTestCase
+from .routing_tests import RoutingTestCase
+from .scan_tests import ScanTestCase
+from .sqlite_pool_tests import SqlitePoolTestCase
+from .statement_tests import StatementTestCase
+from .timeout_tests import TimeoutTestCase, WatchdogTestCase
+
+if sys.version_info >= (3, 7):
+    from .driver_tests.psycopg_tests import PsycopgTestCase
+    from .driver_tests.async_pgsql_tests import AsyncPgsqlTestCase
+    from .driver_tests.async_sqlite_tests import AsyncSqliteTestCase
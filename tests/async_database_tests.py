@@ -0,0 +1,123 @@
+import asyncio
+
+from rebel.async_database import AsyncDatabase
+from rebel.exceptions import MixedPositionalAndNamedArguments, NotInsideTransaction
+
+
+class AsyncDatabaseTestCase(object):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.db = AsyncDatabase(self.get_driver())
+        self.wait(self.create_tables())
+        self.wait(self.clear_tables())
+        self.wait(self.db.execute('INSERT INTO cities (name) VALUES (?), (?), (?)', 'New York', 'Washington', 'Los Angeles'))
+
+    def tearDown(self):
+        self.wait(self.db.close())
+        self.loop.close()
+
+    def wait(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_async_query(self):
+        cities = self.wait(self.db.query('SELECT * FROM cities WHERE id > ? ORDER BY id', 1))
+        self.assertEqual(cities, [{'id': 2, 'name': 'Washington'}, {'id': 3, 'name': 'Los Angeles'}])
+
+    def test_async_query_empty_table_returns_empty_list(self):
+        self.assertEqual(self.wait(self.db.query('SELECT * FROM users')), [])
+
+    def test_async_query_one(self):
+        city = self.wait(self.db.query_one('SELECT * FROM cities WHERE id = :id', id=1))
+        self.assertEqual(city, {'id': 1, 'name': 'New York'})
+
+    def test_async_query_value(self):
+        self.assertEqual(self.wait(self.db.query_value('SELECT name FROM cities WHERE id = ?', 3)), 'Los Angeles')
+
+    def test_async_query_values(self):
+        names = self.wait(self.db.query_values('SELECT name FROM cities ORDER BY id'))
+        self.assertEqual(names, ['New York', 'Washington', 'Los Angeles'])
+
+    def test_async_query_with_record_row_format(self):
+        self.db.row_format = self.db.RECORD
+        city = self.wait(self.db.query_one('SELECT id, name FROM cities WHERE id = ?', 2))
+        self.assertEqual(city.name, 'Washington')
+
+    def test_async_cannot_mix_positional_and_named_arguments(self):
+        with self.assertRaises(MixedPositionalAndNamedArguments):
+            self.wait(self.db.query('SELECT * FROM cities WHERE id = ? AND name = :name', 1, name='New York'))
+
+    def test_async_sql_builder(self):
+        sql = self.db.sql('SELECT name FROM cities').add('WHERE id = :id', id=2)
+        self.assertEqual(self.wait(sql.query_value()), 'Washington')
+        self.wait(self.db.sql('INSERT INTO users (email)').add('VALUES (?)', 'foo@bar.com').execute())
+        self.assertEqual(self.wait(self.db.query_values('SELECT email FROM users')), ['foo@bar.com'])
+
+    def test_async_sql_builder_has_no_result_cache(self):
+        with self.assertRaises(TypeError):
+            self.db.sql('SELECT name FROM cities').query(cache_ttl=30)
+
+    def test_async_transaction_commits(self):
+        async def insert():
+            async with self.db.transaction():
+                await self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        self.wait(insert())
+        self.assertEqual(self.wait(self.db.query_value('SELECT COUNT(*) FROM users')), 1)
+
+    def test_async_transaction_rolls_back_on_exception(self):
+        async def insert():
+            async with self.db.transaction(self.db.SERIALIZABLE):
+                await self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+                raise ValueError()
+        with self.assertRaises(ValueError):
+            self.wait(insert())
+        self.assertEqual(self.wait(self.db.query_value('SELECT COUNT(*) FROM users')), 0)
+
+    def test_async_nested_transaction_rolls_back_to_savepoint(self):
+        async def insert():
+            async with self.db.transaction():
+                await self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+                with self.assertRaises(ValueError):
+                    async with self.db.transaction():
+                        await self.db.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+                        raise ValueError()
+                async with self.db.transaction():
+                    await self.db.execute('INSERT INTO users (email) VALUES (?)', 'baz@foo.com')
+        self.wait(insert())
+        self.assertEqual(self.db.transaction_depth, 0)
+        emails = self.wait(self.db.query_values('SELECT email FROM users ORDER BY id'))
+        self.assertEqual(emails, ['foo@bar.com', 'baz@foo.com'])
+
+    def test_async_nested_transaction_rollback_rolls_back_everything(self):
+        self.db.savepoints = False
+        async def insert():
+            async with self.db.transaction():
+                await self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+                await self.db.start_transaction()
+                await self.db.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+                self.assertEqual(self.db.transaction_depth, 2)
+                await self.db.rollback()
+        self.wait(insert())
+        self.assertEqual(self.db.transaction_depth, 0)
+        self.assertEqual(self.wait(self.db.query_value('SELECT COUNT(*) FROM users')), 0)
+
+    def test_async_commit_outside_transaction_raises_exception(self):
+        with self.assertRaises(NotInsideTransaction):
+            self.wait(self.db.commit())
+
+    def test_async_concurrent_queries(self):
+        async def count():
+            return await self.db.query_value('SELECT COUNT(*) FROM cities')
+        async def gather():
+            return await asyncio.gather(*[count() for _ in range(10)])
+        self.assertEqual(self.wait(gather()), [3] * 10)
+
+    def test_async_concurrent_transactions_are_isolated_per_task(self):
+        async def insert(i):
+            async with self.db.transaction():
+                await self.db.execute('INSERT INTO users (email) VALUES (?)', 'user%d@bar.com' % i)
+                await asyncio.sleep(0)
+        async def gather():
+            await asyncio.gather(*[insert(i) for i in range(5)])
+        self.wait(gather())
+        self.assertEqual(self.wait(self.db.query_value('SELECT COUNT(*) FROM users')), 5)
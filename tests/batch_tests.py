@@ -0,0 +1,72 @@
+from rebel.exceptions import BatchDiscarded
+
+
+class BatchTestCase(object):
+
+    def test_batch_returns_results_per_statement(self):
+        with self.db.batch() as batch:
+            cities = batch.query('SELECT * FROM cities WHERE id > ?', 2)
+            city = batch.query_one('SELECT * FROM cities WHERE id = :id', id=1)
+            name = batch.query_value('SELECT name FROM cities WHERE id = ?', 2)
+            names = batch.query_values('SELECT name FROM cities ORDER BY id')
+            insert = batch.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        self.assertEqual(cities.result(), [{'id': 3, 'name': 'Los Angeles'}])
+        self.assertEqual(city.result(), {'id': 1, 'name': 'New York'})
+        self.assertEqual(name.result(), 'Washington')
+        self.assertEqual(names.result(), ['New York', 'Washington', 'Los Angeles'])
+        self.assertIsNone(insert.result())
+        self.assertEqual(self.db.query_values('SELECT email FROM users'), ['foo@bar.com'])
+
+    def test_batch_runs_statements_in_order(self):
+        with self.db.batch() as batch:
+            batch.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            batch.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+            count = batch.query_value('SELECT COUNT(*) FROM users')
+            batch.execute('DELETE FROM users WHERE email = ?', 'foo@bar.com')
+            emails = batch.query_values('SELECT email FROM users')
+        self.assertEqual(count.result(), 2)
+        self.assertEqual(emails.result(), ['bar@foo.com'])
+
+    def test_batch_errors_are_reported_per_statement(self):
+        batch = self.db.batch(raise_errors=False)
+        with batch:
+            batch.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            failed = batch.execute('INSERT INTO missing_table (email) VALUES (?)', 'foo@bar.com')
+            batch.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+            count = batch.query_value('SELECT COUNT(*) FROM users')
+        with self.assertRaises(Exception):
+            failed.result()
+        self.assertEqual(count.result(), 2)
+
+    def test_batch_raises_first_error_on_exit(self):
+        with self.assertRaises(Exception):
+            with self.db.batch() as batch:
+                batch.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+                batch.query('SELECT * FROM missing_table')
+        self.assertEqual(self.db.query_values('SELECT email FROM users'), ['foo@bar.com'])
+
+    def test_batch_result_flushes_pending_statements(self):
+        with self.db.batch() as batch:
+            batch.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            count = batch.query_value('SELECT COUNT(*) FROM users')
+            self.assertEqual(count.result(), 1)
+            later = batch.query_value('SELECT COUNT(*) FROM cities')
+        self.assertEqual(later.result(), 3)
+
+    def test_batch_is_discarded_on_exception(self):
+        with self.assertRaises(ValueError):
+            with self.db.batch() as batch:
+                insert = batch.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+                raise ValueError()
+        with self.assertRaises(BatchDiscarded):
+            insert.result()
+        self.assertEqual(self.db.query('SELECT * FROM users'), [])
+
+    def test_batch_inside_transaction(self):
+        self.db.start_transaction()
+        with self.db.batch() as batch:
+            batch.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            count = batch.query_value('SELECT COUNT(*) FROM users')
+        self.db.rollback()
+        self.assertEqual(count.result(), 1)
+        self.assertEqual(self.db.query('SELECT * FROM users'), [])
@@ -0,0 +1,117 @@
+from rebel.exceptions import NoColumns
+
+
+class BulkTestCase(object):
+
+    def test_execute_many_with_positional_arguments(self):
+        count = self.db.execute_many('INSERT INTO users (id, email) VALUES (?, ?)', [
+            (1, 'foo@bar.com'),
+            (2, 'bar@foo.com'),
+        ])
+        self.assertEqual(count, 2)
+        self.assertEqual(self.db.query('SELECT * FROM users ORDER BY id'), [
+            {'id': 1, 'email': 'foo@bar.com'},
+            {'id': 2, 'email': 'bar@foo.com'},
+        ])
+
+    def test_execute_many_with_named_arguments(self):
+        self.db.execute_many('INSERT INTO users (id, email) VALUES (:id, :email)', [
+            {'id': 1, 'email': 'foo@bar.com'},
+            {'id': 2, 'email': 'bar@foo.com'},
+        ])
+        self.assertEqual(self.db.query_values('SELECT email FROM users ORDER BY id'), [
+            'foo@bar.com', 'bar@foo.com'
+        ])
+
+    def test_execute_many_accepts_generator(self):
+        rows = ((i, 'user%d@bar.com' % i) for i in range(1, 101))
+        count = self.db.execute_many('INSERT INTO users (id, email) VALUES (?, ?)', rows)
+        self.assertEqual(count, 100)
+        self.assertEqual(self.db.query_value('SELECT COUNT(*) FROM users'), 100)
+
+    def test_execute_many_with_no_rows(self):
+        self.assertEqual(self.db.execute_many('INSERT INTO users (email) VALUES (?)', []), 0)
+
+    def test_execute_many_runs_inside_one_transaction(self):
+        rows = [(1, 'foo@bar.com'), (1, 'duplicate@bar.com')]
+        with self.assertRaises(Exception):
+            self.db.execute_many('INSERT INTO users (id, email) VALUES (?, ?)', rows)
+        self.assertEqual(self.db.query('SELECT * FROM users'), [])
+
+    def test_insert_rows_with_sequences(self):
+        count = self.db.insert_rows('users', ['id', 'email'], [(1, 'foo@bar.com'), (2, 'bar@foo.com')])
+        self.assertEqual(count, 2)
+        self.assertEqual(self.db.query('SELECT * FROM users ORDER BY id'), [
+            {'id': 1, 'email': 'foo@bar.com'},
+            {'id': 2, 'email': 'bar@foo.com'},
+        ])
+
+    def test_insert_rows_with_dicts(self):
+        self.db.insert_rows('users', ['email'], [{'email': 'foo@bar.com'}, {'email': 'bar@foo.com'}])
+        self.assertEqual(self.db.query_values('SELECT email FROM users ORDER BY id'), [
+            'foo@bar.com', 'bar@foo.com'
+        ])
+
+    def test_insert_rows_without_columns_raises_exception(self):
+        with self.assertRaises(NoColumns):
+            self.db.insert_rows('users', [], [(), ()])
+        with self.assertRaises(NoColumns):
+            self.db.copy_in('users', [], [(), ()])
+        self.assertEqual(self.db.transaction_depth, 0)
+
+    def test_insert_rows_splits_chunks_by_parameter_limit(self):
+        self.db.batch_size = 10000
+        row_count = self.db.driver.max_parameters + 5
+        rows = ((i, 'user%d@bar.com' % i) for i in range(1, row_count + 1))
+        self.assertEqual(self.db.insert_rows('users', ['id', 'email'], rows), row_count)
+        self.assertEqual(self.db.query_value('SELECT COUNT(*) FROM users'), row_count)
+        self.assertEqual(self.db.query_value('SELECT MAX(id) FROM users'), row_count)
+
+    def test_insert_rows_splits_chunks_by_batch_size(self):
+        self.db.batch_size = 3
+        rows = [(i, 'user%d@bar.com' % i) for i in range(1, 11)]
+        self.assertEqual(self.db.insert_rows('users', ['id', 'email'], rows), 10)
+        self.assertEqual(self.db.query_value('SELECT COUNT(*) FROM users'), 10)
+
+    def test_insert_rows_rolls_back_every_chunk_on_failure(self):
+        self.db.batch_size = 2
+        rows = [(1, 'a@bar.com'), (2, 'b@bar.com'), (3, 'c@bar.com'), (1, 'duplicate@bar.com')]
+        with self.assertRaises(Exception):
+            self.db.insert_rows('users', ['id', 'email'], rows)
+        self.assertEqual(self.db.query('SELECT * FROM users'), [])
+
+    def test_copy_in_with_sequences(self):
+        count = self.db.copy_in('users', ['id', 'email'], [(1, 'foo@bar.com'), (2, 'bar@foo.com')])
+        self.assertEqual(count, 2)
+        self.assertEqual(self.db.query('SELECT * FROM users ORDER BY id'), [
+            {'id': 1, 'email': 'foo@bar.com'},
+            {'id': 2, 'email': 'bar@foo.com'},
+        ])
+
+    def test_copy_in_with_dicts_and_special_values(self):
+        rows = [
+            {'id': 1, 'email': 'tab\tnew\nline\\slash'},
+            {'id': 2, 'email': None},
+            {'id': 3, 'email': ''},
+        ]
+        self.db.copy_in('users', ['id', 'email'], iter(rows))
+        self.assertEqual(self.db.query('SELECT * FROM users ORDER BY id'), rows)
+
+    def test_copy_in_with_csv_format(self):
+        rows = [(1, 'comma, "quote"'), (2, None), (3, '')]
+        self.db.copy_in('users', ['id', 'email'], rows, format='csv')
+        self.assertEqual(self.db.query_values('SELECT email FROM users ORDER BY id'), [
+            'comma, "quote"', None, ''
+        ])
+
+    def test_copy_in_takes_part_in_outer_transaction(self):
+        self.db.start_transaction()
+        self.db.copy_in('users', ['id', 'email'], [(1, 'foo@bar.com')])
+        self.assertEqual(self.db.query_value('SELECT COUNT(*) FROM users'), 1)
+        self.db.rollback()
+        self.assertEqual(self.db.query_value('SELECT COUNT(*) FROM users'), 0)
+
+    def test_copy_in_streams_generator(self):
+        rows = ((i, 'user%d@bar.com' % i) for i in range(1, 5001))
+        self.assertEqual(self.db.copy_in('users', ['id', 'email'], rows), 5000)
+        self.assertEqual(self.db.query_value('SELECT COUNT(*) FROM users'), 5000)
@@ -0,0 +1,68 @@
+class CacheTestCase(object):
+
+    def test_cached_query_is_served_from_cache(self):
+        cached = self.db.cached(ttl=30)
+        cities = cached.query('SELECT * FROM cities WHERE id > ?', 1)
+        self.assertEqual(cached.query('SELECT  *  FROM cities WHERE id > ?', 1), cities)
+        self.assertEqual(self.db.cache.stats()['hits'], 1)
+        cities[0]['name'] = 'Boston'
+        self.assertEqual(cached.query('SELECT * FROM cities WHERE id > ?', 1)[0]['name'], 'Washington')
+
+    def test_cached_query_is_keyed_by_arguments(self):
+        cached = self.db.cached(ttl=30)
+        self.assertEqual(cached.query_value('SELECT name FROM cities WHERE id = :id', id=1), 'New York')
+        self.assertEqual(cached.query_value('SELECT name FROM cities WHERE id = :id', id=2), 'Washington')
+
+    def test_cached_query_expires_after_ttl(self):
+        cached = self.db.cached(ttl=0)
+        cached.query('SELECT * FROM cities')
+        cached.query('SELECT * FROM cities')
+        self.assertEqual(self.db.cache.stats()['hits'], 0)
+
+    def test_execute_invalidates_cached_queries_on_written_table(self):
+        sql = self.db.sql('SELECT COUNT(*) FROM cities')
+        self.assertEqual(sql.query_value(cache_ttl=30), 3)
+        self.db.execute('INSERT INTO cities (name) VALUES (?)', 'Boston')
+        self.assertEqual(sql.query_value(cache_ttl=30), 4)
+
+    def test_execute_keeps_cached_queries_on_other_tables(self):
+        cached = self.db.cached(ttl=30)
+        cached.query('SELECT * FROM cities')
+        self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        cached.query('SELECT * FROM cities')
+        self.assertEqual(self.db.cache.stats()['hits'], 1)
+
+    def test_reads_inside_transaction_bypass_cache(self):
+        cached = self.db.cached(ttl=30)
+        cached.query('SELECT * FROM users')
+        with self.db.transaction():
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            self.assertEqual(len(cached.query('SELECT * FROM users')), 1)
+        self.assertEqual(self.db.cache.stats()['hits'], 0)
+
+    def test_committed_transaction_invalidates_written_tables(self):
+        cached = self.db.cached(ttl=30)
+        self.assertEqual(cached.query_values('SELECT email FROM users'), [])
+        with self.db.transaction():
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        self.assertEqual(cached.query_values('SELECT email FROM users'), ['foo@bar.com'])
+
+    def test_bulk_inserts_invalidate_written_tables(self):
+        cached = self.db.cached(ttl=30)
+        self.assertEqual(cached.query_value('SELECT COUNT(*) FROM users'), 0)
+        self.db.execute_many('INSERT INTO users (email) VALUES (?)', [('a@bar.com',)])
+        self.assertEqual(cached.query_value('SELECT COUNT(*) FROM users'), 1)
+        self.db.copy_in('users', ['email'], [('b@bar.com',)])
+        self.assertEqual(cached.query_value('SELECT COUNT(*) FROM users'), 2)
+
+    def test_cached_query_one_with_builder(self):
+        city = self.db.sql('SELECT * FROM cities WHERE id = ?', 2).query_one(cache_ttl=30)
+        self.assertEqual(city, {'id': 2, 'name': 'Washington'})
+
+    def test_cached_results_are_kept_apart_by_shape(self):
+        cached = self.db.cached(ttl=30)
+        sql = 'SELECT name FROM cities ORDER BY id'
+        self.assertEqual(cached.query_value(sql), 'New York')
+        self.assertEqual(cached.query_one(sql), {'name': 'New York'})
+        self.assertEqual(cached.query_values(sql), ['New York', 'Washington', 'Los Angeles'])
+        self.assertEqual(len(cached.query(sql)), 3)
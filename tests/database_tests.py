@@ -1,10 +1,15 @@
+from .batch_tests import BatchTestCase
+from .bulk_tests import BulkTestCase
+from .cache_tests import CacheTestCase
+from .instrumentation_tests import InstrumentationTestCase
 from .query_tests import QueryTestCase
+from .row_format_tests import RowFormatTestCase
 from .sql_builder_tests import SqlBuilderTestCase
 from .transaction_tests import TransactionTestCase
 from rebel.database import Database
 
 
-class DatabaseTestCase(QueryTestCase, SqlBuilderTestCase, TransactionTestCase):
+class DatabaseTestCase(QueryTestCase, BatchTestCase, BulkTestCase, CacheTestCase, InstrumentationTestCase, RowFormatTestCase, SqlBuilderTestCase, TransactionTestCase):
 
     def setUp(self):
         driver = self.get_driver()
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+from ..async_database_tests import AsyncDatabaseTestCase
+from rebel.drivers.async_pgsql import AsyncPgsqlDriver
+from rebel.exceptions import QueryTimeout
+
+
+class AsyncPgsqlTestCase(AsyncDatabaseTestCase, TestCase):
+
+    def get_driver(self):
+        return AsyncPgsqlDriver(database='rebel', user='postgres', max_size=3)
+
+    async def create_tables(self):
+        await self.db.execute("""
+            CREATE TABLE IF NOT EXISTS cities (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(254)
+            )
+        """)
+        await self.db.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                email VARCHAR(254)
+            )
+        """)
+
+    async def clear_tables(self):
+        await self.db.execute('TRUNCATE TABLE cities RESTART IDENTITY')
+        await self.db.execute('TRUNCATE TABLE users RESTART IDENTITY')
+
+    def test_query_with_timeout_is_cancelled(self):
+        with self.assertRaises(QueryTimeout):
+            self.wait(self.db.with_timeout(0.1).query_value('SELECT pg_sleep(5)'))
+        self.assertEqual(self.wait(self.db.query_value('SELECT 1')), 1)
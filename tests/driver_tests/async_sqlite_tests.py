@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+from ..async_database_tests import AsyncDatabaseTestCase
+from ..helpers import TempDirectoryTestCase
+from ..timeout_tests import SLOW_QUERY
+from rebel.drivers.async_sqlite import AsyncSqliteDriver
+from rebel.exceptions import QueryTimeout
+
+
+class AsyncSqliteTestCase(TempDirectoryTestCase, AsyncDatabaseTestCase, TestCase):
+
+    def get_driver(self):
+        return AsyncSqliteDriver(self.temp_path('async.sqlite'), pool_size=3)
+
+    async def create_tables(self):
+        await self.db.execute("""
+            CREATE TABLE IF NOT EXISTS cities (
+                id INTEGER PRIMARY KEY,
+                name VARCHAR(254)
+            )
+        """)
+        await self.db.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY,
+                email VARCHAR(254)
+            )
+        """)
+
+    async def clear_tables(self):
+        await self.db.execute('DELETE FROM cities')
+        await self.db.execute('DELETE FROM users')
+
+    def test_query_with_timeout_is_interrupted(self):
+        with self.assertRaises(QueryTimeout):
+            self.wait(self.db.with_timeout(0.05).query_value(SLOW_QUERY))
+        with self.assertRaises(QueryTimeout):
+            self.wait(self.db.sql(SLOW_QUERY).query(timeout=0.05))
+        with self.assertRaises(QueryTimeout):
+            self.wait(self.db.with_timeout(0.05).execute('INSERT INTO users (email) ' + SLOW_QUERY))
+        values = self.wait(self.db.with_timeout(5).query_values('SELECT id FROM cities ORDER BY id'))
+        self.assertEqual(len(values), 3)
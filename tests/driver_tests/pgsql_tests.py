@@ -1,6 +1,9 @@
 from unittest import TestCase
 from ..database_tests import DatabaseTestCase
-from rebel.drivers.pgsql import PgsqlDriver
+from rebel.database import Database
+from rebel.exceptions import QueryTimeout
+from rebel.instrumentation import ExplainProfiler
+from rebel.drivers.pgsql import PgsqlDriver, CopyStream, streams_single_rows
 
 
 class PgsqlTestCase(DatabaseTestCase, TestCase):
@@ -26,6 +29,166 @@ class PgsqlTestCase(DatabaseTestCase, TestCase):
         self.db.execute('TRUNCATE TABLE cities RESTART IDENTITY')
         self.db.execute('TRUNCATE TABLE users RESTART IDENTITY')
 
+    def test_run_in_transaction_retries_serialization_failures(self):
+        attempts = []
+
+        def add_user():
+            attempts.append(1)
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            if len(attempts) < 3:
+                self.db.execute("DO $$ BEGIN RAISE EXCEPTION 'conflict' USING ERRCODE = '40001'; END $$")
+
+        self.db.run_in_transaction(add_user, self.db.SERIALIZABLE, backoff=0)
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(self.db.query_values('SELECT email FROM users'), ['foo@bar.com'])
+
+    def test_deadlocks_are_retryable(self):
+        with self.assertRaises(Exception) as context:
+            self.db.execute("DO $$ BEGIN RAISE EXCEPTION 'deadlock' USING ERRCODE = '40P01'; END $$")
+        self.assertTrue(self.db.is_retryable(context.exception))
+
+    def test_query_timeout_cancels_the_query(self):
+        with self.assertRaises(QueryTimeout):
+            self.db.with_timeout(0.1).query_value('SELECT pg_sleep(5)')
+        self.assertEqual(self.db.query_value('SELECT 1'), 1)
+
+    def test_query_timeout_inside_nested_transaction(self):
+        with self.db.transaction():
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            with self.assertRaises(QueryTimeout):
+                with self.db.transaction():
+                    self.db.with_timeout(0.1).execute('SELECT pg_sleep(5)')
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+        self.assertEqual(self.db.query_values('SELECT email FROM users ORDER BY id'), ['foo@bar.com', 'bar@foo.com'])
+
+    def test_explain_profiler_records_json_plans(self):
+        profiler = self.db.add_listener(ExplainProfiler(threshold=0, analyze=True))
+        self.db.query('SELECT * FROM cities WHERE id > ?', 1)
+        self.db.execute('UPDATE cities SET name = ? WHERE id = ?', 'Boston', 1)
+        select, update = profiler.report()
+        self.assertIn('Actual Rows', select['plan'][0]['Plan'])
+        self.assertEqual(update['plan'][0]['Plan']['Node Type'], 'ModifyTable')
+        self.assertNotIn('Actual Rows', update['plan'][0]['Plan'])
+        self.assertEqual(self.db.query_value('SELECT name FROM cities WHERE id = 1'), 'Boston')
+
+    def test_writes_inside_an_iter_query_loop(self):
+        self.db.execute('INSERT INTO users (email) SELECT ? FROM generate_series(1, 50)', 'foo@bar.com')
+        for user in self.db.iter_query('SELECT id FROM users ORDER BY id'):
+            with self.db.transaction():
+                self.db.execute('UPDATE users SET email = ? WHERE id = ?', 'user%d@bar.com' % user['id'], user['id'])
+            self.db.execute('INSERT INTO cities (name) VALUES (?)', 'City %d' % user['id'])
+            if user['id'] == 25:
+                break
+        self.assertTrue(self.db.pool.driver.connection.autocommit)
+        self.assertEqual(self.db.query_value("SELECT COUNT(*) FROM users WHERE email LIKE 'user%'"), 25)
+        self.assertEqual(self.db.query_value('SELECT COUNT(*) FROM cities'), 28)
+
+    def test_single_row_cursors_are_opt_in(self):
+        self.assertTrue(streams_single_rows('SELECT * FROM users'))
+        self.assertTrue(streams_single_rows("WITH u AS (SELECT * FROM users) SELECT * FROM u WHERE email = 'limit'"))
+        self.assertFalse(streams_single_rows('SELECT * FROM users LIMIT 1'))
+        self.assertFalse(streams_single_rows('INSERT INTO users (email) VALUES (?) RETURNING id'))
+        self.assertFalse(streams_single_rows('WITH d AS (DELETE FROM users RETURNING id) SELECT * FROM d'))
+        self.assertFalse(self.db.pool.driver.streams_single_rows('SELECT * FROM users'))
+        db = Database(PgsqlDriver(database='rebel', user='postgres', single_row_cursors=True))
+        self.addCleanup(db.close)
+        self.assertEqual(db.query_value('SELECT x FROM generate_series(1, 10000000) AS x'), 1)
+        self.assertEqual(db.query_one('SELECT * FROM cities ORDER BY id'), {'id': 1, 'name': 'New York'})
+        with db.transaction():
+            self.assertEqual(db.query_value('SELECT x FROM generate_series(1, 10000000) AS x'), 1)
+
     def test_select_last_insert_id(self):
         id = self.db.query_value('INSERT INTO users (email) VALUES (?) RETURNING id', 'foo@bar.com')
         self.assertEqual(id, 1)
+
+    def test_copy_stream_encodes_rows_lazily(self):
+        rows = iter([(1, 'foo'), (2, 'bar')])
+        stream = CopyStream(['id', 'email'], rows, rows_per_read=1)
+        self.assertEqual(stream.read(4), '1\tfo')
+        self.assertEqual(next(rows), (2, 'bar'))
+        self.assertEqual(stream.read(), 'o\n')
+
+    def test_copy_stream_encodes_special_values_in_text_format(self):
+        stream = CopyStream(['a', 'b', 'c', 'd'], [(None, True, b'\x01\xff', 'a\tb\\c')])
+        self.assertEqual(stream.read(), '\\N\tt\t\\\\x01ff\ta\\tb\\\\c\n')
+
+    def test_copy_stream_encodes_csv_format(self):
+        stream = CopyStream(['a', 'b', 'c'], [(1, 'x, "y"', None)], format='csv')
+        self.assertEqual(stream.read(), '"1","x, ""y""",\n')
+
+    def test_copy_in_bytea_values(self):
+        self.db.execute('CREATE TEMPORARY TABLE files (data BYTEA)')
+        self.db.copy_in('files', ['data'], [(b'\x00\x01\xff',)])
+        self.assertEqual(bytes(self.db.query_value('SELECT data FROM files')), b'\x00\x01\xff')
+
+    def test_casts_with_named_arguments(self):
+        value = self.db.query_value('SELECT :value::int + 1', value='41')
+        self.assertEqual(value, 42)
+
+    def test_percent_signs_without_arguments(self):
+        self.assertEqual(self.db.query_value("SELECT '100%'"), '100%')
+
+    def prepared_database(self, **kwargs):
+        db = Database(PgsqlDriver(database='rebel', user='postgres', **kwargs))
+        self.addCleanup(db.close)
+        return db
+
+    def server_prepared_names(self, db):
+        return db.query_values("SELECT name FROM pg_prepared_statements WHERE name LIKE 'rebel_%'")
+
+    def test_statements_are_prepared_after_threshold(self):
+        db = self.prepared_database(prepare_threshold=2)
+        for i in range(3):
+            self.assertEqual(db.query_value('SELECT name FROM cities WHERE id = ?', 1), 'New York')
+        self.assertEqual(len(db.driver.prepared), 1)
+        self.assertEqual(len(self.server_prepared_names(db)), 1)
+
+    def test_prepared_statements_keep_percent_signs(self):
+        db = self.prepared_database(prepare_threshold=1)
+        for i in range(2):
+            names = db.query_values("SELECT name FROM cities WHERE name LIKE '%o%' AND id > ? ORDER BY id", 1)
+            self.assertEqual(names, ['Washington', 'Los Angeles'])
+
+    def test_prepared_statements_are_deallocated_in_lru_order(self):
+        db = self.prepared_database(prepare_threshold=1, max_prepared=1)
+        db.query_value('SELECT name FROM cities WHERE id = ?', 1)
+        db.query_value('SELECT id FROM cities WHERE name = ?', 'New York')
+        self.assertEqual(len(self.server_prepared_names(db)), 1)
+
+    def test_statements_that_cannot_be_prepared_run_as_plain_text(self):
+        db = self.prepared_database(prepare_threshold=1)
+        db.execute("SET application_name TO 'rebel'")
+        db.execute("SET application_name TO 'rebel'")
+        self.assertEqual(db.query_value('SHOW application_name'), 'rebel')
+        self.assertEqual(len(db.driver.prepared), 0)
+
+    def test_prepared_statements_are_invalidated_by_schema_changes(self):
+        db = self.prepared_database(prepare_threshold=1)
+        db.execute('CREATE TEMPORARY TABLE things (id INTEGER)')
+        db.execute('INSERT INTO things VALUES (1)')
+        self.assertEqual(db.query('SELECT * FROM things'), [{'id': 1}])
+        db.execute('ALTER TABLE things ADD COLUMN name TEXT')
+        self.assertEqual(db.query('SELECT * FROM things'), [{'id': 1, 'name': None}])
+
+    def test_prepared_statements_are_reset_on_reconnect(self):
+        db = self.prepared_database(prepare_threshold=1)
+        db.query_value('SELECT name FROM cities WHERE id = ?', 1)
+        db.close()
+        self.assertEqual(db.query_value('SELECT name FROM cities WHERE id = ?', 1), 'New York')
+
+    def test_batch_merges_statements_into_one_round_trip(self):
+        statements = [
+            ('INSERT INTO users (email) VALUES (%s)', ['foo@bar.com'], False),
+            ("INSERT INTO users (email) VALUES ('100%')", [], False),
+            ('SELECT email FROM users ORDER BY id', [], True),
+        ]
+        outcomes = self.db.driver._run_group(statements)
+        self.assertEqual(outcomes[:2], [(None, None, None), (None, None, None)])
+        self.assertEqual(outcomes[2], (['email'], [('foo@bar.com',), ('100%',)], None))
+
+    def test_batch_runs_statements_that_cannot_be_merged_one_by_one(self):
+        with self.db.batch() as batch:
+            batch.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            batch.execute('VACUUM users')
+            count = batch.query_value('SELECT COUNT(*) FROM users')
+        self.assertEqual(count.result(), 1)
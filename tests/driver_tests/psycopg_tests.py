@@ -0,0 +1,141 @@
+from decimal import Decimal
+from unittest import TestCase
+from ..database_tests import DatabaseTestCase
+from rebel.database import Database
+from rebel.exceptions import QueryTimeout
+from rebel.instrumentation import ExplainProfiler
+from rebel.drivers.psycopg import PsycopgDriver
+
+
+class PsycopgTestCase(DatabaseTestCase, TestCase):
+
+    def get_driver(self):
+        return PsycopgDriver(database='rebel', user='postgres')
+
+    def create_tables(self):
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS cities (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(254)
+            )
+        """)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                email VARCHAR(254)
+            )
+        """)
+
+    def clear_tables(self):
+        self.db.execute('TRUNCATE TABLE cities RESTART IDENTITY')
+        self.db.execute('TRUNCATE TABLE users RESTART IDENTITY')
+
+    def test_run_in_transaction_retries_serialization_failures(self):
+        attempts = []
+
+        def add_user():
+            attempts.append(1)
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            if len(attempts) < 3:
+                self.db.execute("DO $$ BEGIN RAISE EXCEPTION 'conflict' USING ERRCODE = '40001'; END $$")
+
+        self.db.run_in_transaction(add_user, self.db.SERIALIZABLE, backoff=0)
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(self.db.query_values('SELECT email FROM users'), ['foo@bar.com'])
+
+    def test_deadlocks_are_retryable(self):
+        with self.assertRaises(Exception) as context:
+            self.db.execute("DO $$ BEGIN RAISE EXCEPTION 'deadlock' USING ERRCODE = '40P01'; END $$")
+        self.assertTrue(self.db.is_retryable(context.exception))
+
+    def test_query_timeout_cancels_the_query(self):
+        with self.assertRaises(QueryTimeout):
+            self.db.with_timeout(0.1).query_value('SELECT pg_sleep(5)')
+        self.assertEqual(self.db.query_value('SELECT 1'), 1)
+
+    def test_query_timeout_inside_nested_transaction(self):
+        with self.db.transaction():
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            with self.assertRaises(QueryTimeout):
+                with self.db.transaction():
+                    self.db.with_timeout(0.1).execute('SELECT pg_sleep(5)')
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+        self.assertEqual(self.db.query_values('SELECT email FROM users ORDER BY id'), ['foo@bar.com', 'bar@foo.com'])
+
+    def test_explain_profiler_records_json_plans(self):
+        profiler = self.db.add_listener(ExplainProfiler(threshold=0, analyze=True))
+        self.db.query('SELECT * FROM cities WHERE id > ?', 1)
+        self.db.execute('UPDATE cities SET name = ? WHERE id = ?', 'Boston', 1)
+        select, update = profiler.report()
+        self.assertIn('Actual Rows', select['plan'][0]['Plan'])
+        self.assertEqual(update['plan'][0]['Plan']['Node Type'], 'ModifyTable')
+        self.assertNotIn('Actual Rows', update['plan'][0]['Plan'])
+        self.assertEqual(self.db.query_value('SELECT name FROM cities WHERE id = 1'), 'Boston')
+
+    def binary_database(self):
+        db = Database(PsycopgDriver(database='rebel', user='postgres', binary=True))
+        self.addCleanup(db.close)
+        return db
+
+    def test_writes_inside_an_iter_query_loop(self):
+        self.db.execute('INSERT INTO users (email) SELECT ? FROM generate_series(1, 50)', 'foo@bar.com')
+        for user in self.db.iter_query('SELECT id FROM users ORDER BY id'):
+            with self.db.transaction():
+                self.db.execute('UPDATE users SET email = ? WHERE id = ?', 'user%d@bar.com' % user['id'], user['id'])
+            self.db.execute('INSERT INTO cities (name) VALUES (?)', 'City %d' % user['id'])
+            if user['id'] == 25:
+                break
+        self.assertTrue(self.db.pool.driver.connection.autocommit)
+        self.assertEqual(self.db.query_value("SELECT COUNT(*) FROM users WHERE email LIKE 'user%'"), 25)
+        self.assertEqual(self.db.query_value('SELECT COUNT(*) FROM cities'), 28)
+
+    def test_select_last_insert_id(self):
+        id = self.db.query_value('INSERT INTO users (email) VALUES (?) RETURNING id', 'foo@bar.com')
+        self.assertEqual(id, 1)
+
+    def test_binary_results(self):
+        db = self.binary_database()
+        row = db.sql('SELECT ?::bigint, ?::float8, ?::bytea, ?::text', 2 ** 40, 1.5, b'\x00\xff', 'foo').query_one(row_format=db.TUPLE)
+        self.assertEqual(row, (2 ** 40, 1.5, b'\x00\xff', 'foo'))
+
+    def test_binary_streaming(self):
+        db = self.binary_database()
+        self.assertEqual([city['id'] for city in db.iter_query('SELECT id FROM cities ORDER BY id')], [1, 2, 3])
+
+    def test_copy_in_binary_format(self):
+        self.db.execute('CREATE TEMPORARY TABLE files (id BIGINT, data BYTEA)')
+        count = self.db.copy_in('files', ['id', 'data'], [(1, b'\x00\x01'), {'id': 2, 'data': b'\xff'}], format='binary')
+        self.assertEqual(count, 2)
+        self.assertEqual(self.db.query_values('SELECT data FROM files ORDER BY id'), [b'\x00\x01', b'\xff'])
+
+    def test_copy_in_binary_format_with_type_modifiers(self):
+        self.db.execute('CREATE TEMPORARY TABLE prices (code VARCHAR(20), amount NUMERIC(10, 2))')
+        self.db.copy_in('prices', ['code', 'amount'], [('foo', Decimal('1.50'))], format='binary')
+        self.assertEqual(self.db.query_one('SELECT code, amount FROM prices'), {'code': 'foo', 'amount': Decimal('1.50')})
+
+    def test_copy_in_csv_format(self):
+        self.db.copy_in('users', ['email'], [('foo@bar.com',), (None,)], format='csv')
+        self.assertEqual(self.db.query_values('SELECT email FROM users ORDER BY id'), ['foo@bar.com', None])
+
+    def test_batch_uses_a_pipeline(self):
+        statements = [
+            ('INSERT INTO users (email) VALUES (%s)', ['foo@bar.com'], False),
+            ('SELECT COUNT(*) FROM users', [], True),
+            ('SELECT email FROM users', [], True),
+        ]
+        outcomes = self.db.driver.run_batch(statements)
+        self.assertEqual(outcomes, [(None, None, None), (['count'], [(1,)], None), (['email'], [('foo@bar.com',)], None)])
+
+    def test_batch_rolls_back_pipeline_and_runs_statements_one_by_one_on_error(self):
+        with self.db.batch(raise_errors=False) as batch:
+            batch.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            failed = batch.execute('INSERT INTO missing_table VALUES (1)')
+            count = batch.query_value('SELECT COUNT(*) FROM users')
+        with self.assertRaises(Exception):
+            failed.result()
+        self.assertEqual(count.result(), 1)
+
+    def test_isolation_level(self):
+        with self.db.transaction(self.db.SERIALIZABLE):
+            self.assertEqual(self.db.query_value('SHOW transaction_isolation'), 'serializable')
+        self.assertEqual(self.db.query_value('SHOW transaction_isolation'), 'read committed')
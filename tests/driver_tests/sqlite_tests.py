@@ -1,6 +1,10 @@
+import sqlite3
 from unittest import TestCase
 from ..database_tests import DatabaseTestCase
+from ..helpers import TempDirectoryTestCase
+from rebel.database import Database
 from rebel.drivers.sqlite import SqliteDriver
+from rebel.instrumentation import ExplainProfiler, Listener
 
 
 class SqliteTestCase(DatabaseTestCase, TestCase):
@@ -30,3 +34,105 @@ class SqliteTestCase(DatabaseTestCase, TestCase):
         self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
         id = self.db.query_value('SELECT last_insert_rowid()')
         self.assertEqual(id, 1)
+
+    def test_explain_profiler_records_the_query_plan(self):
+        profiler = self.db.add_listener(ExplainProfiler(threshold=0))
+        self.db.query('SELECT * FROM cities WHERE id = ?', 1)
+        self.db.query('SELECT * FROM cities WHERE name = ?', 'Boston')
+        plans = [capture['plan'] for capture in profiler.report()]
+        self.assertTrue(plans[0][0]['detail'].startswith('SEARCH cities'))
+        self.assertTrue(plans[1][0]['detail'].startswith('SCAN cities'))
+
+    def test_queries_outside_transaction_do_not_leave_a_transaction_open(self):
+        self.db.query('SELECT * FROM cities')
+        self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        self.assertFalse(self.db.driver.connection.in_transaction)
+
+    def test_transaction_begins_explicitly(self):
+        with self.db.transaction():
+            self.assertTrue(self.db.driver.connection.in_transaction)
+        self.assertFalse(self.db.driver.connection.in_transaction)
+
+
+class SqliteFileTestCase(TempDirectoryTestCase, TestCase):
+
+    def setUp(self):
+        super(SqliteFileTestCase, self).setUp()
+        self.path = self.temp_path('test db.sqlite')
+        db = Database(SqliteDriver(self.path))
+        db.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(254))')
+        db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        db.close()
+
+    def test_pragmas_are_applied_on_connect(self):
+        db = Database(SqliteDriver(self.path, pragmas={'journal_mode': 'wal', 'busy_timeout': 1234}))
+        self.assertEqual(db.query_value('PRAGMA journal_mode'), 'wal')
+        self.assertEqual(db.query_value('PRAGMA busy_timeout'), 1234)
+        db.close()
+
+    def test_read_only_connection_refuses_writes(self):
+        db = Database(SqliteDriver(self.path, read_only=True))
+        self.assertEqual(db.query_value('SELECT email FROM users'), 'foo@bar.com')
+        with self.assertRaises(sqlite3.OperationalError):
+            db.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+        db.close()
+
+    def test_uri_connection(self):
+        db = Database(SqliteDriver('file:memdb?mode=memory&cache=shared', uri=True))
+        db.execute('CREATE TABLE items (id INTEGER)')
+        other = Database(SqliteDriver('file:memdb?mode=memory&cache=shared', uri=True))
+        self.assertEqual(other.query('SELECT * FROM items'), [])
+        other.close()
+        db.close()
+
+    def test_serializable_transaction_is_exclusive(self):
+        db = Database(SqliteDriver(self.path))
+        other = Database(SqliteDriver(self.path, pragmas={'busy_timeout': 0}))
+        with db.transaction(db.SERIALIZABLE):
+            with self.assertRaises(sqlite3.OperationalError):
+                other.query('SELECT * FROM users')
+        self.assertEqual(len(other.query('SELECT * FROM users')), 1)
+        other.close()
+        db.close()
+
+    def test_repeatable_read_transaction_takes_the_write_lock(self):
+        db = Database(SqliteDriver(self.path))
+        other = Database(SqliteDriver(self.path, pragmas={'busy_timeout': 0}))
+        with db.transaction(db.REPEATABLE_READ):
+            self.assertEqual(len(other.query('SELECT * FROM users')), 1)
+            with self.assertRaises(sqlite3.OperationalError):
+                other.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+        other.close()
+        db.close()
+
+    def test_run_in_transaction_retries_busy_errors(self):
+        db = Database(SqliteDriver(self.path))
+        other = Database(SqliteDriver(self.path, pragmas={'busy_timeout': 0}))
+        retries = []
+
+        class ReleaseLock(Listener):
+            def before_retry(self, error, attempt, delay):
+                retries.append(attempt)
+                db.commit()
+
+        other.add_listener(ReleaseLock())
+        db.start_transaction(db.SERIALIZABLE)
+        insert = lambda: other.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+        other.run_in_transaction(insert, other.REPEATABLE_READ, backoff=0)
+        self.assertEqual(retries, [1])
+        self.assertEqual(len(other.query('SELECT * FROM users')), 2)
+        other.close()
+        db.close()
+
+    def test_retrying_transaction_gives_up_after_retries(self):
+        db = Database(SqliteDriver(self.path))
+        other = Database(SqliteDriver(self.path, pragmas={'busy_timeout': 0}))
+        retrying = other.retrying(other.REPEATABLE_READ, retries=2, backoff=0)
+        with db.transaction(db.SERIALIZABLE):
+            with self.assertRaises(sqlite3.OperationalError):
+                retrying.run(lambda: other.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com'))
+        self.assertEqual(retrying.stats(), {'calls': 1, 'retries': 2, 'failures': 1})
+        self.assertEqual(other.transaction_depth, 0)
+        other.close()
+        db.close()
+
@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+from .helpers import DriverListener, TempDirectoryTestCase
+from rebel.database import Database
+from rebel.drivers.sqlite import SqliteDriver
+
+
+class GatherTestCase(TempDirectoryTestCase, TestCase):
+
+    def setUp(self):
+        super(GatherTestCase, self).setUp()
+        self.db = Database(SqliteDriver(self.temp_path('test.sqlite'), pragmas={'journal_mode': 'wal'}))
+        self.db.execute('CREATE TABLE cities (id INTEGER PRIMARY KEY, name VARCHAR(254))')
+        self.db.execute('INSERT INTO cities (name) VALUES (?), (?), (?)', 'New York', 'Washington', 'Los Angeles')
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_gather_returns_results_in_order(self):
+        results = self.db.gather(
+            'SELECT COUNT(*) AS count FROM cities',
+            ('SELECT name FROM cities WHERE id = ?', 2),
+            ('SELECT name FROM cities WHERE id = :id', {'id': 3}),
+            self.db.sql('SELECT name FROM cities').add('WHERE id = ?', 1),
+        )
+        self.assertEqual(results, [
+            [{'count': 3}],
+            [{'name': 'Washington'}],
+            [{'name': 'Los Angeles'}],
+            [{'name': 'New York'}],
+        ])
+
+    def test_gather_runs_on_separate_connections(self):
+        listener = self.db.add_listener(DriverListener())
+        self.db.gather('SELECT 1', 'SELECT 2', 'SELECT 3')
+        self.assertEqual(len(listener.drivers), 3)
+        self.assertNotIn(self.db.driver, listener.drivers)
+
+    def test_gather_propagates_first_error(self):
+        with self.assertRaises(Exception) as context:
+            self.db.gather('SELECT 1', 'SELECT * FROM missing_table', 'SELECT * FROM other_missing_table')
+        self.assertIn('missing_table', str(context.exception))
+        self.assertNotIn('other_missing_table', str(context.exception))
+
+    def test_gather_inside_transaction_runs_on_the_transaction_connection(self):
+        listener = self.db.add_listener(DriverListener())
+        self.db.start_transaction()
+        self.db.execute('INSERT INTO cities (name) VALUES (?)', 'Boston')
+        results = self.db.gather('SELECT COUNT(*) AS count FROM cities', 'SELECT 1 AS one')
+        self.db.rollback()
+        self.assertEqual(results, [[{'count': 4}], [{'one': 1}]])
+        self.assertEqual(set(listener.drivers), set([self.db.driver]))
+
+    def test_gather_on_memory_database_runs_sequentially(self):
+        db = Database(SqliteDriver(':memory:'))
+        db.execute('CREATE TABLE things (id INTEGER)')
+        self.assertEqual(db.gather('SELECT COUNT(*) AS count FROM things', 'SELECT 1 AS one'), [[{'count': 0}], [{'one': 1}]])
+        self.assertIsNone(db.executor)
+        db.close()
+
+    def test_close_releases_gather_connections(self):
+        self.db.gather('SELECT 1', 'SELECT 2')
+        readers = self.db.gather_pool
+        self.db.close()
+        self.assertEqual(readers.stats()['idle'], 0)
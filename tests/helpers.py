@@ -0,0 +1,28 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from rebel.instrumentation import Listener
+
+
+class DriverListener(Listener):
+
+    def __init__(self):
+        self.drivers = []
+        self.threads = []
+
+    def after_execute(self, event):
+        self.drivers.append(event.driver)
+        self.threads.append(threading.current_thread())
+
+
+class TempDirectoryTestCase(object):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        super(TempDirectoryTestCase, self).setUp()
+
+    def temp_path(self, name):
+        return os.path.join(self.directory, name)
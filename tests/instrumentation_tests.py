@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from rebel.instrumentation import ExplainProfiler, Listener, SlowQueryLogger, StatementStats, percentile
+
+
+class RecordingListener(Listener):
+
+    def __init__(self):
+        self.calls = []
+
+    def after_parse(self, sql, elapsed):
+        self.calls.append(('parse', sql))
+
+    def before_execute(self, event):
+        self.calls.append(('before_execute', event.sql))
+
+    def after_execute(self, event):
+        self.calls.append(('after_execute', event.rowcount, event.error))
+
+    def after_fetch(self, event):
+        self.calls.append(('after_fetch', event.rowcount))
+
+    def before_transaction(self, action, depth):
+        self.calls.append(('before_transaction', action, depth))
+
+    def after_transaction(self, action, depth, elapsed):
+        self.calls.append(('after_transaction', action, depth))
+
+
+class InstrumentationTestCase(object):
+
+    def test_listener_sees_query_lifecycle(self):
+        listener = self.db.add_listener(RecordingListener())
+        self.db.query('SELECT * FROM cities WHERE id > ?', 1)
+        names = [call[0] for call in listener.calls]
+        self.assertEqual(names, ['parse', 'before_execute', 'after_execute', 'after_fetch'])
+        self.assertEqual(listener.calls[-1], ('after_fetch', 2))
+
+    def test_query_one_and_query_value_fetch_a_single_row(self):
+        listener = self.db.add_listener(RecordingListener())
+        self.db.query_one('SELECT * FROM cities')
+        self.assertEqual(listener.calls[-1], ('after_fetch', 1))
+        self.db.query_value('SELECT name FROM cities')
+        self.assertEqual(listener.calls[-1], ('after_fetch', 1))
+        self.db.query_values('SELECT name FROM cities')
+        self.assertEqual(listener.calls[-1], ('after_fetch', 3))
+
+    def test_listener_sees_execute_rowcount(self):
+        listener = self.db.add_listener(RecordingListener())
+        self.db.execute('UPDATE cities SET name = ? WHERE id > ?', 'Boston', 1)
+        self.assertEqual(listener.calls[-1], ('after_execute', 2, None))
+
+    def test_listener_sees_errors(self):
+        listener = self.db.add_listener(RecordingListener())
+        with self.assertRaises(Exception):
+            self.db.query('SELECT * FROM missing_table')
+        self.assertEqual(listener.calls[-1][0], 'after_execute')
+        self.assertIsNotNone(listener.calls[-1][2])
+
+    def test_listener_sees_streamed_rows(self):
+        listener = self.db.add_listener(RecordingListener())
+        self.assertEqual(len(list(self.db.iter_query('SELECT * FROM cities'))), 3)
+        self.assertEqual(listener.calls[-1], ('after_fetch', 3))
+
+    def test_listener_sees_each_batched_statement(self):
+        listener = self.db.add_listener(RecordingListener())
+        stats = self.db.add_listener(StatementStats())
+        with self.db.batch(raise_errors=False) as batch:
+            batch.execute('UPDATE cities SET name = ? WHERE id = ?', 'Boston', 1)
+            batch.query('SELECT * FROM cities')
+            batch.query('SELECT * FROM missing_table')
+        calls = [call for call in listener.calls if call[0] != 'parse']
+        self.assertEqual([call[0] for call in calls], ['before_execute'] * 3 + ['after_execute'] * 2 + ['after_fetch', 'after_execute'])
+        self.assertEqual(calls[5], ('after_fetch', 3))
+        self.assertIsNotNone(calls[6][2])
+        self.assertEqual(sum(entry['calls'] for entry in stats.report()), 3)
+
+    def test_listener_sees_transaction_boundaries(self):
+        listener = self.db.add_listener(RecordingListener())
+        with self.db.transaction():
+            with self.db.transaction():
+                pass
+        transactions = [call for call in listener.calls if 'transaction' in call[0]]
+        self.assertEqual(transactions, [
+            ('before_transaction', 'start', 0), ('after_transaction', 'start', 0),
+            ('before_transaction', 'start', 1), ('after_transaction', 'start', 1),
+            ('before_transaction', 'commit', 2), ('after_transaction', 'commit', 2),
+            ('before_transaction', 'commit', 1), ('after_transaction', 'commit', 1),
+        ])
+
+    def test_removed_listener_is_not_notified(self):
+        listener = self.db.add_listener(RecordingListener())
+        self.db.remove_listener(listener)
+        self.db.query('SELECT * FROM cities')
+        self.assertEqual(listener.calls, [])
+
+    def test_statement_stats_aggregate_by_fingerprint(self):
+        stats = self.db.add_listener(StatementStats())
+        self.db.query('SELECT * FROM cities WHERE id > ?', 1)
+        self.db.query('SELECT  *  FROM cities WHERE id > ?', 0)
+        self.db.execute('UPDATE cities SET name = ? WHERE id = ?', 'Boston', 1)
+        report = dict((stats['sql'], stats) for stats in stats.report())
+        self.assertEqual(len(report), 2)
+        select = [stats for sql, stats in report.items() if sql.startswith('SELECT')][0]
+        self.assertEqual(select['calls'], 2)
+        self.assertEqual(select['rows'], 5)
+        self.assertEqual(select['errors'], 0)
+        self.assertIsNotNone(select['p50'])
+        self.assertIsNotNone(select['p99'])
+
+    def test_slow_query_logger_logs_queries_above_threshold(self):
+        logger = logging.getLogger('rebel.tests')
+        records = []
+        handler = RecordingHandler(records)
+        logger.addHandler(handler)
+        self.db.add_listener(SlowQueryLogger(threshold=0, logger=logger))
+        try:
+            self.db.query('SELECT * FROM cities')
+        finally:
+            logger.removeHandler(handler)
+        self.assertEqual(len(records), 1)
+        self.assertIn('3 rows', records[0].getMessage())
+
+    def test_explain_profiler_captures_slow_statements(self):
+        profiler = self.db.add_listener(ExplainProfiler(threshold=0))
+        self.db.query('SELECT * FROM cities WHERE id > ?', 1)
+        captures = profiler.report()
+        self.assertEqual(len(captures), 1)
+        self.assertEqual(captures[0]['sql'], 'SELECT * FROM cities WHERE id > ?')
+        self.assertEqual(captures[0]['rowcount'], 2)
+        self.assertIsNotNone(captures[0]['plan'])
+        self.assertIsNone(captures[0]['error'])
+
+    def test_explain_profiler_ignores_fast_and_failed_statements(self):
+        profiler = self.db.add_listener(ExplainProfiler(threshold=60))
+        self.db.query('SELECT * FROM cities')
+        profiler.threshold = 0
+        with self.assertRaises(Exception):
+            self.db.query('SELECT * FROM missing_table')
+        self.assertEqual(profiler.report(), [])
+
+    def test_explain_profiler_rate_limits_each_statement(self):
+        profiler = self.db.add_listener(ExplainProfiler(threshold=0, interval=60))
+        for i in range(3):
+            self.db.query_value('SELECT name FROM cities WHERE id = ?', i)
+        self.db.execute('UPDATE cities SET name = ? WHERE id = ?', 'Boston', 1)
+        self.assertEqual(len(profiler.report()), 2)
+        profiler.interval = 0
+        self.db.query_value('SELECT name FROM cities WHERE id = ?', 1)
+        self.assertEqual(len(profiler.report()), 3)
+
+    def test_explain_profiler_keeps_a_bounded_buffer(self):
+        profiler = self.db.add_listener(ExplainProfiler(threshold=0, capacity=2))
+        for column in ['id', 'name', 'id, name']:
+            self.db.query('SELECT %s FROM cities' % column)
+        self.assertEqual([capture['sql'] for capture in profiler.report()], [
+            'SELECT name FROM cities', 'SELECT id, name FROM cities',
+        ])
+
+    def test_explain_profiler_writes_json_lines(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'plans.jsonl')
+            self.db.add_listener(ExplainProfiler(threshold=0, path=path))
+            self.db.query('SELECT * FROM cities')
+            self.db.query('SELECT * FROM users')
+            with open(path) as file:
+                captures = [json.loads(line) for line in file]
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual([capture['sql'] for capture in captures], ['SELECT * FROM cities', 'SELECT * FROM users'])
+
+    def test_explain_profiler_inside_transaction(self):
+        profiler = self.db.add_listener(ExplainProfiler(threshold=0, analyze=True))
+        with self.db.transaction():
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            self.assertEqual(self.db.query_value('SELECT email FROM users'), 'foo@bar.com')
+        captures = profiler.report()
+        self.assertEqual(len(captures), 2)
+        self.assertFalse(captures[0]['analyze'])
+        self.assertEqual(captures[1]['analyze'], self.db.driver.explain_analyze)
+        self.assertEqual(self.db.query_values('SELECT email FROM users'), ['foo@bar.com'])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 51)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self, records):
+        logging.Handler.__init__(self)
+        self.records = records
+
+    def emit(self, record):
+        self.records.append(record)
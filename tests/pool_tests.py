@@ -0,0 +1,146 @@
+import threading
+import time
+from unittest import TestCase
+
+from .helpers import TempDirectoryTestCase
+from rebel.database import Database
+from rebel.drivers.sqlite import SqliteDriver
+from rebel.exceptions import PoolTimeout
+from rebel.pool import ConnectionPool
+
+
+class PoolTestCase(TempDirectoryTestCase, TestCase):
+
+    def setUp(self):
+        super(PoolTestCase, self).setUp()
+        self.driver = SqliteDriver(self.temp_path('pool.sqlite'))
+
+    def make_database(self, **kwargs):
+        db = Database(ConnectionPool(self.driver, **kwargs))
+        db.execute('CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, email VARCHAR(254))')
+        return db
+
+    def test_pool_opens_connections_on_demand_and_reuses_them(self):
+        pool = ConnectionPool(self.driver, max_size=2)
+        driver = pool.acquire()
+        self.assertIsNot(driver, self.driver)
+        self.assertIsNotNone(driver.connection)
+        pool.release(driver)
+        self.assertIs(pool.acquire(), driver)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_pool_raises_exception_after_checkout_timeout(self):
+        pool = ConnectionPool(self.driver, max_size=1, timeout=0.01)
+        pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_pool_waiter_gets_released_connection(self):
+        pool = ConnectionPool(self.driver, max_size=1, timeout=5)
+        driver = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, [driver])
+        timer.start()
+        self.assertIs(pool.acquire(), driver)
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['max_wait_time'], 0)
+
+    def test_pool_evicts_idle_connections_down_to_min_size(self):
+        pool = ConnectionPool(self.driver, min_size=1, max_size=3, idle_timeout=0.01)
+        drivers = [pool.acquire() for _ in range(3)]
+        for driver in drivers:
+            pool.release(driver)
+        time.sleep(0.02)
+        pool.release(pool.acquire())
+        stats = pool.stats()
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['evicted'], 2)
+
+    def test_quiet_pool_evicts_idle_connections(self):
+        pool = ConnectionPool(self.driver, min_size=1, max_size=3, idle_timeout=0.01)
+        drivers = [pool.acquire() for _ in range(3)]
+        for driver in drivers:
+            pool.release(driver)
+        deadline = time.time() + 1
+        while pool.stats()['size'] > 1 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(pool.stats()['size'], 1)
+        pool.close()
+
+    def test_pool_opens_min_size_connections_on_first_use(self):
+        pool = ConnectionPool(self.driver, min_size=3, max_size=5)
+        self.assertEqual(pool.stats()['size'], 0)
+        pool.release(pool.acquire())
+        self.assertEqual(pool.stats()['idle'], 3)
+
+    def test_pool_fill_opens_min_size_connections(self):
+        pool = ConnectionPool(self.driver, min_size=3, max_size=5)
+        pool.fill()
+        self.assertEqual(pool.stats()['idle'], 3)
+
+    def test_pool_stats_report_utilization(self):
+        pool = ConnectionPool(self.driver, max_size=4)
+        pool.acquire()
+        self.assertEqual(pool.stats()['utilization'], 0.25)
+
+    def test_pooled_database_releases_connection_after_query(self):
+        db = self.make_database()
+        db.query('SELECT * FROM users')
+        self.assertEqual(db.pool.stats()['in_use'], 0)
+
+    def test_pooled_transaction_pins_connection_until_outermost_commit(self):
+        db = self.make_database()
+        with db.transaction():
+            driver = db.state.driver
+            with db.transaction():
+                db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+                self.assertIs(db.state.driver, driver)
+            self.assertEqual(db.pool.stats()['in_use'], 1)
+        self.assertEqual(db.pool.stats()['in_use'], 0)
+        self.assertEqual(db.query_value('SELECT email FROM users'), 'foo@bar.com')
+
+    def test_pooled_transaction_state_is_local_to_thread(self):
+        db = self.make_database()
+        depths = []
+        db.start_transaction()
+        thread = threading.Thread(target=lambda: depths.append(db.transaction_depth))
+        thread.start()
+        thread.join()
+        db.rollback()
+        self.assertEqual(depths, [0])
+
+    def test_pooled_database_shared_between_threads(self):
+        db = self.make_database(max_size=4, timeout=5)
+        errors = []
+
+        def insert(i):
+            try:
+                with db.transaction():
+                    db.execute('INSERT INTO users (email) VALUES (?)', 'user%d@bar.com' % i)
+            except Exception as exception:
+                errors.append(exception)
+
+        threads = [threading.Thread(target=insert, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(db.query_value('SELECT COUNT(*) FROM users'), 8)
+
+    def test_dead_connections_are_discarded(self):
+        db = self.make_database(max_size=1)
+        driver = db.pool.acquire()
+        db.pool.release(driver)
+        driver.connection.close()
+        with self.assertRaises(Exception):
+            db.query_value('SELECT 1')
+        self.assertEqual(db.query_value('SELECT 1'), 1)
+        with self.assertRaises(Exception):
+            with db.transaction():
+                db.state.driver.connection.close()
+                db.execute('SELECT 1')
+        self.assertEqual(db.pool.stats()['size'], 0)
+        db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        self.assertEqual(db.query_value('SELECT COUNT(*) FROM users'), 1)
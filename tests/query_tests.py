@@ -23,6 +23,15 @@ class QueryTestCase(object):
         names = self.db.query_values('SELECT name FROM cities ORDER BY id')
         self.assertEqual(names, ['New York', 'Washington', 'Los Angeles'])
 
+    def test_query_one_and_query_value_without_rows_return_none(self):
+        self.assertIsNone(self.db.query_one('SELECT * FROM users'))
+        self.assertIsNone(self.db.query_value('SELECT email FROM users'))
+        self.assertEqual(self.db.query_values('SELECT email FROM users'), [])
+
+    def test_query_one_returns_first_row_of_unbounded_query(self):
+        city = self.db.query_one('SELECT * FROM cities ORDER BY id DESC')
+        self.assertEqual(city, {'id': 3, 'name': 'Los Angeles'})
+
     def test_execute_statement_with_arguments(self):
         self.db.execute("""
             INSERT INTO users (id, email)
@@ -95,3 +104,70 @@ class QueryTestCase(object):
             )
         result_users = self.db.query('SELECT * FROM users ORDER BY id')
         self.assertEqual(result_users, users)
+
+    def test_iter_query_yields_rows_lazily(self):
+        rows = self.db.iter_query('SELECT * FROM cities ORDER BY id')
+        self.assertEqual(next(rows), {'id': 1, 'name': 'New York'})
+        self.assertEqual(list(rows), [
+            {'id': 2, 'name': 'Washington'},
+            {'id': 3, 'name': 'Los Angeles'},
+        ])
+
+    def test_iter_query_with_named_arguments(self):
+        rows = self.db.iter_query('SELECT * FROM cities WHERE id > :id ORDER BY id', id=2)
+        self.assertEqual(list(rows), [{'id': 3, 'name': 'Los Angeles'}])
+
+    def test_iter_query_empty_table_yields_nothing(self):
+        self.assertEqual(list(self.db.iter_query('SELECT * FROM users')), [])
+
+    def test_iter_query_fetches_in_batches(self):
+        self.db.batch_size = 2
+        names = [row['name'] for row in self.db.iter_query('SELECT name FROM cities ORDER BY id')]
+        self.assertEqual(names, ['New York', 'Washington', 'Los Angeles'])
+
+    def test_iter_query_closed_early_releases_cursor(self):
+        rows = self.db.iter_query('SELECT * FROM cities ORDER BY id')
+        next(rows)
+        rows.close()
+        self.db.execute('DELETE FROM cities')
+        self.assertEqual(self.db.query('SELECT * FROM cities'), [])
+
+    def test_iter_query_inside_transaction(self):
+        with self.db.transaction():
+            self.db.execute('INSERT INTO users (id, email) VALUES (?, ?)', 1, 'foo@bar.com')
+            users = list(self.db.iter_query('SELECT * FROM users'))
+        self.assertEqual(users, [{'id': 1, 'email': 'foo@bar.com'}])
+
+    def test_placeholders_inside_string_literals_are_ignored(self):
+        row = self.db.query_one("SELECT '?' AS mark, ':name' AS name, ? AS value", 1)
+        self.assertEqual(row, {'mark': '?', 'name': ':name', 'value': 1})
+
+    def test_named_placeholders_inside_string_literals_are_ignored(self):
+        row = self.db.query_one("SELECT ':name' AS name, :value AS value", value=1)
+        self.assertEqual(row, {'name': ':name', 'value': 1})
+
+    def test_percent_signs_with_arguments(self):
+        names = self.db.query_values("SELECT name FROM cities WHERE name LIKE '%o%' AND id > ? ORDER BY id", 1)
+        self.assertEqual(names, ['Washington', 'Los Angeles'])
+
+    def test_repeated_statements_hit_statement_cache(self):
+        self.db.query('SELECT * FROM cities WHERE id = :id', id=1)
+        hits = self.db.statements.stats()['hits']
+        self.db.query('SELECT * FROM cities WHERE id = :id', id=2)
+        self.assertEqual(self.db.statements.stats()['hits'], hits + 1)
+
+    def test_scan(self):
+        chunks = list(self.db.scan('cities', chunk_size=2, columns=['name']))
+        self.assertEqual(chunks, [
+            [{'id': 1, 'name': 'New York'}, {'id': 2, 'name': 'Washington'}],
+            [{'id': 3, 'name': 'Los Angeles'}],
+        ])
+        checkpoint = self.db.scan('cities', chunk_size=1).run(lambda rows: None, partitions=2)
+        self.assertEqual(sum(partition['rows'] for partition in checkpoint), 3)
+
+    def test_gather(self):
+        results = self.db.gather(
+            ('SELECT name FROM cities WHERE id = ?', 1),
+            ('SELECT name FROM cities WHERE id = :id', {'id': 2}),
+        )
+        self.assertEqual(results, [[{'name': 'New York'}], [{'name': 'Washington'}]])
@@ -0,0 +1,114 @@
+import threading
+import time
+from unittest import TestCase
+
+from rebel.cache import ResultCache, analyze
+
+
+class ResultCacheTestCase(TestCase):
+
+    def test_analyze_read_statements(self):
+        self.assertFalse(analyze('SELECT * FROM users').write)
+        self.assertFalse(analyze('  (SELECT 1)').write)
+        self.assertFalse(analyze('WITH u AS (SELECT * FROM users) SELECT * FROM u').write)
+
+    def test_analyze_write_targets(self):
+        self.assertEqual(analyze('INSERT INTO users (email) VALUES (?)').tables, {'users'})
+        self.assertEqual(analyze('UPDATE public.Users SET email = ?').tables, {'users'})
+        self.assertEqual(analyze('DELETE FROM "Users" WHERE id = ?').tables, {'users'})
+        self.assertEqual(analyze('TRUNCATE TABLE a, b').tables, {'a'})
+        self.assertEqual(analyze("WITH d AS (DELETE FROM logs RETURNING *) INSERT INTO archive SELECT * FROM d").tables,
+            {'logs', 'archive'})
+
+    def test_analyze_ignores_literals(self):
+        analysis = analyze("SELECT 'users' FROM cities")
+        self.assertNotIn('users', analysis.words)
+        self.assertIn('cities', analysis.words)
+
+    def test_unknown_write_clears_everything(self):
+        cache = ResultCache()
+        cache.fetch('SELECT * FROM users', (), None, 30, lambda: [1])
+        cache.invalidate('CALL cleanup()')
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResultCache(max_entries=2)
+        for i in range(3):
+            cache.fetch('SELECT ?', (i,), None, 30, lambda: [i])
+        self.assertEqual(cache.fetch('SELECT ?', (0,), None, 30, lambda: ['reloaded']), ['reloaded'])
+
+    def test_entries_are_evicted_by_row_count(self):
+        cache = ResultCache(max_rows=3)
+        cache.fetch('SELECT 1', (), None, 30, lambda: [1, 2])
+        cache.fetch('SELECT 2', (), None, 30, lambda: [1, 2])
+        self.assertEqual(cache.stats()['entries'], 1)
+        self.assertEqual(cache.stats()['rows'], 2)
+
+    def test_callers_get_their_own_copies(self):
+        cache = ResultCache()
+        first = cache.fetch('SELECT * FROM users', (), None, 30, lambda: [{'id': 1}])
+        first[0]['id'] = 2
+        first.append({'id': 3})
+        second = cache.fetch('SELECT * FROM users', (), None, 30, lambda: [])
+        second[0]['email'] = 'foo@bar.com'
+        self.assertEqual(cache.fetch('SELECT * FROM users', (), None, 30, lambda: []), [{'id': 1}])
+
+    def test_unhashable_arguments_bypass_cache(self):
+        cache = ResultCache()
+        self.assertEqual(cache.fetch('SELECT ?', ([1, 2],), None, 30, lambda: [1]), [1])
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_concurrent_misses_are_collapsed(self):
+        cache = ResultCache()
+        calls = []
+        results = []
+
+        def load():
+            calls.append(1)
+            time.sleep(0.05)
+            return ['row']
+
+        def fetch():
+            results.append(cache.fetch('SELECT * FROM users', (), None, 30, load))
+
+        threads = [threading.Thread(target=fetch) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [['row']] * 5)
+        self.assertEqual(cache.stats()['collapsed'], 4)
+
+    def test_errors_are_propagated_to_collapsed_callers(self):
+        cache = ResultCache()
+        errors = []
+        started = threading.Event()
+
+        def load():
+            started.set()
+            time.sleep(0.05)
+            raise ValueError()
+
+        def fetch():
+            try:
+                cache.fetch('SELECT 1', (), None, 30, load)
+            except ValueError as error:
+                errors.append(error)
+
+        leader = threading.Thread(target=fetch)
+        leader.start()
+        started.wait()
+        fetch()
+        leader.join()
+        self.assertEqual(len(errors), 2)
+
+    def test_invalidation_during_load_prevents_storing_stale_result(self):
+        cache = ResultCache()
+
+        def load():
+            cache.invalidate('UPDATE users SET email = NULL')
+            return ['stale']
+
+        cache.fetch('SELECT * FROM users', (), None, 30, load)
+        self.assertEqual(cache.stats()['entries'], 0)
@@ -0,0 +1,103 @@
+import shutil
+import sqlite3
+from unittest import TestCase, skipIf
+
+from .helpers import TempDirectoryTestCase
+from rebel.database import Database
+from rebel.drivers.sqlite import SqliteDriver
+from rebel.routing import ReplicaSet, is_read
+
+
+class RoutingTestCase(TempDirectoryTestCase, TestCase):
+
+    def setUp(self):
+        super(RoutingTestCase, self).setUp()
+        for name in ['primary', 'replica1', 'replica2']:
+            db = Database(SqliteDriver(self.path(name)))
+            db.execute('CREATE TABLE servers (name VARCHAR(20))')
+            db.execute('INSERT INTO servers (name) VALUES (?)', name)
+            db.close()
+        self.replicas = [SqliteDriver(self.path('replica1')), SqliteDriver(self.path('replica2'))]
+
+    def path(self, name):
+        return self.temp_path(name + '.sqlite')
+
+    def database(self, **kwargs):
+        return Database(SqliteDriver(self.path('primary')), replicas=ReplicaSet(self.replicas, **kwargs))
+
+    def server(self, db):
+        return db.query_value('SELECT name FROM servers')
+
+    def test_reads_are_balanced_between_replicas(self):
+        db = self.database()
+        self.assertEqual([self.server(db) for _ in range(4)], ['replica1', 'replica2', 'replica1', 'replica2'])
+
+    def test_writes_go_to_primary(self):
+        db = self.database()
+        db.execute('INSERT INTO servers (name) VALUES (?)', 'new')
+        self.assertEqual(Database(SqliteDriver(self.path('primary'))).query_value('SELECT COUNT(*) FROM servers'), 2)
+
+    @skipIf(sqlite3.sqlite_version_info < (3, 35, 0), 'RETURNING needs sqlite 3.35')
+    def test_writing_queries_go_to_primary(self):
+        db = self.database()
+        self.assertEqual(db.query('INSERT INTO servers (name) VALUES (?) RETURNING name', 'new'), [{'name': 'new'}])
+        with db.use_primary():
+            self.assertEqual(db.query_value('SELECT COUNT(*) FROM servers'), 2)
+
+    def test_reads_inside_transaction_go_to_primary(self):
+        db = self.database()
+        with db.transaction():
+            self.assertEqual(self.server(db), 'primary')
+
+    def test_use_primary_overrides_routing(self):
+        db = self.database()
+        with db.use_primary():
+            self.assertEqual(self.server(db), 'primary')
+        self.assertEqual(self.server(db), 'replica1')
+
+    def test_streamed_reads_go_to_replicas(self):
+        db = self.database()
+        self.assertEqual([row['name'] for row in db.iter_query('SELECT name FROM servers')], ['replica1'])
+
+    def test_least_outstanding_avoids_busy_replica(self):
+        db = self.database(strategy=ReplicaSet.LEAST_OUTSTANDING)
+        rows = db.iter_query('SELECT name FROM servers')
+        self.assertEqual(next(rows)['name'], 'replica1')
+        self.assertEqual([self.server(db) for _ in range(3)], ['replica2', 'replica2', 'replica2'])
+        rows.close()
+
+    def test_replica_that_cannot_connect_is_ejected(self):
+        self.replicas[0] = SqliteDriver(self.path('missing'), read_only=True)
+        db = self.database()
+        self.assertEqual([self.server(db) for _ in range(3)], ['replica2', 'replica2', 'replica2'])
+        stats = db.replicas.stats()
+        self.assertEqual(stats['ejections'], 1)
+        self.assertFalse(stats['replicas'][0]['healthy'])
+
+    def test_ejected_replica_is_readmitted(self):
+        self.replicas[0] = SqliteDriver(self.path('replica3'), read_only=True)
+        db = self.database(eject_time=0)
+        self.assertEqual(self.server(db), 'replica2')
+        shutil.copy(self.path('replica1'), self.path('replica3'))
+        self.assertEqual(set(self.server(db) for _ in range(2)), set(['replica1', 'replica2']))
+
+    def test_disconnected_replica_is_ejected_and_query_retried(self):
+        db = self.database()
+        self.assertEqual([self.server(db) for _ in range(2)], ['replica1', 'replica2'])
+        self.replicas[1].connection.close()
+        self.assertEqual([self.server(db) for _ in range(2)], ['replica1', 'replica1'])
+        self.assertEqual(db.replicas.stats()['replicas'][1]['failures'], 1)
+
+    def test_falls_back_to_primary_without_healthy_replicas(self):
+        self.replicas = [SqliteDriver(self.path('missing'), read_only=True)]
+        db = self.database()
+        self.assertEqual(self.server(db), 'primary')
+
+    def test_is_read(self):
+        self.assertTrue(is_read('SELECT * FROM users'))
+        self.assertTrue(is_read("  (SELECT 'update' FROM users)"))
+        self.assertTrue(is_read('WITH t AS (SELECT 1) SELECT * FROM t'))
+        self.assertFalse(is_read('WITH t AS (DELETE FROM users RETURNING *) SELECT * FROM t'))
+        self.assertFalse(is_read('SELECT * FROM users FOR UPDATE'))
+        self.assertFalse(is_read('INSERT INTO users (email) VALUES (?) RETURNING id'))
+        self.assertFalse(is_read('UPDATE users SET email = ?'))
@@ -0,0 +1,129 @@
+import pickle
+from array import array
+
+from rebel.columns import ColumnBuilder, build_columns
+from rebel.exceptions import UnknownRowFormat
+
+
+class RowFormatTestCase(object):
+
+    def test_query_with_tuple_row_format(self):
+        self.db.row_format = self.db.TUPLE
+        cities = self.db.query('SELECT id, name FROM cities ORDER BY id')
+        self.assertEqual(cities, [(1, 'New York'), (2, 'Washington'), (3, 'Los Angeles')])
+
+    def test_query_with_record_row_format(self):
+        self.db.row_format = self.db.RECORD
+        city = self.db.query('SELECT id, name FROM cities ORDER BY id')[0]
+        self.assertEqual(city, (1, 'New York'))
+        self.assertEqual(city.id, 1)
+        self.assertEqual(city['name'], 'New York')
+        self.assertEqual(city[1], 'New York')
+        self.assertEqual(city.keys(), ['id', 'name'])
+        self.assertEqual(city._asdict(), {'id': 1, 'name': 'New York'})
+
+    def test_records_share_one_class_per_column_set(self):
+        rows = self.db.sql('SELECT id, name FROM cities').query(row_format=self.db.RECORD)
+        other_rows = self.db.sql('SELECT id, name FROM cities WHERE id = 1').query(row_format=self.db.RECORD)
+        self.assertIs(type(rows[0]), type(rows[1]))
+        self.assertIs(type(rows[0]), type(other_rows[0]))
+
+    def test_record_get_returns_default_for_unknown_column(self):
+        city = self.db.sql('SELECT id, name FROM cities WHERE id = 1').query_one(row_format=self.db.RECORD)
+        self.assertEqual(city.get('name'), 'New York')
+        self.assertIsNone(city.get('population'))
+
+    def test_query_one_with_tuple_row_format(self):
+        city = self.db.sql('SELECT id, name FROM cities WHERE id = ?', 2).query_one(row_format=self.db.TUPLE)
+        self.assertEqual(city, (2, 'Washington'))
+
+    def test_iter_query_with_record_row_format(self):
+        sql = self.db.sql('SELECT id, name FROM cities ORDER BY id')
+        names = [city.name for city in sql.iter_query(row_format=self.db.RECORD)]
+        self.assertEqual(names, ['New York', 'Washington', 'Los Angeles'])
+
+    def test_query_value_and_values_ignore_row_format(self):
+        self.db.row_format = self.db.RECORD
+        self.assertEqual(self.db.query_value('SELECT name FROM cities WHERE id = 1'), 'New York')
+        self.assertEqual(self.db.query_values('SELECT id FROM cities ORDER BY id'), [1, 2, 3])
+
+    def test_records_can_be_pickled(self):
+        city = self.db.sql('SELECT id, name FROM cities WHERE id = 1').query_one(row_format=self.db.RECORD)
+        copy = pickle.loads(pickle.dumps(city))
+        self.assertEqual(copy, city)
+        self.assertEqual(copy.name, 'New York')
+        self.assertIs(type(copy), type(city))
+
+    def test_record_columns_named_like_methods_need_key_access(self):
+        row = self.db.sql('SELECT 3 AS count, 1 AS id').query_one(row_format=self.db.RECORD)
+        self.assertEqual(row['count'], 3)
+        self.assertEqual(row.count(3), 1)
+        self.assertEqual(row.get('count'), 3)
+        self.assertEqual(row.id, 1)
+
+    def test_unknown_row_format_raises_exception(self):
+        with self.assertRaises(UnknownRowFormat):
+            self.db.sql('SELECT * FROM cities').query(row_format='xml')
+
+    def test_query_columns(self):
+        columns = self.db.query_columns('SELECT id, name FROM cities WHERE id > ? ORDER BY id', 1)
+        self.assertEqual(list(columns.keys()), ['id', 'name'])
+        self.assertEqual(columns['id'], array('q', [2, 3]))
+        self.assertEqual(columns['name'], ['Washington', 'Los Angeles'])
+
+    def test_query_columns_in_batches(self):
+        self.db.batch_size = 2
+        columns = self.db.sql('SELECT id, name FROM cities ORDER BY id').query_columns()
+        self.assertEqual(columns['id'], array('q', [1, 2, 3]))
+        self.assertEqual(columns['name'], ['New York', 'Washington', 'Los Angeles'])
+
+    def test_query_columns_without_rows(self):
+        columns = self.db.query_columns('SELECT id, name FROM cities WHERE id > 10')
+        self.assertEqual(dict(columns), {'id': [], 'name': []})
+
+    def test_column_builder_uses_arrays_for_numbers(self):
+        builder = ColumnBuilder()
+        builder.extend((1.5, 2.0))
+        builder.extend((3.5,))
+        self.assertEqual(builder.values, array('d', [1.5, 2.0, 3.5]))
+
+    def test_column_builder_falls_back_to_list(self):
+        builder = ColumnBuilder()
+        builder.extend((1, 2))
+        builder.extend((3, None))
+        self.assertEqual(builder.values, [1, 2, 3, None])
+        builder = ColumnBuilder()
+        builder.extend((1, 2))
+        builder.extend((2 ** 70,))
+        self.assertEqual(builder.values, [1, 2, 2 ** 70])
+        builder = ColumnBuilder()
+        builder.extend((True, False))
+        self.assertEqual(builder.values, [True, False])
+
+    def test_column_builder_checks_types_on_the_first_batch_only(self):
+        builder = ColumnBuilder()
+        builder.extend((1, 2))
+        builder.extend((3, 'four'))
+        self.assertEqual(builder.values, [1, 2, 3, 'four'])
+        builder = ColumnBuilder()
+        builder.extend((1.5, None))
+        builder.extend((2.5,))
+        self.assertEqual(builder.values, [1.5, None, 2.5])
+
+    def test_build_columns_reads_description_after_first_fetch(self):
+        cursor = LazyCursor([(1, 'a'), (2, 'b'), (3, 'c')])
+        columns = build_columns(cursor, 2)
+        self.assertEqual(columns['id'], array('q', [1, 2, 3]))
+        self.assertEqual(columns['name'], ['a', 'b', 'c'])
+
+
+class LazyCursor(object):
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.description = None
+
+    def fetchmany(self, size):
+        self.description = (('id', None), ('name', None))
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
@@ -0,0 +1,128 @@
+import threading
+from decimal import Decimal
+from unittest import TestCase
+
+from .helpers import TempDirectoryTestCase
+from rebel.database import Database
+from rebel.drivers.sqlite import SqliteDriver
+from rebel.instrumentation import Listener
+from rebel.scan import TableScan
+
+
+class SqlListener(Listener):
+
+    def __init__(self):
+        self.sqls = []
+
+    def before_execute(self, event):
+        self.sqls.append(event.sql)
+
+
+class Collector(object):
+
+    def __init__(self, fail_on=None):
+        self.ids = []
+        self.lock = threading.Lock()
+        self.fail_on = fail_on
+
+    def __call__(self, rows):
+        ids = [row['id'] for row in rows]
+        if self.fail_on in ids:
+            raise ValueError(self.fail_on)
+        with self.lock:
+            self.ids.extend(ids)
+
+
+class BoundsDatabase(object):
+
+    row_format = 'dict'
+
+    def __init__(self, low, high):
+        self.bounds = (low, high)
+
+    def _query_one(self, sql, args, row_format):
+        return self.bounds
+
+
+class ScanTestCase(TempDirectoryTestCase, TestCase):
+
+    def setUp(self):
+        super(ScanTestCase, self).setUp()
+        self.db = Database(SqliteDriver(self.temp_path('test.sqlite'), pragmas={'journal_mode': 'wal'}))
+        self.db.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, code VARCHAR(10))')
+        self.db.insert_rows('items', ['id', 'code'], ((i, 'code %03d' % i) for i in range(1, 101)))
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_scan_walks_the_table_in_chunks(self):
+        chunks = list(self.db.scan('items', chunk_size=30))
+        self.assertEqual([len(chunk) for chunk in chunks], [30, 30, 30, 10])
+        self.assertEqual([row['id'] for chunk in chunks for row in chunk], list(range(1, 101)))
+
+    def test_scan_uses_keyset_pagination(self):
+        listener = self.db.add_listener(SqlListener())
+        scan = self.db.scan('items', chunk_size=40, columns=['code'], row_format=self.db.TUPLE)
+        chunks = list(scan)
+        self.assertEqual(chunks[1][0], (41, 'code 041'))
+        self.assertEqual(scan.last_key, 100)
+        self.assertEqual(listener.sqls[1], 'SELECT id, code FROM items WHERE id > ? ORDER BY id LIMIT 40')
+        self.assertTrue(all('OFFSET' not in sql for sql in listener.sqls))
+
+    def test_scan_resumes_after_a_key(self):
+        chunks = list(self.db.scan('items', chunk_size=50, after=80))
+        self.assertEqual([row['id'] for chunk in chunks for row in chunk], list(range(81, 101)))
+
+    def test_run_processes_partitions_in_parallel(self):
+        collector = Collector()
+        progress = []
+        checkpoint = self.db.scan('items', chunk_size=10).run(collector, partitions=4, progress=progress.append)
+        self.assertEqual(sorted(collector.ids), list(range(1, 101)))
+        self.assertEqual(len(checkpoint), 4)
+        self.assertTrue(all(partition['done'] for partition in checkpoint))
+        self.assertEqual(sum(partition['rows'] for partition in checkpoint), 100)
+        self.assertEqual([partition['until'] for partition in checkpoint], [25, 50, 75, None])
+        self.assertTrue(len(progress) >= 10)
+
+    def test_run_resumes_from_a_checkpoint(self):
+        scan = self.db.scan('items', chunk_size=10)
+        failing = Collector(fail_on=55)
+        with self.assertRaises(ValueError):
+            scan.run(failing, partitions=2)
+        checkpoint = scan.checkpoint()
+        self.assertFalse(all(partition['done'] for partition in checkpoint))
+        resumed = Collector()
+        checkpoint = self.db.scan('items', chunk_size=10).run(resumed, resume=checkpoint)
+        self.assertTrue(all(partition['done'] for partition in checkpoint))
+        self.assertEqual(sorted(failing.ids + resumed.ids), list(range(1, 101)))
+
+    def test_run_splits_non_numeric_keys(self):
+        codes = []
+        checkpoint = self.db.scan('items', key='code', chunk_size=7).run(
+            lambda rows: codes.extend(row['code'] for row in rows), partitions=3)
+        self.assertEqual(len(checkpoint), 3)
+        self.assertEqual(sorted(codes), ['code %03d' % i for i in range(1, 101)])
+
+    def test_split_decimal_and_float_keys(self):
+        partitions = TableScan(BoundsDatabase(Decimal('1.0'), Decimal('101.0')), 'items')._split(4)
+        self.assertEqual([partition.until for partition in partitions], [Decimal('26'), Decimal('51'), Decimal('76'), None])
+        partitions = TableScan(BoundsDatabase(0.0, 1.0), 'items')._split(2)
+        self.assertEqual([partition.until for partition in partitions], [0.5, None])
+
+    def test_run_in_processes(self):
+        checkpoint = self.db.scan('items', chunk_size=10).run(len, partitions=3, processes=True)
+        self.assertEqual(sum(partition['rows'] for partition in checkpoint), 100)
+
+    def test_run_on_memory_database_is_sequential(self):
+        db = Database(SqliteDriver(':memory:'))
+        db.execute('CREATE TABLE items (id INTEGER PRIMARY KEY)')
+        db.insert_rows('items', ['id'], ((i,) for i in range(1, 21)))
+        collector = Collector()
+        db.scan('items', chunk_size=3).run(collector, partitions=4)
+        self.assertEqual(collector.ids, list(range(1, 21)))
+        db.close()
+
+    def test_run_on_empty_table(self):
+        self.db.execute('DELETE FROM items')
+        checkpoint = self.db.scan('items').run(Collector())
+        self.assertEqual(checkpoint, [{'index': 0, 'after': None, 'until': None, 'rows': 0, 'done': True}])
@@ -88,3 +88,53 @@ class SqlBuilderTestCase(object):
         sql = self.db.sql('SELECT * FROM cities')
         with self.assertRaises(MixedPositionalAndNamedArguments):
             sql.add('WHERE id = ?, name = :name', 1, name='New York')
+
+    def test_sql_builder_iter_query(self):
+        sql = self.db.sql('SELECT * FROM cities')
+        sql.add('WHERE id > ?', 1).add('ORDER BY id')
+        self.assertEqual(list(sql.iter_query(batch_size=1)), [
+            {'id': 2, 'name': 'Washington'},
+            {'id': 3, 'name': 'Los Angeles'},
+        ])
+
+    def test_sql_builder_with_many_parts(self):
+        ids = list(range(1, 10001))
+        sql = self.db.sql('SELECT name FROM cities WHERE id IN (')
+        for id in ids:
+            sql.add('?', id).add(',')
+        sql.back()
+        sql.add(') ORDER BY id')
+        self.assertEqual(len(sql.sqls), 20001)
+        self.assertEqual(sql.query_values(), ['New York', 'Washington', 'Los Angeles'])
+
+    def test_sql_builder_compile_with_positional_arguments(self):
+        template = self.db.sql('SELECT name FROM cities').add('WHERE id = ?', 1).compile()
+        self.assertEqual(template.query_value(2), 'Washington')
+        self.assertEqual(template.query_value(3), 'Los Angeles')
+        self.assertEqual(template.query_one(1), {'name': 'New York'})
+
+    def test_sql_builder_compile_with_named_arguments(self):
+        sql = self.db.sql('SELECT name FROM cities WHERE id > :min', min=0)
+        sql.add('AND id < :max', max=0).add('ORDER BY id')
+        template = sql.compile()
+        self.assertEqual(template.query_values(min=1, max=4), ['Washington', 'Los Angeles'])
+        self.assertEqual(template.query_values(min=0, max=2), ['New York'])
+
+    def test_sql_builder_compile_with_mixed_parts(self):
+        sql = self.db.sql('SELECT name FROM cities WHERE id > ?', 0)
+        sql.add('AND id < :max', max=0)
+        template = sql.compile()
+        self.assertEqual(template.query_values(1, max=3), ['Washington'])
+        self.assertEqual(template.query_values(0, 2), ['New York'])
+
+    def test_sql_builder_compile_execute(self):
+        template = self.db.sql('INSERT INTO users (email) VALUES (:email)', email=None).compile()
+        template.execute(email='foo@bar.com')
+        template.execute('bar@foo.com')
+        self.assertEqual(self.db.query_values('SELECT email FROM users ORDER BY id'), ['foo@bar.com', 'bar@foo.com'])
+
+    def test_sql_builder_compile_is_not_affected_by_later_adds(self):
+        sql = self.db.sql('SELECT name FROM cities WHERE id = ?', 1)
+        template = sql.compile()
+        sql.add('AND id = ?', 2)
+        self.assertEqual(template.query_value(3), 'Los Angeles')
@@ -0,0 +1,89 @@
+import sqlite3
+import threading
+from unittest import TestCase
+
+from .helpers import DriverListener, TempDirectoryTestCase
+from rebel.database import Database
+from rebel.drivers.sqlite import SqliteDriver
+from rebel.exceptions import SqliteFileRequired
+from rebel.sqlite_pool import SqlitePool
+
+
+class SqlitePoolTestCase(TempDirectoryTestCase, TestCase):
+
+    def setUp(self):
+        super(SqlitePoolTestCase, self).setUp()
+        self.db = Database(SqlitePool(SqliteDriver(self.temp_path('test.sqlite'))))
+        self.db.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(254))')
+
+    def tearDown(self):
+        self.db.close()
+
+    def run_threads(self, target, count=8):
+        errors = []
+
+        def run():
+            try:
+                target()
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_database_uses_wal_mode(self):
+        self.assertEqual(self.db.query_value('PRAGMA journal_mode'), 'wal')
+
+    def test_concurrent_writers_do_not_lock_each_other(self):
+        def write():
+            for i in range(50):
+                self.db.execute('INSERT INTO users (email) VALUES (?)', 'user%d@example.com' % i)
+                with self.db.transaction():
+                    self.db.execute('UPDATE users SET email = email WHERE id = ?', i)
+        self.run_threads(write)
+        self.assertEqual(self.db.query_value('SELECT COUNT(*) FROM users'), 400)
+
+    def test_reads_use_one_connection_per_thread(self):
+        listener = self.db.add_listener(DriverListener())
+        self.run_threads(lambda: self.db.query('SELECT * FROM users'), count=4)
+        drivers = dict(zip(listener.threads, listener.drivers))
+        self.assertEqual(len(set(drivers.values())), 4)
+        self.assertNotIn(self.db.pool.driver, drivers.values())
+        self.assertEqual(self.db.replicas.stats()['readers'], 4)
+
+    def test_writes_and_transactions_use_the_writer(self):
+        listener = self.db.add_listener(DriverListener())
+        self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        with self.db.transaction():
+            self.db.query('SELECT * FROM users')
+        writers = set(listener.drivers)
+        self.assertEqual(len(writers), 1)
+        self.assertNotIn(writers.pop(), self.db.replicas.connections)
+
+    def test_readers_see_committed_writes_only(self):
+        counts = []
+        self.db.start_transaction()
+        self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        self.run_threads(lambda: counts.append(self.db.query_value('SELECT COUNT(*) FROM users')), count=1)
+        self.assertEqual(self.db.query_value('SELECT COUNT(*) FROM users'), 1)
+        self.db.commit()
+        self.run_threads(lambda: counts.append(self.db.query_value('SELECT COUNT(*) FROM users')), count=1)
+        self.assertEqual(counts, [0, 1])
+
+    def test_readers_cannot_write(self):
+        _, reader = self.db.replicas.acquire()
+        with self.assertRaises(sqlite3.OperationalError):
+            reader.query('INSERT INTO users (email) VALUES (?)', ['foo@bar.com'])
+
+    def test_close_disconnects_readers(self):
+        self.db.query('SELECT * FROM users')
+        self.db.close()
+        self.assertEqual(self.db.replicas.stats()['readers'], 0)
+
+    def test_memory_database_is_refused(self):
+        with self.assertRaises(SqliteFileRequired):
+            SqlitePool(SqliteDriver(':memory:'))
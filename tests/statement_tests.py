@@ -0,0 +1,85 @@
+from unittest import TestCase
+
+from rebel.statement import QMARK, FORMAT, NUMERIC, compile_statement, fingerprint, StatementCache
+
+
+class StatementTestCase(TestCase):
+
+    def test_positional_placeholders_are_translated(self):
+        statement = compile_statement('SELECT * FROM users WHERE id = ? AND name = ?', FORMAT)
+        self.assertEqual(statement.sql, 'SELECT * FROM users WHERE id = %s AND name = %s')
+        self.assertIsNone(statement.names)
+        self.assertEqual(statement.count, 2)
+
+    def test_named_placeholders_are_translated_in_order(self):
+        statement = compile_statement('SELECT :b, :a, :b', NUMERIC, named=True)
+        self.assertEqual(statement.sql, 'SELECT $1, $2, $3')
+        self.assertEqual(statement.names, ['b', 'a', 'b'])
+        self.assertEqual(statement.arguments({'a': 1, 'b': 2}), [2, 1, 2])
+
+    def test_named_placeholders_accept_digits(self):
+        statement = compile_statement('SELECT :value_1', QMARK, named=True)
+        self.assertEqual(statement.sql, 'SELECT ?')
+        self.assertEqual(statement.names, ['value_1'])
+
+    def test_placeholders_inside_literals_and_comments_are_ignored(self):
+        sql = """SELECT '?', ':name', "?", $$ ? $$, $tag$ :name $tag$, E'\\' ?' -- ?\n /* :name */ FROM t WHERE a = :a"""
+        statement = compile_statement(sql, QMARK, named=True)
+        self.assertEqual(statement.names, ['a'])
+        self.assertTrue(statement.sql.endswith('WHERE a = ?'))
+
+    def test_casts_are_not_named_placeholders(self):
+        statement = compile_statement('SELECT :value::int, created::date', QMARK, named=True)
+        self.assertEqual(statement.sql, 'SELECT ?::int, created::date')
+        self.assertEqual(statement.names, ['value'])
+
+    def test_named_tokens_are_kept_in_positional_mode(self):
+        statement = compile_statement("SELECT ?, :name", FORMAT)
+        self.assertEqual(statement.sql, 'SELECT %s, :name')
+
+    def test_question_marks_are_kept_in_named_mode(self):
+        statement = compile_statement("SELECT data ? 'key' FROM t WHERE id = :id", FORMAT, named=True)
+        self.assertEqual(statement.sql, "SELECT data ? 'key' FROM t WHERE id = %s")
+
+    def test_percent_signs_are_escaped_for_format_style_with_placeholders(self):
+        statement = compile_statement("SELECT 5 % 2, '100%' WHERE a = ?", FORMAT)
+        self.assertEqual(statement.sql, "SELECT 5 %% 2, '100%%' WHERE a = %s")
+
+    def test_percent_signs_are_kept_without_placeholders(self):
+        statement = compile_statement("SELECT '100%'", FORMAT)
+        self.assertEqual(statement.sql, "SELECT '100%'")
+
+    def test_percent_signs_are_kept_for_other_styles(self):
+        statement = compile_statement("SELECT '100%', 5 % ?", QMARK)
+        self.assertEqual(statement.sql, "SELECT '100%', 5 % ?")
+
+    def test_fingerprint_replaces_literals_and_numbers(self):
+        sql = "SELECT  *  FROM users WHERE name = 'John' AND age > 30 AND \"col1\" = t2"
+        self.assertEqual(fingerprint(sql), 'SELECT * FROM users WHERE name = ? AND age > ? AND "col1" = t2')
+
+    def test_fingerprint_is_the_same_for_every_paramstyle(self):
+        expected = 'SELECT * FROM users WHERE id = ? AND age % ? = ?'
+        self.assertEqual(fingerprint('SELECT * FROM users WHERE id = ? AND age % 2 = ?'), expected)
+        self.assertEqual(fingerprint('SELECT * FROM users WHERE id = %s AND age %% 2 = %s'), expected)
+        self.assertEqual(fingerprint('SELECT * FROM users WHERE id = $1 AND age % 2 = $2'), expected)
+
+    def test_cache_counts_hits_and_misses(self):
+        cache = StatementCache()
+        first = cache.get('SELECT ?', FORMAT)
+        self.assertIs(cache.get('SELECT ?', FORMAT), first)
+        cache.get('SELECT ?', NUMERIC)
+        self.assertEqual(cache.stats(), {'size': 2, 'max_size': 500, 'hits': 1, 'misses': 2})
+
+    def test_cache_evicts_least_recently_used_statement(self):
+        cache = StatementCache(max_size=2)
+        cache.get('SELECT 1', FORMAT)
+        cache.get('SELECT 2', FORMAT)
+        cache.get('SELECT 1', FORMAT)
+        cache.get('SELECT 3', FORMAT)
+        self.assertEqual([key[0] for key in cache.statements], ['SELECT 1', 'SELECT 3'])
+
+    def test_parse_can_skip_the_cache(self):
+        cache = StatementCache()
+        self.assertEqual(cache.parse('SELECT ?, ?', [1, 2], {}, FORMAT, cache=False), ('SELECT %s, %s', [1, 2]))
+        self.assertEqual(cache.parse('SELECT :a', (), {'a': 1}, NUMERIC, cache=False), ('SELECT $1', [1]))
+        self.assertEqual(cache.stats()['size'], 0)
@@ -0,0 +1,132 @@
+import threading
+import time
+from unittest import TestCase
+
+from rebel.database import Database
+from rebel.drivers.sqlite import SqliteDriver
+from rebel.exceptions import QueryTimeout
+from rebel.timeouts import Watchdog
+
+
+SLOW_QUERY = '''
+    WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter)
+    SELECT COUNT(*) FROM (SELECT x FROM counter LIMIT 1000000000)
+'''
+
+
+class TimeoutTestCase(TestCase):
+
+    def setUp(self):
+        self.db = Database(SqliteDriver(':memory:'))
+        self.db.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(254))')
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_query_with_timeout_is_cancelled(self):
+        started = time.time()
+        with self.assertRaises(QueryTimeout):
+            self.db.with_timeout(0.05).query_value(SLOW_QUERY)
+        self.assertLess(time.time() - started, 1)
+        self.assertEqual(self.db.query_value('SELECT 1'), 1)
+
+    def test_fast_queries_are_not_affected(self):
+        timed = self.db.with_timeout(5)
+        timed.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        self.assertEqual(timed.query_values('SELECT email FROM users'), ['foo@bar.com'])
+        self.assertEqual(list(timed.iter_query('SELECT id FROM users')), [{'id': 1}])
+        self.assertEqual(self.db.query_value(SLOW_QUERY.replace('1000000000', '1000')), 1000)
+
+    def test_builder_timeout(self):
+        with self.assertRaises(QueryTimeout):
+            self.db.sql(SLOW_QUERY).query(timeout=0.05)
+        with self.assertRaises(QueryTimeout):
+            list(self.db.sql(SLOW_QUERY).iter_query(timeout=0.05))
+
+    def test_database_default_timeout(self):
+        db = Database(SqliteDriver(':memory:'), timeout=0.05)
+        with self.assertRaises(QueryTimeout):
+            db.query_value(SLOW_QUERY)
+        self.assertEqual(db.with_timeout(5).query_value(SLOW_QUERY.replace('1000000000', '1000')), 1000)
+        db.close()
+
+    def test_execute_with_timeout(self):
+        with self.assertRaises(QueryTimeout):
+            self.db.with_timeout(0.05).execute('INSERT INTO users (email) ' + SLOW_QUERY)
+
+    def test_transaction_timeout_covers_the_whole_transaction(self):
+        with self.assertRaises(QueryTimeout):
+            with self.db.transaction(timeout=0.2):
+                self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+                self.db.query_value(SLOW_QUERY)
+        self.assertEqual(self.db.transaction_depth, 0)
+        self.assertIsNone(self.db.query_one('SELECT * FROM users'))
+
+    def test_expired_transaction_does_not_run_more_statements(self):
+        self.db.start_transaction(timeout=0.01)
+        time.sleep(0.02)
+        with self.assertRaises(QueryTimeout):
+            self.db.query_value('SELECT 1')
+        self.db.rollback()
+        self.assertEqual(self.db.query_value('SELECT 1'), 1)
+
+    def test_nested_transaction_keeps_the_outer_deadline(self):
+        with self.db.transaction(timeout=0.01):
+            with self.db.transaction(timeout=60):
+                time.sleep(0.02)
+                with self.assertRaises(QueryTimeout):
+                    self.db.query_value('SELECT 1')
+
+
+class WatchdogTestCase(TestCase):
+
+    def test_scheduled_callbacks_run_in_order(self):
+        watchdog = Watchdog()
+        calls = []
+        done = threading.Event()
+        watchdog.schedule(0.02, lambda: (calls.append(2), done.set()))
+        watchdog.schedule(0.01, lambda: calls.append(1))
+        self.assertTrue(done.wait(1))
+        self.assertEqual(calls, [1, 2])
+
+    def test_cancelled_callbacks_do_not_run(self):
+        watchdog = Watchdog()
+        calls = []
+        done = threading.Event()
+        entry = watchdog.schedule(0.01, lambda: calls.append(1))
+        watchdog.cancel(entry)
+        watchdog.schedule(0.02, done.set)
+        self.assertTrue(done.wait(1))
+        self.assertEqual(calls, [])
+
+    def test_callbacks_run_outside_the_lock(self):
+        watchdog = Watchdog()
+        started, proceed, done = threading.Event(), threading.Event(), threading.Event()
+        results = []
+
+        def callback():
+            started.set()
+            results.append(proceed.wait(1))
+            done.set()
+
+        watchdog.schedule(0, callback)
+        self.assertTrue(started.wait(1))
+        watchdog.cancel(watchdog.schedule(60, lambda: None))
+        proceed.set()
+        self.assertTrue(done.wait(1))
+        self.assertEqual(results, [True])
+
+    def test_cancel_waits_for_a_running_callback(self):
+        watchdog = Watchdog()
+        started = threading.Event()
+        calls = []
+
+        def callback():
+            started.set()
+            time.sleep(0.05)
+            calls.append(1)
+
+        entry = watchdog.schedule(0, callback)
+        self.assertTrue(started.wait(1))
+        watchdog.cancel(entry)
+        self.assertEqual(calls, [1])
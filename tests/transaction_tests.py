@@ -88,6 +88,59 @@ class TransactionTestCase(object):
         user = self.db.query_one('SELECT * FROM users')
         self.assertIsNone(user)
 
+    def test_nested_rollback_only_undoes_its_own_block(self):
+        self.db.start_transaction()
+        self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        self.db.start_transaction()
+        self.db.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+        self.db.rollback()
+        self.db.commit()
+        self.assertEqual(self.db.query_values('SELECT email FROM users'), ['foo@bar.com'])
+        self.assertFalse(self.db.rollback_issued)
+
+    def test_nested_commit_is_undone_by_outer_rollback(self):
+        self.db.start_transaction()
+        self.db.start_transaction()
+        self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        self.db.commit()
+        self.db.start_transaction()
+        self.db.execute('INSERT INTO users (email) VALUES (?)', 'bar@foo.com')
+        self.db.commit()
+        self.assertEqual(len(self.db.query_values('SELECT email FROM users')), 2)
+        self.db.rollback()
+        self.assertEqual(self.db.query_values('SELECT email FROM users'), [])
+
+    def test_rollback_in_the_middle_of_deeply_nested_transactions(self):
+        with self.db.transaction():
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'a@bar.com')
+            self.db.start_transaction()
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'b@bar.com')
+            with self.db.transaction():
+                self.db.execute('INSERT INTO users (email) VALUES (?)', 'c@bar.com')
+            self.db.rollback()
+            with self.db.transaction():
+                self.db.execute('INSERT INTO users (email) VALUES (?)', 'd@bar.com')
+        self.assertEqual(self.db.query_values('SELECT email FROM users ORDER BY id'), ['a@bar.com', 'd@bar.com'])
+
+    def test_failed_statement_in_nested_transaction_keeps_outer_transaction_usable(self):
+        with self.db.transaction():
+            self.db.execute('INSERT INTO users (id, email) VALUES (?, ?)', 1, 'foo@bar.com')
+            with self.assertRaises(Exception):
+                with self.db.transaction():
+                    self.db.execute('INSERT INTO users (id, email) VALUES (?, ?)', 1, 'bar@foo.com')
+            self.db.execute('INSERT INTO users (id, email) VALUES (?, ?)', 2, 'bar@foo.com')
+        self.assertEqual(self.db.query_values('SELECT email FROM users ORDER BY id'), ['foo@bar.com', 'bar@foo.com'])
+
+    def test_nested_rollback_poisons_the_whole_transaction_without_savepoints(self):
+        self.db.savepoints = False
+        self.db.start_transaction()
+        self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+        self.db.start_transaction()
+        self.db.rollback()
+        self.assertTrue(self.db.rollback_issued)
+        self.db.commit()
+        self.assertIsNone(self.db.query_one('SELECT * FROM users'))
+
     def test_database_is_in_autocommit_mode_outside_transaction(self):
         self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
         self.db.driver.rollback()
@@ -185,3 +238,32 @@ class TransactionTestCase(object):
                 raise test_exception_class()
         user = self.db.query_one('SELECT * FROM users')
         self.assertIsNone(user)
+
+    def test_retrying_transaction_returns_the_result_and_commits(self):
+        @self.db.retrying()
+        def add_user(email):
+            self.db.execute('INSERT INTO users (email) VALUES (?)', email)
+            return self.db.query_value('SELECT COUNT(*) FROM users')
+
+        self.assertEqual(add_user('foo@bar.com'), 1)
+        self.assertEqual(self.db.query_values('SELECT email FROM users'), ['foo@bar.com'])
+        self.assertEqual(add_user.retrying.stats(), {'calls': 1, 'retries': 0, 'failures': 0})
+
+    def test_retrying_transaction_does_not_retry_other_errors(self):
+        calls = []
+
+        def fail():
+            calls.append(1)
+            self.db.execute('INSERT INTO users (email) VALUES (?)', 'foo@bar.com')
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            self.db.run_in_transaction(fail, backoff=0)
+        self.assertEqual(len(calls), 1)
+        self.assertIsNone(self.db.query_one('SELECT * FROM users'))
+
+    def test_retrying_transaction_inside_transaction_runs_once(self):
+        with self.db.transaction():
+            result = self.db.run_in_transaction(lambda: self.db.transaction_depth)
+        self.assertEqual(result, 2)
+